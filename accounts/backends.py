@@ -0,0 +1,76 @@
+import copy
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+
+# Caché por proceso de los usuarios autenticados: {user_id: (expira_en, usuario)}
+_users = {}
+_users_lock = threading.Lock()
+
+# Tope de entradas; al alcanzarlo se descartan las vencidas y, si no alcanza, todas
+MAX_CACHED_USERS = 10000
+
+
+def forget_user(user_id):
+    """Descarta el usuario de la caché de este proceso; los demás procesos lo releen al vencer el TTL"""
+    with _users_lock:
+        _users.pop(user_id, None)
+
+
+def clear_user_cache():
+    with _users_lock:
+        _users.clear()
+
+
+def _cached(user_id):
+    with _users_lock:
+        entry = _users.get(user_id)
+    if entry is not None and entry[0] > time.monotonic():
+        # Cada request recibe su copia y no comparte lo que le agregue (p. ej. los roles por equipo)
+        return copy.copy(entry[1])
+    return None
+
+
+def _remember(user_id, user):
+    now = time.monotonic()
+    with _users_lock:
+        if len(_users) >= MAX_CACHED_USERS:
+            for key in [key for key, (expires, _) in _users.items() if expires <= now]:
+                del _users[key]
+            if len(_users) >= MAX_CACHED_USERS:
+                _users.clear()
+        _users[user_id] = (now + settings.AUTH_USER_CACHE_TTL, copy.copy(user))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend que no relee accounts_user en cada request durante ``AUTH_USER_CACHE_TTL`` segundos.
+
+    El usuario se invalida en este proceso al guardarse o borrarse (accounts.signals); en los
+    demás procesos un cambio de rol, contraseña o is_active se ve como mucho tras el TTL.
+    """
+
+    def get_user(self, user_id):
+        if settings.AUTH_USER_CACHE_TTL <= 0:
+            return super().get_user(user_id)
+        user = _cached(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                forget_user(user_id)
+            else:
+                _remember(user_id, user)
+        return user
+
+    async def aget_user(self, user_id):
+        if settings.AUTH_USER_CACHE_TTL <= 0:
+            return await super().aget_user(user_id)
+        user = _cached(user_id)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is None:
+                forget_user(user_id)
+            else:
+                _remember(user_id, user)
+        return user
@@ -63,4 +63,20 @@ class CustomAuthenticationForm(AuthenticationForm):
         self.helper.label_class = 'form-label'
         self.helper.field_class = 'mb-3'
         
-        self.helper.add_input(Submit('submit', 'Iniciar Sesión', css_class='btn btn-primary w-100'))
\ No newline at end of file
+        self.helper.add_input(Submit('submit', 'Iniciar Sesión', css_class='btn btn-primary w-100'))
+
+class NotificationPreferencesForm(forms.ModelForm):
+    class Meta:
+        model = User
+        fields = ('notification_digest',)
+        widgets = {
+            'notification_digest': forms.RadioSelect,
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.helper = FormHelper()
+        self.helper.form_method = 'post'
+        self.helper.form_tag = False
+
+        self.fields['notification_digest'].label = 'Correos de notificación'
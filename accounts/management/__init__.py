@@ -0,0 +1 @@
+# Este archivo hace que Python reconozca este directorio como un paquete
@@ -0,0 +1,74 @@
+import statistics
+import time
+import uuid
+from importlib import import_module
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from accounts.backends import clear_user_cache
+from accounts.models import User
+
+
+# (nombre, motor de sesiones, backend de autenticación)
+MODES = [
+    ('Sesión en BD + ModelBackend (antes)', 'django.contrib.sessions.backends.db',
+     'django.contrib.auth.backends.ModelBackend'),
+    ('Sesión cached_db + CachedModelBackend (después)', 'django.contrib.sessions.backends.cached_db',
+     'accounts.backends.CachedModelBackend'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide consultas y tiempo por request de la sesión y la carga del usuario autenticado '
+        '(SessionMiddleware + AuthenticationMiddleware), con sesiones en BD frente a sesiones y usuario cacheados'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{options['requests']} requests autenticados por modo, caché {settings.CACHES['default']['BACKEND']}")
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email=f'bench-auth-{uuid.uuid4().hex[:8]}@example.com', name='Bench auth', password='bench'
+            )
+            for name, engine, backend in MODES:
+                with override_settings(SESSION_ENGINE=engine, AUTHENTICATION_BACKENDS=[backend]):
+                    self.measure(name, user, options['requests'])
+            transaction.set_rollback(True)
+
+    def measure(self, name, user, count):
+        clear_user_cache()
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+
+        # Solo la parte de autenticación del stack: la vista fuerza la carga de request.user
+        handler = SessionMiddleware(AuthenticationMiddleware(lambda request: HttpResponse(request.user.pk)))
+        factory = RequestFactory()
+        factory.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        # El primer request llena las cachés; se mide el estado estable
+        handler(factory.get('/'))
+
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(count):
+                start = time.perf_counter()
+                handler(factory.get('/'))
+                timings.append((time.perf_counter() - start) * 1000)
+        session.delete()
+
+        timings.sort()
+        self.stdout.write(
+            f'{name}: {len(queries) / count:.2f} consultas por request | '
+            f'mediana {statistics.median(timings):.3f} ms | p95 {timings[int(len(timings) * 0.95) - 1]:.3f} ms'
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_is_active_user_is_staff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='last_digest_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='notification_digest',
+            field=models.CharField(choices=[('off', 'Un correo por notificación'), ('hourly', 'Resumen cada hora'), ('daily', 'Resumen diario')], default='off', max_length=10),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 
 
@@ -33,16 +35,34 @@ class User(AbstractBaseUser, PermissionsMixin):
         ('team_lead', 'Team Lead'),
     ]
 
+    DIGEST_CHOICES = [
+        ('off', 'Un correo por notificación'),
+        ('hourly', 'Resumen cada hora'),
+        ('daily', 'Resumen diario'),
+    ]
+
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='user')
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    # Con resumen activo las notificaciones no van al outbox y se agrupan en un solo correo por intervalo
+    notification_digest = models.CharField(max_length=10, choices=DIGEST_CHOICES, default='off')
+    last_digest_sent_at = models.DateTimeField(null=True, blank=True)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name']
 
+    class Meta:
+        indexes = [
+            # Autocompletado: name__istartswith / email__istartswith se traducen a UPPER(col) LIKE 'X%'
+            models.Index(OpClass(Upper('name'), name='text_pattern_ops'), name='user_name_prefix_idx'),
+            models.Index(OpClass(Upper('email'), name='text_pattern_ops'), name='user_email_prefix_idx'),
+            # Orden y cursor de las páginas de resultados
+            models.Index(fields=['name', 'id'], name='user_name_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
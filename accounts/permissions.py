@@ -2,6 +2,7 @@ from functools import wraps
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
+from .team_roles import get_team_roles
 
 
 def admin_required(view_func):
@@ -48,11 +49,16 @@ def user_required(view_func):
     return wrapper
 
 
+def _team_id(team):
+    # Se acepta el equipo o su id, para no cargar el equipo solo para el chequeo (p. ej. task.team_id)
+    return getattr(team, 'pk', team)
+
+
 def is_team_lead_of(user, team):
     """Verifica si el usuario es el líder del equipo"""
-    return team.team_lead == user or user.role == 'admin'
+    return user.role == 'admin' or _team_id(team) in get_team_roles(user).led_team_ids
 
 
 def is_member_of(user, team):
     """Verifica si el usuario es miembro del equipo"""
-    return team.members.filter(id=user.id).exists() or is_team_lead_of(user, team)
+    return _team_id(team) in get_team_roles(user).member_team_ids or is_team_lead_of(user, team)
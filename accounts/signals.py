@@ -0,0 +1,53 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from teams.models import Team, TeamMembership
+from .backends import forget_user
+from .models import User
+from .team_roles import invalidate_team_roles
+
+
+# Caché de usuarios autenticados (accounts.backends)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+# Caché de roles por equipo (accounts.team_roles)
+
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+def invalidate_roles_on_membership_change(sender, instance, **kwargs):
+    # También cubre team.members.remove/clear y los borrados en cascada
+    invalidate_team_roles([instance.user_id])
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def invalidate_roles_on_members_add(sender, instance, action, reverse, pk_set, **kwargs):
+    # team.members.add usa bulk_create y no emite post_save de TeamMembership
+    if action != 'post_add':
+        return
+    invalidate_team_roles([instance.pk] if reverse else pk_set)
+
+
+@receiver(pre_save, sender=Team)
+def remember_previous_team_lead(sender, instance, **kwargs):
+    instance._previous_team_lead_id = None
+    if instance.pk:
+        instance._previous_team_lead_id = Team.all_objects.filter(pk=instance.pk).values_list(
+            'team_lead_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Team)
+def invalidate_roles_on_team_lead_change(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_team_lead_id', None)
+    if created or previous != instance.team_lead_id:
+        invalidate_team_roles([previous, instance.team_lead_id])
+
+
+@receiver(pre_delete, sender=Team)
+def invalidate_roles_on_team_delete(sender, instance, **kwargs):
+    # Los miembros se invalidan con el post_delete de sus membresías
+    invalidate_team_roles([instance.team_lead_id])
@@ -0,0 +1,80 @@
+import time
+from typing import NamedTuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value
+
+
+VERSION_KEY = 'team_roles:version:user:{}'
+ROLES_KEY = 'team_roles:{}:{}'
+
+
+class TeamRoles(NamedTuple):
+    """Equipos que el usuario lidera y equipos de los que es miembro"""
+    led_team_ids: frozenset
+    member_team_ids: frozenset
+
+
+NO_ROLES = TeamRoles(frozenset(), frozenset())
+
+
+def _version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Un valor basado en el tiempo evita reutilizar roles viejos si la clave de versión se pierde
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def load_team_roles(user_id):
+    """Lee de la base de datos, en una sola consulta, los equipos liderados y los equipos del usuario"""
+    from teams.models import Team, TeamMembership
+
+    led = Team.objects.filter(team_lead_id=user_id).values_list('pk', Value(True))
+    member = TeamMembership.objects.filter(user_id=user_id, team__deleted_at__isnull=True).values_list(
+        'team_id', Value(False)
+    )
+    rows = list(led.union(member, all=True))
+    return TeamRoles(
+        frozenset(team_id for team_id, is_lead in rows if is_lead),
+        frozenset(team_id for team_id, is_lead in rows if not is_lead),
+    )
+
+
+def get_team_roles(user):
+    """Roles del usuario en sus equipos; se calculan una vez por instancia de usuario (es decir, por request)"""
+    if not user.is_authenticated:
+        return NO_ROLES
+    roles = getattr(user, '_team_roles', None)
+    if roles is None:
+        key = ROLES_KEY.format(user.pk, _version(user.pk))
+        roles = cache.get(key)
+        if roles is None:
+            roles = load_team_roles(user.pk)
+            cache.set(key, roles, settings.TEAM_ROLES_CACHE_TIMEOUT)
+        user._team_roles = roles
+    return roles
+
+
+def invalidate_team_roles(user_ids):
+    """Invalida los roles cacheados de los usuarios indicados.
+
+    Se invalida ya, para los requests que lean dentro de la misma transacción, y otra vez al
+    confirmarse, para descartar lo que otro request haya cacheado antes de ver el cambio.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+
+    def bump():
+        for user_id in user_ids:
+            try:
+                cache.incr(VERSION_KEY.format(user_id))
+            except ValueError:
+                # Sin versión no hay roles cacheados que invalidar
+                pass
+
+    if user_ids:
+        bump()
+        transaction.on_commit(bump)
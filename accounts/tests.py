@@ -1,5 +1,13 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.backends import clear_user_cache
 from accounts.models import User
+from accounts.permissions import is_member_of, is_team_lead_of
+from tasks.models import Task
+from teams.models import Team, TeamMembership
 #Test unitarios 
 
 #Crear usuario
@@ -46,3 +54,172 @@ class UserModelTest(TestCase):
         )
 
         self.assertIn(user.role, ["admin", "user", "team_lead"])
+
+
+#Preferencias de notificación
+class NotificationPreferencesTest(TestCase):
+
+    def test_user_can_enable_digest(self):
+        user = User.objects.create_user(email="digest@test.com", name="Digest", password="123456")
+        self.client.force_login(user)
+
+        response = self.client.get('/accounts/preferences/')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post('/accounts/preferences/', {'notification_digest': 'daily'})
+        self.assertRedirects(response, '/accounts/preferences/')
+        user.refresh_from_db()
+        self.assertEqual(user.notification_digest, 'daily')
+
+
+#Roles por equipo cacheados para los chequeos de permisos
+class TeamRolesTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.lead = User.objects.create_user(email="lead@test.com", name="Lead", password="123456", role="team_lead")
+        self.member = User.objects.create_user(email="member@test.com", name="Member", password="123456")
+        self.team = Team.objects.create(name="Equipo", created_by=self.lead, team_lead=self.lead)
+        TeamMembership.objects.create(team=self.team, user=self.member)
+
+    def test_checks_answer_from_one_query(self):
+        other = Team.objects.create(name="Otro", created_by=self.lead)
+        lead = User.objects.get(pk=self.lead.pk)
+        member = User.objects.get(pk=self.member.pk)
+
+        with self.assertNumQueries(2):
+            self.assertTrue(is_team_lead_of(lead, self.team))
+            self.assertTrue(is_member_of(lead, self.team.pk))
+            self.assertFalse(is_team_lead_of(lead, other))
+            self.assertTrue(is_member_of(member, self.team))
+            self.assertFalse(is_team_lead_of(member, self.team))
+            self.assertFalse(is_member_of(member, other.pk))
+
+        # Otra instancia del usuario (otro request) lee los roles de la caché
+        with self.assertNumQueries(0):
+            self.assertTrue(is_team_lead_of(User(pk=self.lead.pk, role="team_lead"), self.team))
+
+    def test_changes_invalidate_cached_roles(self):
+        outsider = User.objects.create_user(email="outsider@test.com", name="Outsider", password="123456", role="team_lead")
+        self.assertFalse(is_member_of(User.objects.get(pk=outsider.pk), self.team))
+
+        self.team.members.add(outsider)
+        self.assertTrue(is_member_of(User.objects.get(pk=outsider.pk), self.team))
+
+        self.team.team_lead = outsider
+        self.team.save()
+        self.assertTrue(is_team_lead_of(User.objects.get(pk=outsider.pk), self.team))
+        self.assertFalse(is_team_lead_of(User.objects.get(pk=self.lead.pk), self.team))
+
+        TeamMembership.objects.filter(team=self.team, user=self.member).delete()
+        self.assertFalse(is_member_of(User.objects.get(pk=self.member.pk), self.team))
+
+    def test_task_views_check_lead_from_roles(self):
+        task = Task.objects.create(title="Tarea", team=self.team, created_by=self.lead)
+        other_lead = User.objects.create_user(email="other@test.com", name="Other", password="123456", role="team_lead")
+
+        self.client.force_login(other_lead)
+        response = self.client.get(reverse('task-update', kwargs={'uuid': task.uuid}))
+        self.assertRedirects(response, reverse('task-detail', kwargs={'uuid': task.uuid}))
+
+        self.client.force_login(self.lead)
+        response = self.client.get(reverse('task-update', kwargs={'uuid': task.uuid}))
+        self.assertEqual(response.status_code, 200)
+
+
+#Autocompletado de usuarios
+class UserSearchTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="root@test.com", name="Root", password="123456", role="admin")
+        self.lead = User.objects.create_user(email="lead@test.com", name="Lead", password="123456", role="team_lead")
+        self.team = Team.objects.create(name="Equipo", created_by=self.admin, team_lead=self.lead)
+        self.ana = User.objects.create_user(email="ana@test.com", name="Ana", password="123456")
+        self.andres = User.objects.create_user(email="zeta@test.com", name="Andrés", password="123456")
+        self.bruno = User.objects.create_user(email="bruno@test.com", name="Bruno", password="123456")
+        TeamMembership.objects.create(team=self.team, user=self.ana)
+
+    def search(self, user, **params):
+        self.client.force_login(user)
+        return self.client.get(reverse('user-search'), params)
+
+    def names(self, response):
+        return [user['name'] for user in response.json()['results']]
+
+    def test_prefix_search_on_name_and_email(self):
+        self.assertEqual(self.names(self.search(self.admin, q='an')), ['Ana', 'Andrés'])
+        self.assertEqual(self.names(self.search(self.admin, q='ZETA')), ['Andrés'])
+        self.assertEqual(self.names(self.search(self.admin, q='na')), [])
+
+    def test_results_are_paginated_by_cursor(self):
+        for i in range(25):
+            User.objects.create_user(email=f"p{i}@test.com", name=f"Pedro {i:02d}", password="123456")
+
+        first = self.search(self.admin, q='pedro').json()
+        self.assertEqual(len(first['results']), 20)
+        second = self.search(self.admin, q='pedro', cursor=first['next_cursor']).json()
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(self.search(self.admin, cursor='x').status_code, 400)
+
+    def test_scopes_follow_roles(self):
+        # El líder solo asigna a los miembros de sus equipos
+        self.assertEqual(self.names(self.search(self.lead, scope='assignees')), ['Ana'])
+        # Candidatos a miembro: activos, no miembros y sin admins para el líder
+        self.assertEqual(self.names(self.search(self.lead, scope='new_members', team=self.team.pk)), ['Andrés', 'Bruno', 'Lead'])
+        self.assertEqual(self.names(self.search(self.lead, scope='team_leads')), [])
+        self.assertEqual(self.names(self.search(self.admin, scope='team_leads')), ['Lead', 'Root'])
+
+        outsider = User.objects.create_user(email="other@test.com", name="Other", password="123456", role="team_lead")
+        self.assertEqual(self.names(self.search(outsider, scope='new_members', team=self.team.pk)), [])
+        self.assertEqual(self.search(self.lead, scope='new_members').status_code, 400)
+
+    def test_task_form_ignores_users_outside_scope(self):
+        self.client.force_login(self.lead)
+        self.client.post(reverse('task-create'), {
+            'title': 'Tarea', 'team': self.team.pk, 'priority': 'medium',
+            'assigned_to': [self.ana.pk, self.bruno.pk],
+        })
+        task = Task.objects.get(title='Tarea')
+        self.assertEqual(list(task.assigned_to.all()), [self.ana])
+
+
+#Sesión y usuario cacheados
+class CachedAuthTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        clear_user_cache()
+        self.user = User.objects.create_user(email="cached@test.com", name="Cached", password="123456")
+        self.client.force_login(self.user)
+
+    def auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if 'django_session' in query['sql'] or 'FROM "accounts_user" WHERE "accounts_user"."id" =' in query['sql']
+        ]
+
+    def test_dashboard_does_no_auth_queries_when_warm(self):
+        self.auth_queries()
+        self.assertEqual(self.auth_queries(), [])
+
+    def test_user_changes_are_seen_on_next_request(self):
+        self.auth_queries()
+        self.user.role = "team_lead"
+        self.user.save()
+
+        self.assertEqual(len(self.auth_queries()), 1)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.wsgi_request.user.role, "team_lead")
+
+    def test_deactivated_user_is_logged_out(self):
+        self.auth_queries()
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 302)
@@ -5,4 +5,6 @@ urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('login/', views.CustomLoginView.as_view(), name='login'),
     path('logout/', views.CustomLogoutView.as_view(), name='logout'),
+    path('preferences/', views.NotificationPreferencesView.as_view(), name='notification-preferences'),
+    path('users/search/', views.user_search, name='user-search'),
 ]
@@ -0,0 +1,52 @@
+from django.db.models import Q
+from tasks.pagination import keyset_paginate
+from teams.models import TeamMembership
+from .models import User
+from .permissions import is_team_lead_of
+
+
+# Resultados por página del autocompletado; el orden coincide con el índice (name, id)
+USER_SEARCH_PAGE_SIZE = 20
+USER_SEARCH_ORDERING = ('name', 'id')
+
+
+def assignable_users(user, team_id=None):
+    """Usuarios que ``user`` puede asignar a tareas; con ``team_id``, solo los miembros de ese equipo"""
+    if team_id is not None:
+        if not is_team_lead_of(user, team_id):
+            return User.objects.none()
+        return User.objects.filter(teams__id=team_id)
+    if user.role == 'admin':
+        return User.objects.filter(is_active=True)
+    if user.role == 'team_lead':
+        # Miembros de los equipos del líder; la subconsulta evita duplicados sin DISTINCT
+        led = TeamMembership.objects.filter(team__team_lead=user).values('user_id')
+        return User.objects.filter(pk__in=led)
+    return User.objects.none()
+
+
+def candidate_members(user, team_id):
+    """Usuarios activos que ``user`` puede agregar al equipo: aún no son miembros y, para líderes, no son admins"""
+    if not is_team_lead_of(user, team_id):
+        return User.objects.none()
+    users = User.objects.filter(is_active=True).exclude(
+        pk__in=TeamMembership.objects.filter(team_id=team_id).values('user_id')
+    )
+    if user.role != 'admin':
+        users = users.exclude(role='admin')
+    return users
+
+
+def lead_candidates(user):
+    """Usuarios que un admin puede designar líderes de equipo"""
+    if user.role != 'admin':
+        return User.objects.none()
+    return User.objects.filter(role__in=['team_lead', 'admin'])
+
+
+def search_users(queryset, term, cursor=None, page_size=USER_SEARCH_PAGE_SIZE):
+    """Página de usuarios cuyo nombre o correo empieza con ``term``; usa los índices de prefijo"""
+    term = term.strip()
+    if term:
+        queryset = queryset.filter(Q(name__istartswith=term) | Q(email__istartswith=term))
+    return keyset_paginate(queryset, USER_SEARCH_ORDERING, cursor, page_size)
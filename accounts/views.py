@@ -2,11 +2,16 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import CreateView
+from django.views.generic import CreateView, UpdateView
 from django.urls import reverse_lazy
 from django.contrib import messages
-from .forms import CustomUserCreationForm, CustomAuthenticationForm
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from tasks.pagination import InvalidCursor
+from .forms import CustomUserCreationForm, CustomAuthenticationForm, NotificationPreferencesForm
 from .models import User
+from .permissions import user_required
+from .user_search import assignable_users, candidate_members, lead_candidates, search_users
 
 
 class RegisterView(CreateView):
@@ -48,3 +53,53 @@ class CustomLogoutView(LogoutView):
     def dispatch(self, request, *args, **kwargs):
         messages.info(request, 'Has cerrado sesión exitosamente.')
         return super().dispatch(request, *args, **kwargs)
+
+
+class NotificationPreferencesView(LoginRequiredMixin, UpdateView):
+    form_class = NotificationPreferencesForm
+    template_name = 'registration/notification_preferences.html'
+    success_url = reverse_lazy('notification-preferences')
+
+    def get_object(self, queryset=None):
+        return self.request.user
+
+    def form_valid(self, form):
+        messages.success(self.request, 'Preferencias de notificación actualizadas.')
+        return super().form_valid(form)
+
+
+@require_GET
+@user_required
+def user_search(request):
+    """Autocompletado de usuarios por prefijo de nombre o correo, acotado según ``scope`` y el rol"""
+    scope = request.GET.get('scope', 'assignees')
+    team_id = request.GET.get('team') or None
+    if team_id is not None:
+        try:
+            team_id = int(team_id)
+        except ValueError:
+            return JsonResponse({'error': 'Equipo inválido.'}, status=400)
+
+    if scope == 'assignees':
+        users = assignable_users(request.user, team_id)
+    elif scope == 'new_members' and team_id is not None:
+        users = candidate_members(request.user, team_id)
+    elif scope == 'team_leads':
+        users = lead_candidates(request.user)
+    else:
+        return JsonResponse({'error': 'Búsqueda inválida.'}, status=400)
+
+    try:
+        page = search_users(
+            users.only('id', 'name', 'email', 'role'), request.GET.get('q', ''), request.GET.get('cursor')
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Cursor inválido.'}, status=400)
+
+    return JsonResponse({
+        'results': [
+            {'id': user.pk, 'name': user.name, 'email': user.email, 'role': user.get_role_display()}
+            for user in page
+        ],
+        'next_cursor': page.next_cursor,
+    })
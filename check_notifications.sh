@@ -3,3 +3,4 @@
 
 cd /code
 python manage.py send_task_notifications
+python manage.py send_notification_digests
@@ -9,8 +9,16 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# Se sirve con uvicorn para que los streams SSE (notifications/stream/) no ocupen un worker cada uno
 application = get_asgi_application()
+
+if settings.DEBUG:
+    # Sin runserver, los archivos estáticos se sirven aquí durante el desarrollo
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'crispy_forms',
     'crispy_bootstrap5',
     'accounts',
@@ -53,9 +54,17 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 AUTH_USER_MODEL = 'accounts.User'
 
 AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend',
+    # Atiende las sesiones iniciadas antes de CachedModelBackend, que guardan este backend
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# Segundos que cada proceso reutiliza el usuario autenticado sin leerlo de la base de datos; 0 lo desactiva
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+
+# cached_db lee la sesión de la caché y escribe en caché y base de datos; db vuelve al comportamiento anterior
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -78,6 +87,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'notifications.context_processors.unread_notifications',
             ],
         },
     },
@@ -101,6 +111,39 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Por defecto memoria local; usar FileBasedCache para compartir la caché entre procesos
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='task-system'),
+    }
+}
+
+# Segundos que se conserva el contexto cacheado del dashboard de cada usuario
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)
+
+# Filas por transacción al importar miembros de equipo (import_team_members)
+TEAM_IMPORT_CHUNK_SIZE = config('TEAM_IMPORT_CHUNK_SIZE', default=1000, cast=int)
+
+# Tareas o membresías borradas por transacción al purgar equipos eliminados (purge_deleted_teams)
+TEAM_PURGE_BATCH_SIZE = config('TEAM_PURGE_BATCH_SIZE', default=500, cast=int)
+
+# Segundos que se conservan en caché los equipos liderados y de los que es miembro cada usuario
+TEAM_ROLES_CACHE_TIMEOUT = config('TEAM_ROLES_CACHE_TIMEOUT', default=300, cast=int)
+
+# Segundos que se conserva el contador de notificaciones sin leer; acota cualquier desajuste (p. ej. al borrar tareas)
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = config('NOTIFICATION_UNREAD_CACHE_TIMEOUT', default=300, cast=int)
+
+
+# Búsqueda de texto completo
+# Configuración de PostgreSQL usada para el tsvector de las tareas y las consultas de búsqueda
+
+TASK_SEARCH_CONFIG = config('TASK_SEARCH_CONFIG', default='spanish')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -151,3 +194,43 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=config('EMAIL_HOST_USER'))
+
+# Email outbox: el worker process_email_outbox envía los correos fuera de la petición HTTP
+EMAIL_OUTBOX_WORKERS = config('EMAIL_OUTBOX_WORKERS', default=4, cast=int)
+EMAIL_OUTBOX_POOL = config('EMAIL_OUTBOX_POOL', default='thread')
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+# Correos que un worker envía seguidos por la misma conexión SMTP
+EMAIL_OUTBOX_CHUNK_SIZE = config('EMAIL_OUTBOX_CHUNK_SIZE', default=20, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+# Espera antes del primer reintento; se duplica en cada intento fallido
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=60, cast=int)
+# Usuarios cuyos resúmenes se arman por lote (una consulta de notificaciones por lote)
+NOTIFICATION_DIGEST_BATCH_SIZE = config('NOTIFICATION_DIGEST_BATCH_SIZE', default=200, cast=int)
+
+# Retención: archive_notifications mueve al archivo las leídas más antiguas y purga el archivo vencido
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)
+NOTIFICATION_ARCHIVE_RETENTION_DAYS = config('NOTIFICATION_ARCHIVE_RETENTION_DAYS', default=365, cast=int)
+
+# Directorio del textfile collector de node_exporter donde los comandos de notificaciones dejan sus métricas
+NOTIFICATION_METRICS_DIR = config('NOTIFICATION_METRICS_DIR', default='')
+
+
+# Logging
+# Las métricas de los comandos se registran como una línea JSON por ejecución
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+        'json_line': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+        'metrics': {'class': 'logging.StreamHandler', 'formatter': 'json_line'},
+    },
+    'loggers': {
+        'notifications': {'handlers': ['console'], 'level': 'INFO'},
+        'notifications.metrics': {'handlers': ['metrics'], 'level': 'INFO', 'propagate': False},
+    },
+}
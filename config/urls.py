@@ -9,4 +9,5 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),
     path('dashboard/', include('tasks.urls')),
     path('teams/', include('teams.urls')),
+    path('notifications/', include('notifications.urls')),
 ]
\ No newline at end of file
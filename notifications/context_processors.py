@@ -0,0 +1,8 @@
+from .unread import get_unread_count
+
+
+def unread_notifications(request):
+    """Contador de notificaciones sin leer para el badge de la navbar"""
+    if not request.user.is_authenticated:
+        return {}
+    return {'unread_notifications_count': get_unread_count(request.user.pk)}
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+from itertools import islice
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.template.loader import get_template
+from django.utils import timezone
+from accounts.models import User
+from notifications.models import Notification
+from notifications.outbox import deliver
+from notifications.services import NOTIFICATION_CONFIG, PRIORITY_COLORS
+
+
+# Tiempo mínimo entre dos resúmenes de un mismo usuario, según su preferencia
+DIGEST_INTERVALS = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+}
+
+
+@lru_cache(maxsize=None)
+def get_digest_template():
+    """Template HTML del resumen, compilado una sola vez por proceso"""
+    return get_template('emails/task_digest.html')
+
+
+def pending_digest_notifications():
+    """Notificaciones que esperan un resumen: sin correo enviado y sin fila en el outbox"""
+    return Notification.objects.active().filter(email_sent=False, outbox__isnull=True)
+
+
+def due_digest_users(now):
+    """Usuarios con resumen activo, con notificaciones pendientes y cuyo intervalo ya se cumplió"""
+    due = Q()
+    for digest, interval in DIGEST_INTERVALS.items():
+        due |= Q(notification_digest=digest) & (
+            Q(last_digest_sent_at__isnull=True) | Q(last_digest_sent_at__lte=now - interval)
+        )
+    pending = pending_digest_notifications().filter(user=OuterRef('pk'))
+    return User.objects.filter(due, Exists(pending), is_active=True).order_by('pk')
+
+
+def build_digest_email(user, notifications):
+    """Construye el correo de resumen de un usuario con todas sus notificaciones pendientes"""
+    subject = f'📬 Resumen de SystemTask: {len(notifications)} notificaciones'
+    items = []
+    for notification in notifications:
+        config = NOTIFICATION_CONFIG.get(notification.notification_type, NOTIFICATION_CONFIG['task_created'])
+        task = notification.task
+        items.append({
+            'display': config['display'],
+            'badge_color': config['badge_color'],
+            'message': notification.message,
+            'task_title': task.title if task else '',
+            'task_priority': task.get_priority_display() if task else '',
+            'priority_color': PRIORITY_COLORS.get(task.priority, '#3b82f6') if task else '#3b82f6',
+            'task_due_date': task.due_date.strftime('%d/%m/%Y %H:%M') if task and task.due_date else 'Sin fecha',
+            'task_team': task.team.name if task else '',
+        })
+
+    html_content = get_digest_template().render({
+        'subject': subject,
+        'user_name': user.name,
+        'items': items,
+    })
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body='\n'.join(f'- {notification.message}' for notification in notifications),  # Texto plano como fallback
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email]
+    )
+    email.attach_alternative(html_content, "text/html")
+    return email
+
+
+def send_digests(batch_size=None):
+    """Envía los resúmenes vencidos; devuelve (usuarios, notificaciones, fallidos).
+
+    Las notificaciones de cada lote de usuarios se leen con una sola consulta y se
+    marcan con un UPDATE; un resumen que falla queda pendiente para la próxima ejecución.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_DIGEST_BATCH_SIZE
+    now = timezone.now()
+    totals = [0, 0, 0]
+
+    stream = due_digest_users(now).iterator(chunk_size=batch_size)
+    while users := list(islice(stream, batch_size)):
+        pending = defaultdict(list)
+        for notification in pending_digest_notifications().filter(
+            user__in=users, created_at__lte=now
+        ).select_related('task__team').order_by('created_at'):
+            pending[notification.user_id].append(notification)
+
+        users = [user for user in users if pending[user.pk]]
+        errors = deliver([build_digest_email(user, pending[user.pk]) for user in users])
+        sent = [user for user, error in zip(users, errors) if not error]
+
+        with transaction.atomic():
+            Notification.objects.filter(
+                pk__in=[notification.pk for user in sent for notification in pending[user.pk]]
+            ).update(email_sent=True)
+            User.objects.filter(pk__in=[user.pk for user in sent]).update(last_digest_sent_at=now)
+
+        totals[0] += len(sent)
+        totals[1] += sum(len(pending[user.pk]) for user in sent)
+        totals[2] += len(users) - len(sent)
+
+    return tuple(totals)
@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+from django.db import connection
+
+
+@contextmanager
+def advisory_lock(name):
+    """Lock de sesión de PostgreSQL identificado por ``name``; produce False si otra sesión ya lo tiene.
+
+    Evita que dos réplicas del mismo cron hagan la misma ejecución a la vez. No espera:
+    la segunda ejecución simplemente se omite.
+    """
+    if connection.vendor != 'postgresql':
+        yield True
+        return
+    
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(hashtext(%s))', [name])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(hashtext(%s))', [name])
@@ -0,0 +1,55 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from notifications.retention import (
+    archive_is_partitioned, archive_read_notifications, delete_archived, drop_archive_partitions, partition_archive
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve al archivo las notificaciones leídas más antiguas que el período de retención, '
+        'por lotes reanudables, y purga el archivo vencido'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.NOTIFICATION_RETENTION_DAYS,
+            help='Días que una notificación leída permanece en la tabla viva'
+        )
+        parser.add_argument(
+            '--archive-days', type=int, default=settings.NOTIFICATION_ARCHIVE_RETENTION_DAYS,
+            help='Días que se conserva el archivo (0 para no purgarlo)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Notificaciones movidas por transacción')
+        parser.add_argument(
+            '--max-batches', type=int, default=None, help='Detenerse tras N lotes; la próxima ejecución continúa'
+        )
+        parser.add_argument(
+            '--partition', action='store_true', help='Convertir el archivo en tabla particionada por mes (PostgreSQL)'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+
+        if options['partition']:
+            if archive_is_partitioned():
+                raise CommandError('El archivo ya está particionado')
+            partition_archive()
+            self.stdout.write('Archivo convertido en tabla particionada por mes')
+
+        moved = archive_read_notifications(
+            now - timedelta(days=options['days']), options['batch_size'], options['max_batches']
+        )
+        self.stdout.write(f'Notificaciones archivadas: {moved}')
+
+        if options['archive_days']:
+            cutoff = now - timedelta(days=options['archive_days'])
+            if archive_is_partitioned():
+                dropped = drop_archive_partitions(cutoff)
+                self.stdout.write(f"Particiones eliminadas: {', '.join(dropped) or 'ninguna'}")
+            else:
+                self.stdout.write(f"Notificaciones archivadas eliminadas: {delete_archived(cutoff, options['batch_size'])}")
+
+        self.stdout.write(self.style.SUCCESS('Proceso completado'))
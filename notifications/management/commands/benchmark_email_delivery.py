@@ -0,0 +1,122 @@
+import socketserver
+import threading
+import time
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from accounts.models import User
+from teams.models import Team
+from tasks.models import Task
+from notifications.outbox import chunked, close_connections, create_executor, deliver
+from notifications.services import build_task_notification_email
+
+
+class SMTPSink(socketserver.StreamRequestHandler):
+    """Servidor SMTP mínimo que acepta y descarta los correos"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        # Simula el costo de abrir la sesión (TCP + TLS) contra un servidor real
+        time.sleep(self.server.connect_latency)
+        self.reply('220 benchmark ESMTP')
+        while line := self.rfile.readline():
+            command = line.decode(errors='replace').strip().upper()
+            if command.startswith('DATA'):
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with self.server.lock:
+                    self.server.received += 1
+                self.reply('250 OK')
+            elif command.startswith('QUIT'):
+                self.reply('221 Bye')
+                return
+            elif command.startswith(('EHLO', 'HELO', 'MAIL', 'RCPT', 'RSET', 'NOOP')):
+                self.reply('250 OK')
+            else:
+                self.reply('502 Command not implemented')
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide correos por segundo contra un servidor SMTP local: una conexión por correo '
+        'frente a conexiones reutilizadas del worker del outbox'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--chunk-size', type=int, default=20)
+        parser.add_argument(
+            '--connect-latency', type=float, default=50, help='Milisegundos que tarda en abrirse cada sesión SMTP'
+        )
+
+    def handle(self, *args, **options):
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPSink)
+        server.daemon_threads = True
+        server.connect_latency = options['connect_latency'] / 1000
+        server.lock = threading.Lock()
+        server.received = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        smtp_settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        )
+        try:
+            with smtp_settings:
+                messages = self.build_messages(options['messages'])
+                self.stdout.write(
+                    f"{len(messages)} correos, latencia de conexión {options['connect_latency']:.0f} ms"
+                )
+                self.measure('Una conexión por correo (email.send())', server, messages, self.send_each)
+                self.measure(
+                    'Conexión reutilizada, 1 worker', server, messages,
+                    lambda batch: self.send_reused(batch, 1, options['chunk_size'])
+                )
+                self.measure(
+                    f"Conexión reutilizada, {options['workers']} workers", server, messages,
+                    lambda batch: self.send_reused(batch, options['workers'], options['chunk_size'])
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def build_messages(self, count):
+        team = Team(name='Benchmark')
+        task = Task(team=team, title='Tarea de benchmark', description='Medición de envío de correos')
+        return [
+            build_task_notification_email(User(name=f'Usuario {i}', email=f'user{i}@example.com'), task, 'task_created')
+            for i in range(count)
+        ]
+
+    def send_each(self, messages):
+        # Comportamiento anterior: cada correo abre y cierra su propia sesión SMTP
+        for message in messages:
+            message.connection = get_connection()
+            message.send(fail_silently=False)
+            message.connection = None
+
+    def send_reused(self, messages, workers, chunk_size):
+        with create_executor('thread', workers) as executor:
+            errors = [error for chunk in executor.map(deliver, chunked(messages, chunk_size)) for error in chunk]
+            close_connections()
+        failed = [error for error in errors if error]
+        if failed:
+            self.stderr.write(f'{len(failed)} correos fallaron: {failed[0]}')
+
+    def measure(self, name, server, messages, send):
+        server.received = 0
+        start = time.perf_counter()
+        send(messages)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{name}: {server.received} recibidos en {elapsed:.2f} s ({server.received / elapsed:.1f} correos/s)'
+        )
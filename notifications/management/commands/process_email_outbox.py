@@ -0,0 +1,38 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifications.metrics import JobMetrics
+from notifications.outbox import close_connections, create_executor, process_batch
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes del outbox con un pool de workers y reintentos con espera exponencial'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.EMAIL_OUTBOX_WORKERS)
+        parser.add_argument('--pool', choices=['thread', 'process'], default=settings.EMAIL_OUTBOX_POOL)
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--once', action='store_true', help='Enviar lo pendiente y terminar')
+        parser.add_argument('--sleep', type=float, default=5, help='Segundos de espera cuando no hay correos')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Worker de correos: {options['workers']} workers ({options['pool']})")
+        with create_executor(options['pool'], options['workers']) as executor:
+            try:
+                while True:
+                    # Cada lote con correos es una ejecución con sus propias métricas
+                    metrics = JobMetrics('process_email_outbox')
+                    with metrics.run():
+                        sent, failed = process_batch(executor, options['batch_size'], metrics)
+                    if sent or failed:
+                        self.stdout.write(f'Enviados: {sent} | Fallidos: {failed}')
+                        metrics.report()
+                    elif options['once']:
+                        break
+                    else:
+                        time.sleep(options['sleep'])
+            except KeyboardInterrupt:
+                self.stdout.write('Worker detenido')
+            finally:
+                close_connections()
+        self.stdout.write(self.style.SUCCESS('Proceso completado'))
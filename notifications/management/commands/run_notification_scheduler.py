@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+from django.db import DatabaseError, connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from notifications.scheduler import DeadlineScheduler, listen, wait_for_announcements
+from notifications.services import check_and_send_due_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        'Scheduler de avisos de vencimiento: duerme hasta el próximo vencimiento, se re-arma con los '
+        'cambios de tareas (LISTEN/NOTIFY de PostgreSQL) y resincroniza periódicamente'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resync', type=int, default=600, help='Segundos entre resincronizaciones completas con la base de datos'
+        )
+        parser.add_argument(
+            '--retry', type=int, default=10, help='Segundos de espera tras perder la conexión a la base de datos'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Scheduler de notificaciones iniciado')
+        try:
+            while True:
+                try:
+                    # Tras un error se parte de cero: los avisos que se dispararon sin enviarse se vuelven a armar
+                    self.run(DeadlineScheduler(timedelta(seconds=options['resync'])))
+                except DatabaseError as error:
+                    self.stderr.write(f'Error de base de datos: {error}; reintentando')
+                    connection.close()
+                    time.sleep(options['retry'])
+        except KeyboardInterrupt:
+            self.stdout.write('Scheduler detenido')
+
+    def run(self, scheduler):
+        # Primero se escucha y después se carga, para no perder cambios ocurridos entre ambos pasos
+        listen()
+        scheduler.resync()
+        self.stdout.write(f'{len(scheduler.heap)} avisos programados')
+
+        while True:
+            now = timezone.now()
+            if now >= scheduler.next_resync:
+                scheduler.resync(now)
+
+            task_ids = scheduler.pop_due(now)
+            if task_ids:
+                sent = check_and_send_due_notifications(task_ids=task_ids)
+                self.stdout.write(
+                    f'{now:%Y-%m-%d %H:%M:%S} ' + ' | '.join(f'{kind}: {total}' for kind, total in sent.items())
+                )
+
+            announced = wait_for_announcements(scheduler.seconds_until_next())
+            if announced:
+                scheduler.rearm(announced)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifications.digest import send_digests
+from notifications.locks import advisory_lock
+from notifications.outbox import close_connections
+
+
+class Command(BaseCommand):
+    help = 'Envía un correo de resumen a los usuarios con resumen activo cuyo intervalo ya se cumplió'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.NOTIFICATION_DIGEST_BATCH_SIZE, help='Usuarios por lote'
+        )
+
+    def handle(self, *args, **options):
+        with advisory_lock('send_notification_digests') as acquired:
+            if not acquired:
+                self.stdout.write(self.style.WARNING('Otra ejecución está en curso; se omite esta'))
+                return
+            self.stdout.write('Enviando resúmenes de notificaciones...')
+            try:
+                users, notifications, failed = send_digests(options['batch_size'])
+            finally:
+                close_connections()
+        self.stdout.write(f'Resúmenes: {users} | Notificaciones: {notifications} | Fallidos: {failed}')
+        self.stdout.write(self.style.SUCCESS('Proceso completado'))
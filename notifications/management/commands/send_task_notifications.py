@@ -1,11 +1,33 @@
+from contextlib import nullcontext
 from django.core.management.base import BaseCommand
-from notifications.services import check_and_send_due_notifications
+from notifications.locks import advisory_lock
+from notifications.metrics import JobMetrics
+from notifications.services import DUE_SCAN_CHUNK_SIZE, check_and_send_due_notifications
 
 
 class Command(BaseCommand):
     help = 'Verifica y envía notificaciones de tareas próximas a vencer'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=DUE_SCAN_CHUNK_SIZE, help='Tareas procesadas por lote'
+        )
+        parser.add_argument(
+            '--parallel', action='store_true',
+            help='No tomar el lock exclusivo: varias ejecuciones se reparten las tareas (SKIP LOCKED)'
+        )
+
     def handle(self, *args, **options):
-        self.stdout.write('Verificando tareas y enviando notificaciones...')
-        check_and_send_due_notifications()
+        lock = nullcontext(True) if options['parallel'] else advisory_lock('send_task_notifications')
+        with lock as acquired:
+            if not acquired:
+                self.stdout.write(self.style.WARNING('Otra ejecución está en curso; se omite esta'))
+                return
+            self.stdout.write('Verificando tareas y enviando notificaciones...')
+            metrics = JobMetrics('send_task_notifications')
+            with metrics.run():
+                sent = check_and_send_due_notifications(options['chunk_size'], metrics=metrics)
+        for notification_type, total in sent.items():
+            self.stdout.write(f'{notification_type}: {total}')
+        metrics.report()
         self.stdout.write(self.style.SUCCESS('Proceso completado'))
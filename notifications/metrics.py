@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger('notifications.metrics')
+
+PREFIX = 'notification_job'
+
+# Descripción de cada métrica en el archivo de Prometheus
+METRIC_HELP = {
+    'tasks_scanned': 'Tareas revisadas en la última ejecución',
+    'notifications_created': 'Notificaciones creadas en la última ejecución, por tipo',
+    'emails_queued': 'Correos encolados en el outbox en la última ejecución',
+    'emails_attempted': 'Correos cuyo envío se intentó en la última ejecución',
+    'emails_failed': 'Correos cuyo envío falló en la última ejecución',
+    'emails_unsendable': 'Correos descartados antes del envío (sin tarea o error al armarlos) en la última ejecución',
+    'smtp_seconds': 'Segundos enviando correos por SMTP en la última ejecución',
+    'db_queries': 'Consultas a la base de datos en la última ejecución',
+    'db_seconds': 'Segundos en consultas a la base de datos en la última ejecución',
+    'duration_seconds': 'Duración total de la última ejecución',
+    'last_run_timestamp_seconds': 'Momento en que terminó la última ejecución (epoch)',
+}
+
+
+def _number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class JobMetrics:
+    """Métricas de una ejecución de un comando: contadores, tiempos y consultas a la base de datos"""
+
+    def __init__(self, command):
+        self.command = command
+        self.values = defaultdict(float)
+        self.labelled = defaultdict(lambda: defaultdict(float))
+        self.finished_at = None
+
+    def count(self, name, value=1, **labels):
+        if labels:
+            self.labelled[name][tuple(sorted(labels.items()))] += value
+        else:
+            self.values[name] += value
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.values[name] += time.perf_counter() - start
+
+    def _record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.values['db_queries'] += 1
+            self.values['db_seconds'] += time.perf_counter() - start
+
+    @contextmanager
+    def run(self):
+        """Mide la duración total y las consultas hechas desde la conexión del hilo actual"""
+        self.values.setdefault('db_queries', 0)
+        self.values.setdefault('db_seconds', 0.0)
+        try:
+            with self.timer('duration_seconds'), connection.execute_wrapper(self._record_query):
+                yield self
+        finally:
+            self.finished_at = time.time()
+            self.values['last_run_timestamp_seconds'] = self.finished_at
+
+    def as_dict(self):
+        data = {'command': self.command}
+        for name, value in self.values.items():
+            data[name] = round(value, 6) if isinstance(value, float) and not value.is_integer() else int(value)
+        for name, series in self.labelled.items():
+            data[name] = {'/'.join(value for _, value in labels): int(total) for labels, total in series.items()}
+        return data
+
+    def prometheus(self):
+        """Métricas en formato de texto de Prometheus (para el textfile collector de node_exporter)"""
+        lines = []
+        names = sorted(set(self.values) | set(self.labelled))
+        for name in names:
+            metric = f'{PREFIX}_{name}'
+            lines.append(f'# HELP {metric} {METRIC_HELP.get(name, name)}')
+            lines.append(f'# TYPE {metric} gauge')
+            if name in self.values:
+                lines.append(f'{metric}{{command="{self.command}"}} {_number(self.values[name])}')
+            for labels, total in sorted(self.labelled.get(name, {}).items()):
+                label_text = ','.join([f'command="{self.command}"'] + [f'{key}="{value}"' for key, value in labels])
+                lines.append(f'{metric}{{{label_text}}} {_number(total)}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, directory):
+        # Se escribe a un temporal y se renombra para que el exporter nunca lea un archivo a medias
+        path = os.path.join(directory, f'{self.command}.prom')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as output:
+            output.write(self.prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+    def report(self):
+        """Registra una línea JSON con las métricas y actualiza el archivo de Prometheus si está configurado"""
+        logger.info(json.dumps(self.as_dict(), ensure_ascii=False, sort_keys=True))
+        if settings.NOTIFICATION_METRICS_DIR:
+            try:
+                self.write_textfile(settings.NOTIFICATION_METRICS_DIR)
+            except OSError:
+                logger.exception('No se pudo escribir el archivo de métricas de %s', self.command)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:37
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicates(apps, schema_editor):
+    # Conserva la primera notificación de cada (tarea, usuario, tipo) repetida
+    Notification = apps.get_model('notifications', 'Notification')
+    duplicates = Notification.objects.filter(task__isnull=False).order_by().values(
+        'task_id', 'user_id', 'notification_type'
+    ).annotate(first=Min('pk'), total=Count('pk')).filter(total__gt=1)
+    for row in duplicates:
+        Notification.objects.filter(
+            task_id=row['task_id'], user_id=row['user_id'], notification_type=row['notification_type']
+        ).exclude(pk=row['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_retention'),
+        ('tasks', '0010_task_due_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
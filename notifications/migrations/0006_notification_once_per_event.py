@@ -0,0 +1,17 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_remove_duplicate_notifications'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('task', 'user', 'notification_type'), name='notification_once_per_event'),
+        ),
+    ]
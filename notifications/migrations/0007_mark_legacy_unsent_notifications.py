@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def mark_legacy_unsent(apps, schema_editor):
+    # Antes del outbox un envío fallido dejaba email_sent=False sin más; esas filas no deben
+    # entrar en el primer resumen de quien lo active. Toda notificación anterior a la opción
+    # de resumen es de esa época: las posteriores siempre tienen fila en el outbox o esperan un resumen.
+    Notification = apps.get_model('notifications', 'Notification')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT applied FROM django_migrations WHERE app = %s AND name = %s',
+            ['accounts', '0003_user_notification_digest']
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return
+    Notification.objects.filter(email_sent=False, outbox__isnull=True, created_at__lt=row[0]).update(email_sent=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_once_per_event'),
+        ('accounts', '0003_user_notification_digest'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_legacy_unsent, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,16 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from tasks.models import Task
 
+
+class NotificationQuerySet(models.QuerySet):
+
+    def active(self):
+        """Excluye las notificaciones de tareas de equipos eliminados que todavía no se purgaron"""
+        return self.exclude(task__team__deleted_at__isnull=False)
+
+
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
         ('task_created', 'Task Created'),
@@ -18,13 +27,48 @@ class Notification(models.Model):
     email_sent = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = NotificationQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Bandeja y contador de no leídas por usuario; también acota la búsqueda de leídas antiguas a archivar
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_read_idx'),
+        ]
+        constraints = [
+            # Cada aviso se registra una sola vez por tarea y usuario, aunque corran varias ejecuciones a la vez
+            models.UniqueConstraint(fields=['task', 'user', 'notification_type'], name='notification_once_per_event'),
+        ]
     
     def __str__(self):
         return f"{self.notification_type} - {self.user.name}"
 
 
+class NotificationArchive(models.Model):
+    """Notificaciones leídas que superaron el período de retención; conservan el id original.
+
+    Las claves foráneas no tienen restricción en la base de datos para que la tabla
+    pueda particionarse por mes (ver ``notifications.retention``).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_notifications', db_constraint=False
+    )
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, null=True, blank=True, db_constraint=False)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    is_read = models.BooleanField(default=True)
+    email_sent = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.notification_type} - {self.user_id} (archivada)"
+
+
 class TaskNotificationTracker(models.Model):
     """Rastrea qué notificaciones ya se enviaron para cada tarea"""
     task = models.OneToOneField(Task, on_delete=models.CASCADE, related_name='notification_tracker')
@@ -34,4 +78,29 @@ class TaskNotificationTracker(models.Model):
     overdue_notification_sent = models.BooleanField(default=False)
     
     def __str__(self):
-        return f"Tracker for Task: {self.task.title}"
\ No newline at end of file
+        return f"Tracker for Task: {self.task.title}"
+
+class EmailOutbox(models.Model):
+    """Correo pendiente de una notificación; se escribe en la misma transacción que la Notification"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    notification = models.OneToOneField(Notification, on_delete=models.CASCADE, related_name='outbox')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # El worker toma los pendientes cuyo próximo intento ya venció
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_pending_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.status} - {self.notification_id}"
@@ -0,0 +1,182 @@
+import multiprocessing
+import smtplib
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from notifications.models import EmailOutbox, Notification
+from notifications.pool import setup_process_worker
+from notifications.services import build_task_notification_email, chunked, render_task_notification
+
+
+# Tiempo durante el cual un correo tomado por un worker no puede tomarlo otro
+CLAIM_LEASE = timedelta(minutes=5)
+
+# Errores tras los que vale la pena abrir una conexión nueva y reintentar una vez
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+# Cada hilo o proceso del pool conserva abierta su conexión SMTP entre lotes
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+
+
+def create_executor(pool, workers):
+    """Pool de envío; los procesos arrancan con spawn para no heredar la conexión a la base de datos"""
+    if pool == 'process':
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=setup_process_worker
+        )
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def claim(batch_size):
+    """Toma hasta ``batch_size`` correos vencidos; SKIP LOCKED permite varios workers en paralelo"""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+                status='pending', next_attempt_at__lte=now
+            ).order_by('next_attempt_at').values_list('pk', flat=True)[:batch_size]
+        )
+        EmailOutbox.objects.filter(pk__in=ids).update(attempts=F('attempts') + 1, next_attempt_at=now + CLAIM_LEASE)
+    return list(EmailOutbox.objects.filter(pk__in=ids).select_related('notification__user', 'notification__task__team'))
+
+
+def _connection():
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+        _local.connection = connection
+        with _connections_lock:
+            _connections.append(connection)
+    return connection
+
+
+def _discard_connection():
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        with _connections_lock:
+            if connection in _connections:
+                _connections.remove(connection)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def close_connections():
+    """Cierra las conexiones SMTP de los hilos de este proceso; los procesos del pool cierran las suyas al salir"""
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+    for connection in connections:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    _local.connection = None
+
+
+def _send(message):
+    # La conexión ya está abierta, así que send_messages no la abre ni la cierra
+    if not _connection().send_messages([message]):
+        raise smtplib.SMTPException('El servidor no aceptó el mensaje')
+
+
+def deliver(messages):
+    """Envía un grupo de correos por la conexión del worker, sin tocar la base de datos.
+
+    Devuelve el error de cada mensaje o None. Si la conexión se cae se abre otra y
+    se reintenta el mensaje una vez; cada mensaje se envía por separado para poder
+    atribuir el error a su fila del outbox.
+    """
+    errors = []
+    for message in messages:
+        try:
+            try:
+                _send(message)
+            except CONNECTION_ERRORS:
+                _discard_connection()
+                _send(message)
+        except Exception as error:
+            if isinstance(error, CONNECTION_ERRORS):
+                _discard_connection()
+            errors.append(f'{type(error).__name__}: {error}')
+        else:
+            errors.append(None)
+    return errors
+
+
+def process_batch(executor, batch_size=None, metrics=None):
+    """Envía un lote del outbox y registra el resultado; devuelve (enviados, fallidos).
+    
+    Si se indica ``metrics`` registra correos intentados, fallidos al enviarse y descartados
+    antes del envío (sin tarea o con error al armarlos), y el tiempo de envío SMTP.
+    """
+    rows = claim(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    errors = {}
+    messages = {}
+    # El HTML se renderiza una vez por (tarea, tipo) y se reutiliza para cada destinatario
+    rendered = {}
+    for row in rows:
+        notification = row.notification
+        if notification.task is None:
+            errors[row.pk] = 'La notificación no tiene tarea asociada'
+            continue
+        key = (notification.task_id, notification.notification_type)
+        try:
+            if key not in rendered:
+                rendered[key] = render_task_notification(notification.task, notification.notification_type)
+            messages[row.pk] = build_task_notification_email(
+                notification.user, notification.task, notification.notification_type, rendered[key]
+            )
+        except Exception as error:
+            errors[row.pk] = f'{type(error).__name__}: {error}'
+
+    unsendable = len(errors)
+    
+    # Cada worker recibe grupos de correos y los envía por su propia conexión
+    chunk_size = settings.EMAIL_OUTBOX_CHUNK_SIZE
+    started = time.perf_counter()
+    chunk_errors = executor.map(deliver, chunked(list(messages.values()), chunk_size))
+    for pk, error in zip(messages, (error for chunk in chunk_errors for error in chunk)):
+        if error:
+            errors[pk] = error
+    if metrics:
+        metrics.count('smtp_seconds', time.perf_counter() - started)
+        metrics.count('emails_attempted', len(messages))
+        metrics.count('emails_failed', len(errors) - unsendable)
+        metrics.count('emails_unsendable', unsendable)
+
+    record(rows, errors)
+    return len(rows) - len(errors), len(errors)
+
+
+def record(rows, errors):
+    """Marca los enviados y reprograma los fallidos con espera exponencial"""
+    now = timezone.now()
+    sent_ids = [row.pk for row in rows if row.pk not in errors]
+    failed = []
+    for row in rows:
+        if row.pk not in errors:
+            continue
+        row.last_error = errors[row.pk]
+        if row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            row.status = 'failed'
+        else:
+            row.next_attempt_at = now + timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (row.attempts - 1))
+        failed.append(row)
+
+    with transaction.atomic():
+        if sent_ids:
+            EmailOutbox.objects.filter(pk__in=sent_ids).update(status='sent', sent_at=now, last_error='')
+            Notification.objects.filter(outbox__in=sent_ids).update(email_sent=True)
+        EmailOutbox.objects.bulk_update(failed, ['status', 'last_error', 'next_attempt_at'])
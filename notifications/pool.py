@@ -0,0 +1,13 @@
+from multiprocessing.util import Finalize
+import django
+
+
+def setup_process_worker():
+    """Inicializa cada proceso del pool de envío y cierra sus conexiones SMTP cuando termina.
+
+    Este módulo no importa modelos: con spawn, el hijo lo importa antes de que Django esté configurado.
+    """
+    django.setup()
+    from notifications.outbox import close_connections
+    # close_connections del padre solo cierra sus propias conexiones; cada hijo cierra las suyas al salir
+    Finalize(None, close_connections, exitpriority=10)
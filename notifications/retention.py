@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import connection, transaction
+from notifications.models import Notification, NotificationArchive
+
+
+ARCHIVE_TABLE = NotificationArchive._meta.db_table
+ARCHIVED_FIELDS = ['user_id', 'task_id', 'message', 'notification_type', 'is_read', 'email_sent', 'created_at']
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def month_start(value):
+    """Inicio (UTC) del mes de ``value``, límite inferior de su partición"""
+    return value.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start):
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(start):
+    return f'{ARCHIVE_TABLE}_p{start:%Y%m}'
+
+
+def archive_is_partitioned():
+    """Indica si la tabla de archivo ya se convirtió en tabla particionada por mes"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass)', [ARCHIVE_TABLE]
+        )
+        return cursor.fetchone()[0]
+
+
+def create_partitions(months):
+    """Crea, si faltan, las particiones mensuales que empiezan en ``months``"""
+    with connection.cursor() as cursor:
+        for start in sorted(set(months)):
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {_quote(partition_name(start))} PARTITION OF {_quote(ARCHIVE_TABLE)} '
+                'FOR VALUES FROM (%s) TO (%s)',
+                [start, next_month(start)]
+            )
+
+
+@transaction.atomic
+def partition_archive():
+    """Convierte la tabla de archivo en una tabla particionada por mes de ``created_at``.
+
+    La tabla viva no se particiona: el outbox la referencia por ``id`` y PostgreSQL
+    exige que la clave de partición forme parte de las claves únicas referenciadas.
+    """
+    table, old = _quote(ARCHIVE_TABLE), _quote(f'{ARCHIVE_TABLE}_old')
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        cursor.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+        cursor.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)')
+        for column in ('user_id', 'task_id'):
+            cursor.execute(f'CREATE INDEX {_quote(f"{ARCHIVE_TABLE}_{column}_part_idx")} ON {table} ({column})')
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', created_at, 'UTC') FROM {old}")
+        create_partitions(month_start(row[0]) for row in cursor.fetchall())
+        cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+        cursor.execute(f'DROP TABLE {old}')
+
+
+def archive_batch(cutoff, batch_size, partitioned=False):
+    """Mueve al archivo un lote de notificaciones leídas anteriores a ``cutoff``; devuelve cuántas movió.
+
+    Cada lote es una transacción propia, así que una ejecución interrumpida se retoma
+    donde quedó; SKIP LOCKED evita esperar filas que otra ejecución está moviendo.
+    """
+    with transaction.atomic():
+        rows = list(
+            Notification.objects.select_for_update(skip_locked=True).filter(
+                is_read=True, created_at__lt=cutoff
+            ).order_by('pk').values('pk', *ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ids = [row.pop('pk') for row in rows]
+        if partitioned:
+            create_partitions(month_start(row['created_at']) for row in rows)
+        NotificationArchive.objects.bulk_create(
+            [NotificationArchive(id=pk, **row) for pk, row in zip(ids, rows)], ignore_conflicts=True
+        )
+        Notification.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_read_notifications(cutoff, batch_size, max_batches=None):
+    """Archiva por lotes las notificaciones leídas anteriores a ``cutoff``; devuelve el total movido"""
+    partitioned = archive_is_partitioned()
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size, partitioned)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+    return total
+
+
+def drop_archive_partitions(cutoff):
+    """Elimina las particiones mensuales que terminan antes de ``cutoff``; devuelve sus nombres"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = %s::regclass ORDER BY child.relname',
+            [ARCHIVE_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+        dropped = []
+        for name in names:
+            start = datetime.strptime(name.rsplit('_p', 1)[1], '%Y%m').replace(tzinfo=dt_timezone.utc)
+            if next_month(start) <= cutoff:
+                cursor.execute(f'DROP TABLE {_quote(name)}')
+                dropped.append(name)
+    return dropped
+
+
+def delete_archived(cutoff, batch_size):
+    """Borra por lotes el archivo anterior a ``cutoff`` cuando la tabla no está particionada"""
+    total = 0
+    while True:
+        ids = list(
+            NotificationArchive.objects.filter(
+                created_at__lt=cutoff
+            ).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += NotificationArchive.objects.filter(pk__in=ids).delete()[0]
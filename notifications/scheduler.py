@@ -0,0 +1,148 @@
+import heapq
+import select
+import time
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from tasks.models import Task
+from notifications.services import PENDING_STATUSES
+
+
+# Canal de PostgreSQL (LISTEN/NOTIFY) por el que se avisa al scheduler de vencimientos nuevos o editados
+CHANNEL = 'task_deadlines'
+
+# pg_notify admite cargas de hasta 8000 bytes
+ANNOUNCE_CHUNK_SIZE = 500
+
+# El aviso de vencida se dispara justo después del vencimiento, cuando ya no cae en la ventana de 1 hora
+OVERDUE_DELAY = timedelta(seconds=1)
+
+# (tipo de notificación, bandera del tracker, anticipación respecto a Task.due_date)
+DEADLINES = [
+    ('task_due_24h', 'due_24h_notification_sent', timedelta(hours=24)),
+    ('task_due_1h', 'due_1h_notification_sent', timedelta(hours=1)),
+    ('task_overdue', 'overdue_notification_sent', -OVERDUE_DELAY),
+]
+
+
+def announce(task_ids):
+    """Avisa al scheduler, al confirmarse la transacción, que cambió el vencimiento de estas tareas"""
+    task_ids = [str(task_id) for task_id in task_ids]
+    if not task_ids or connection.vendor != 'postgresql':
+        return
+
+    def send():
+        with connection.cursor() as cursor:
+            for start in range(0, len(task_ids), ANNOUNCE_CHUNK_SIZE):
+                payload = ','.join(task_ids[start:start + ANNOUNCE_CHUNK_SIZE])
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+    transaction.on_commit(send)
+
+
+class DeadlineScheduler:
+    """Min-heap con los próximos avisos de vencimiento de las tareas pendientes"""
+
+    def __init__(self, resync_interval):
+        self.resync_interval = resync_interval
+        self.heap = []
+        # Vencimiento vigente de cada tarea armada; las entradas con otro vencimiento quedaron obsoletas
+        self.armed = {}
+        self.next_resync = None
+        # Hasta cuándo se dispararon los avisos del heap; un resync no vuelve a armar los anteriores
+        self.fired_until = None
+
+    def pending_tasks(self, after=None):
+        """Tareas pendientes con algún aviso sin enviar; con ``after``, solo las que tienen uno posterior"""
+        flags = [f'notification_tracker__{flag}' for _, flag, _ in DEADLINES]
+        # Se descartan las tareas que ya recibieron los tres avisos
+        tasks = Task.objects.active().filter(
+            status__in=PENDING_STATUSES, due_date__isnull=False
+        ).exclude(**{flag: True for flag in flags})
+        if after is not None:
+            upcoming = Q()
+            for _, flag, offset in DEADLINES:
+                upcoming |= Q(due_date__gt=after + offset) & ~Q(**{f'notification_tracker__{flag}': True})
+            tasks = tasks.filter(upcoming)
+        return tasks.values('pk', 'due_date', *flags)
+
+    def resync(self, now=None):
+        """Recarga desde la base de datos los avisos que pueden dispararse antes del próximo resync"""
+        now = now or timezone.now()
+        self.heap = []
+        self.armed = {}
+        self.next_resync = now + self.resync_interval
+        horizon = self.next_resync + max(offset for _, _, offset in DEADLINES)
+        # Los avisos anteriores a fired_until ya salieron del heap anterior
+        self.arm(self.pending_tasks(self.fired_until).filter(due_date__lte=horizon), now, self.fired_until)
+
+    def rearm(self, task_ids):
+        """Vuelve a armar las tareas anunciadas (nuevas, editadas o completadas)"""
+        for task_id in task_ids:
+            self.armed.pop(task_id, None)
+        self.arm(self.pending_tasks().filter(pk__in=task_ids), timezone.now())
+
+    def arm(self, rows, now, after=None):
+        """Agrega al heap los avisos sin enviar de cada tarea, salvo los anteriores a ``after``.
+
+        De los avisos que ya llegaron solo se arma el último: la ventana de los anteriores
+        ya cerró (p. ej. el de 24h en una tarea que vence en 30 minutos) y al dispararlo
+        check_and_send_due_notifications elige el aviso de la ventana vigente.
+        """
+        for row in rows:
+            due_date = row['due_date']
+            self.armed[row['pk']] = due_date
+            current = None
+            for _, flag, offset in DEADLINES:
+                fire_at = due_date - offset
+                if fire_at <= now:
+                    current = (fire_at, flag)
+                elif not row[f'notification_tracker__{flag}']:
+                    heapq.heappush(self.heap, (fire_at, row['pk'], due_date))
+            if current and not row[f'notification_tracker__{current[1]}'] and (after is None or current[0] > after):
+                heapq.heappush(self.heap, (current[0], row['pk'], due_date))
+
+    def pop_due(self, now=None):
+        """Ids de las tareas con algún aviso vencido; descarta las entradas obsoletas"""
+        now = now or timezone.now()
+        task_ids = set()
+        while self.heap and self.heap[0][0] <= now:
+            _, task_id, due_date = heapq.heappop(self.heap)
+            if self.armed.get(task_id) == due_date:
+                task_ids.add(task_id)
+        self.fired_until = now
+        return task_ids
+
+    def seconds_until_next(self, now=None):
+        """Tiempo hasta el próximo aviso o el próximo resync, lo que ocurra primero"""
+        now = now or timezone.now()
+        wake_at = self.next_resync
+        if self.heap:
+            wake_at = min(wake_at, self.heap[0][0])
+        return max((wake_at - now).total_seconds(), 0)
+
+
+def listen():
+    """Suscribe la conexión actual al canal de vencimientos"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+
+
+def wait_for_announcements(timeout):
+    """Duerme hasta ``timeout`` segundos o hasta recibir anuncios; devuelve los ids anunciados"""
+    if connection.vendor != 'postgresql':
+        time.sleep(timeout)
+        return set()
+
+    connection.ensure_connection()
+    raw = connection.connection
+    if not raw.notifies and select.select([raw], [], [], timeout) != ([], [], []):
+        raw.poll()
+
+    task_ids = set()
+    while raw.notifies:
+        notify = raw.notifies.pop(0)
+        task_ids.update(int(task_id) for task_id in notify.payload.split(',') if task_id)
+    return task_ids
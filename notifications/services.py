@@ -1,57 +1,95 @@
 from django.core.mail import send_mail, EmailMultiAlternatives
 from django.conf import settings
 from django.utils import timezone
-from django.template.loader import render_to_string
+from django.template.loader import get_template
+from django.utils.html import escape
+from django.db import connection, transaction
+from django.db.models import Q
+from collections import Counter
 from datetime import timedelta
+from functools import lru_cache
+from itertools import islice
+import logging
+import uuid
 from tasks.models import Task
-from notifications.models import Notification, TaskNotificationTracker
+from notifications.models import EmailOutbox, Notification, TaskNotificationTracker
+from notifications.unread import adjust_unread
 
 
-def send_task_notification_email(user, task, notification_type):
-    """Envía un email de notificación a un usuario sobre una tarea con diseño HTML"""
-    
-    # Configuración de colores y badges según tipo de notificación
-    notification_config = {
-        'task_created': {
-            'subject': f'✨ Nueva tarea asignada: {task.title}',
-            'message': 'Se te ha asignado una nueva tarea. Por favor, revisa los detalles y comienza a trabajar en ella.',
-            'badge_color': '#667eea',
-            'display': '📋 Nueva Tarea'
-        },
-        'task_due_24h': {
-            'subject': f'⏰ Recordatorio: Tarea vence en 24 horas - {task.title}',
-            'message': 'Esta tarea vencerá en las próximas 24 horas. Asegúrate de completarla a tiempo.',
-            'badge_color': '#fbbf24',
-            'display': '⏰ Vence en 24 Horas'
-        },
-        'task_due_1h': {
-            'subject': f'🚨 ¡URGENTE! Tarea vence en 1 hora - {task.title}',
-            'message': '¡Atención! Esta tarea vencerá en 1 hora. Por favor, complétala lo antes posible.',
-            'badge_color': '#f59e0b',
-            'display': '🚨 Vence en 1 Hora'
-        },
-        'task_overdue': {
-            'subject': f'❌ Tarea vencida: {task.title}',
-            'message': 'Esta tarea ha vencido. Por favor, actualiza su estado o contacta al líder del equipo.',
-            'badge_color': '#ef4444',
-            'display': '❌ Tarea Vencida'
-        },
-    }
-    
-    config = notification_config.get(notification_type, notification_config['task_created'])
-    
-    # Colores según prioridad
-    priority_colors = {
-        'urgent': '#dc2626',
-        'high': '#f59e0b',
-        'medium': '#3b82f6',
-        'low': '#10b981'
-    }
+logger = logging.getLogger(__name__)
+
+
+# Tareas procesadas por lote al revisar vencimientos; acota la memoria de cada ejecución
+DUE_SCAN_CHUNK_SIZE = 500
+
+# Notificaciones por sentencia INSERT al crearlas en bloque
+NOTIFICATION_INSERT_CHUNK_SIZE = 1000
+
+# Estados en los que una tarea todavía recibe avisos de vencimiento
+PENDING_STATUSES = ['to_do', 'in_progress', 'review']
+
+# Configuración de colores y badges según tipo de notificación
+NOTIFICATION_CONFIG = {
+    'task_created': {
+        'subject': '✨ Nueva tarea asignada: {title}',
+        'message': 'Se te ha asignado una nueva tarea. Por favor, revisa los detalles y comienza a trabajar en ella.',
+        'badge_color': '#667eea',
+        'display': '📋 Nueva Tarea'
+    },
+    'task_due_24h': {
+        'subject': '⏰ Recordatorio: Tarea vence en 24 horas - {title}',
+        'message': 'Esta tarea vencerá en las próximas 24 horas. Asegúrate de completarla a tiempo.',
+        'badge_color': '#fbbf24',
+        'display': '⏰ Vence en 24 Horas'
+    },
+    'task_due_1h': {
+        'subject': '🚨 ¡URGENTE! Tarea vence en 1 hora - {title}',
+        'message': '¡Atención! Esta tarea vencerá en 1 hora. Por favor, complétala lo antes posible.',
+        'badge_color': '#f59e0b',
+        'display': '🚨 Vence en 1 Hora'
+    },
+    'task_overdue': {
+        'subject': '❌ Tarea vencida: {title}',
+        'message': 'Esta tarea ha vencido. Por favor, actualiza su estado o contacta al líder del equipo.',
+        'badge_color': '#ef4444',
+        'display': '❌ Tarea Vencida'
+    },
+}
+
+# Colores según prioridad
+PRIORITY_COLORS = {
+    'urgent': '#dc2626',
+    'high': '#f59e0b',
+    'medium': '#3b82f6',
+    'low': '#10b981'
+}
+
+# Marcador que ocupa el nombre del destinatario en el HTML renderizado una vez por aviso
+RECIPIENT_NAME_MARKER = f'recipient-name-{uuid.uuid4().hex}'
+
+NOTIFICATION_MESSAGES = {
+    'task_created': 'Se te ha asignado la tarea: {title}',
+    'task_due_24h': 'La tarea "{title}" vence en 24 horas.',
+    'task_due_1h': 'La tarea "{title}" vence en 1 hora.',
+    'task_overdue': 'La tarea "{title}" ha vencido.',
+}
+
+
+@lru_cache(maxsize=None)
+def get_task_notification_template():
+    """Template HTML de las notificaciones, compilado una sola vez por proceso"""
+    return get_template('emails/task_notification.html')
+
+
+def render_task_notification(task, notification_type):
+    """Renderiza lo común a todos los destinatarios de un aviso: (asunto, texto, HTML con marcador)"""
+    config = NOTIFICATION_CONFIG.get(notification_type, NOTIFICATION_CONFIG['task_created'])
+    subject = config['subject'].format(title=task.title)
     
-    # Contexto para el template
+    # Contexto para el template; el nombre del destinatario se inserta después en el HTML ya renderizado
     context = {
-        'subject': config['subject'],
-        'user_name': user.name,
+        'subject': subject,
+        'user_name': RECIPIENT_NAME_MARKER,
         'message': config['message'],
         'notification_type_display': config['display'],
         'badge_color': config['badge_color'],
@@ -62,116 +100,227 @@ def send_task_notification_email(user, task, notification_type):
         'task_team': task.team.name,
         'task_uuid': str(task.uuid),  # UUID único de la tarea
         'task_url': f'{settings.DEFAULT_FROM_EMAIL}/task/{task.pk}/',  # URL de la tarea
-        'priority_color': priority_colors.get(task.priority, '#3b82f6'),
+        'priority_color': PRIORITY_COLORS.get(task.priority, '#3b82f6'),
     }
     
-    # Renderizar template HTML
-    html_content = render_to_string('emails/task_notification.html', context)
+    return subject, config['message'], get_task_notification_template().render(context)
+
+
+def build_task_notification_email(user, task, notification_type, rendered=None):
+    """Construye el email de notificación a un usuario sobre una tarea con diseño HTML.
+    
+    ``rendered`` es el resultado de ``render_task_notification`` para reutilizarlo
+    entre los destinatarios del mismo aviso.
+    """
+    subject, message, html_content = rendered or render_task_notification(task, notification_type)
     
     # Crear email con HTML
     email = EmailMultiAlternatives(
-        subject=config['subject'],
-        body=config['message'],  # Texto plano como fallback
+        subject=subject,
+        body=message,  # Texto plano como fallback
         from_email=settings.DEFAULT_FROM_EMAIL,
         to=[user.email]
     )
-    email.attach_alternative(html_content, "text/html")
+    email.attach_alternative(html_content.replace(RECIPIENT_NAME_MARKER, escape(user.name)), "text/html")
+    return email
+
+
+def send_task_notification_email(user, task, notification_type):
+    """Envía un email de notificación a un usuario sobre una tarea con diseño HTML"""
+    email = build_task_notification_email(user, task, notification_type)
     
     try:
         email.send(fail_silently=False)
         return True
-    except Exception as e:
-        print(f"Error enviando email a {user.email}: {str(e)}")
+    except Exception:
+        logger.exception('Error enviando email a %s', user.email)
         return False
 
 
 def notify_task_created(task):
-    """Envía notificaciones cuando se crea una tarea"""
-    # Crear o obtener el tracker
-    tracker, created = TaskNotificationTracker.objects.get_or_create(task=task)
-    
-    if tracker.created_notification_sent:
-        return
-    
-    # Notificar a todos los usuarios asignados
-    for user in task.assigned_to.all():
-        # Crear notificación en BD
-        notification = Notification.objects.create(
-            user=user,
-            task=task,
-            message=f'Se te ha asignado la tarea: {task.title}',
-            notification_type='task_created'
-        )
-        
-        # Enviar email
-        email_sent = send_task_notification_email(user, task, 'task_created')
-        notification.email_sent = email_sent
-        notification.save()
+    """Registra las notificaciones de una tarea nueva; los correos salen por el outbox"""
+    ensure_trackers([task.pk])
+    with transaction.atomic():
+        if claim_trackers([task.pk], 'created_notification_sent'):
+            # Notificar a todos los usuarios asignados
+            notify_assignments([(task, user) for user in task.assigned_to.all()])
+
+
+def ensure_trackers(task_ids):
+    """Crea los trackers que falten; se llama antes de abrir la transacción que los reclama.
+    
+    Un INSERT ... ON CONFLICT espera a las filas sin confirmar de otra sesión, también a un
+    tracker que otra ejecución tiene reclamado: solo se insertan los que no existen y fuera
+    de la transacción del reclamo, así una ejecución paralela salta esas tareas sin esperar.
+    """
+    existing = set(TaskNotificationTracker.objects.filter(task_id__in=task_ids).values_list('task_id', flat=True))
+    TaskNotificationTracker.objects.bulk_create(
+        [TaskNotificationTracker(task_id=task_id) for task_id in set(task_ids) - existing], ignore_conflicts=True
+    )
+
+
+def claim_trackers(task_ids, flag):
+    """Marca ``flag`` en los trackers de ``task_ids`` que aún no lo tienen; devuelve los ids reclamados.
     
-    # Marcar como enviada
-    tracker.created_notification_sent = True
-    tracker.save()
+    Debe llamarse dentro de una transacción y con los trackers ya creados (``ensure_trackers``).
+    SKIP LOCKED salta las tareas que otra ejecución está procesando y, cuando esta confirma,
+    la bandera ya marcada las excluye, así que varias ejecuciones en paralelo se reparten
+    las tareas sin duplicar avisos.
+    """
+    claimed = list(
+        TaskNotificationTracker.objects.select_for_update(skip_locked=True).filter(
+            task_id__in=task_ids, **{flag: False}
+        ).values_list('task_id', flat=True)
+    )
+    TaskNotificationTracker.objects.filter(task_id__in=claimed).update(**{flag: True})
+    return set(claimed)
 
 
-def check_and_send_due_notifications():
-    """Verifica y envía notificaciones de tareas próximas a vencer o vencidas"""
+def insert_notifications(notifications):
+    """Inserta con ON CONFLICT DO NOTHING y devuelve solo las notificaciones realmente creadas.
+    
+    La restricción única (tarea, usuario, tipo) descarta los avisos repetidos aunque dos
+    ejecuciones concurrentes lleguen a intentar insertarlos.
+    """
+    if not notifications:
+        return []
+    
     now = timezone.now()
+    columns = ['user_id', 'task_id', 'message', 'notification_type', 'is_read', 'email_sent', 'created_at']
+    pending = {}
+    params = []
+    for notification in notifications:
+        notification.created_at = now
+        pending[(notification.task_id, notification.user_id, notification.notification_type)] = notification
+        params.extend(getattr(notification, column) for column in columns)
     
-    # Obtener tareas pendientes con fecha de vencimiento
-    pending_tasks = Task.objects.filter(
-        status__in=['to_do', 'in_progress', 'review'],
-        due_date__isnull=False
-    ).select_related('team').prefetch_related('assigned_to')
+    placeholders = ', '.join([f"({', '.join(['%s'] * len(columns))})"] * len(notifications))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {Notification._meta.db_table} ({", ".join(columns)}) VALUES {placeholders} '
+            'ON CONFLICT (task_id, user_id, notification_type) DO NOTHING '
+            'RETURNING id, task_id, user_id, notification_type',
+            params
+        )
+        rows = cursor.fetchall()
     
-    for task in pending_tasks:
-        tracker, created = TaskNotificationTracker.objects.get_or_create(task=task)
-        
-        time_until_due = task.due_date - now
-        
-        # Tarea vencida
-        if time_until_due.total_seconds() < 0 and not tracker.overdue_notification_sent:
-            for user in task.assigned_to.all():
-                notification = Notification.objects.create(
+    created = []
+    for pk, *key in rows:
+        notification = pending[tuple(key)]
+        notification.pk = pk
+        notification._state.adding = False
+        created.append(notification)
+    return created
+
+
+def notify_assignments(assignments, notification_type='task_created'):
+    """Crea en bloque las notificaciones de pares (tarea, usuario) y encola sus correos en el outbox.
+    
+    Las de usuarios con resumen activo no se encolan: quedan pendientes para su próximo resumen.
+    Los pares que ya tenían este aviso se omiten.
+    """
+    message = NOTIFICATION_MESSAGES[notification_type]
+    with transaction.atomic():
+        notifications = []
+        for chunk in chunked(list(assignments), NOTIFICATION_INSERT_CHUNK_SIZE):
+            notifications += insert_notifications([
+                Notification(
                     user=user,
                     task=task,
-                    message=f'La tarea "{task.title}" ha vencido.',
-                    notification_type='task_overdue'
+                    message=message.format(title=task.title),
+                    notification_type=notification_type
                 )
-                email_sent = send_task_notification_email(user, task, 'task_overdue')
-                notification.email_sent = email_sent
-                notification.save()
-            
-            tracker.overdue_notification_sent = True
-            tracker.save()
+                for task, user in chunk
+            ])
+        EmailOutbox.objects.bulk_create([
+            EmailOutbox(notification=notification) for notification in notifications if sends_email_now(notification)
+        ])
+        adjust_unread(Counter(notification.user_id for notification in notifications))
+    return notifications
+
+
+def sends_email_now(notification):
+    """Indica si el correo de la notificación va al outbox o espera al resumen del usuario"""
+    return notification.user.notification_digest == 'off'
+
+
+def notify_tasks_created(task_ids):
+    """Versión en bloque de notify_task_created para tareas creadas en lote"""
+    tasks = list(
+        Task.objects.active().filter(pk__in=task_ids, assigned_to__isnull=False).exclude(
+            notification_tracker__created_notification_sent=True
+        ).distinct().select_related('team').prefetch_related('assigned_to')
+    )
+    if not tasks:
+        return []
+    
+    ensure_trackers([task.pk for task in tasks])
+    with transaction.atomic():
+        claimed = claim_trackers([task.pk for task in tasks], 'created_notification_sent')
+        return notify_assignments(
+            [(task, user) for task in tasks if task.pk in claimed for user in task.assigned_to.all()]
+        )
+
+
+def check_and_send_due_notifications(chunk_size=DUE_SCAN_CHUNK_SIZE, task_ids=None, metrics=None):
+    """Verifica y envía notificaciones de tareas próximas a vencer o vencidas (opcionalmente solo de ``task_ids``).
+    
+    Si se indica ``metrics`` (``notifications.metrics.JobMetrics``) registra tareas revisadas,
+    notificaciones creadas por tipo y correos encolados.
+    """
+    now = timezone.now()
+    sent = {}
+    if metrics:
+        metrics.count('tasks_scanned', 0)
+        metrics.count('emails_queued', 0)
+    
+    for notification_type, flag, window in due_windows(now):
+        # Solo tareas pendientes que entraron en la ventana y aún no tienen el aviso marcado
+        tasks = Task.objects.active().filter(
+            window, status__in=PENDING_STATUSES
+        ).exclude(
+            **{f'notification_tracker__{flag}': True}
+        ).order_by('pk').select_related('team').prefetch_related('assigned_to')
+        if task_ids is not None:
+            tasks = tasks.filter(pk__in=task_ids)
         
-        # Vence en 1 hora
-        elif 0 <= time_until_due.total_seconds() <= 3600 and not tracker.due_1h_notification_sent:
-            for user in task.assigned_to.all():
-                notification = Notification.objects.create(
-                    user=user,
-                    task=task,
-                    message=f'La tarea "{task.title}" vence en 1 hora.',
-                    notification_type='task_due_1h'
-                )
-                email_sent = send_task_notification_email(user, task, 'task_due_1h')
-                notification.email_sent = email_sent
-                notification.save()
-            
-            tracker.due_1h_notification_sent = True
-            tracker.save()
+        sent[notification_type] = 0
+        stream = tasks.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(stream, chunk_size)):
+            notifications = _notify_due_chunk(chunk, notification_type, flag)
+            sent[notification_type] += len(notifications)
+            if metrics:
+                metrics.count('tasks_scanned', len(chunk))
+                metrics.count('emails_queued', sum(1 for notification in notifications if sends_email_now(notification)))
         
-        # Vence en 24 horas
-        elif 3600 < time_until_due.total_seconds() <= 86400 and not tracker.due_24h_notification_sent:
-            for user in task.assigned_to.all():
-                notification = Notification.objects.create(
-                    user=user,
-                    task=task,
-                    message=f'La tarea "{task.title}" vence en 24 horas.',
-                    notification_type='task_due_24h'
-                )
-                email_sent = send_task_notification_email(user, task, 'task_due_24h')
-                notification.email_sent = email_sent
-                notification.save()
-            
-            tracker.due_24h_notification_sent = True
-            tracker.save()
+        if metrics:
+            metrics.count('notifications_created', sent[notification_type], type=notification_type)
+    
+    return sent
+
+
+def chunked(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def due_windows(now):
+    """(tipo de notificación, bandera del tracker, filtro de la ventana) de cada aviso de vencimiento"""
+    return [
+        ('task_overdue', 'overdue_notification_sent', Q(due_date__lt=now)),
+        ('task_due_1h', 'due_1h_notification_sent', Q(due_date__gte=now, due_date__lte=now + timedelta(hours=1))),
+        (
+            'task_due_24h',
+            'due_24h_notification_sent',
+            Q(due_date__gt=now + timedelta(hours=1), due_date__lte=now + timedelta(hours=24)),
+        ),
+    ]
+
+
+def _notify_due_chunk(tasks, notification_type, flag):
+    ensure_trackers([task.pk for task in tasks])
+    with transaction.atomic():
+        claimed = claim_trackers([task.pk for task in tasks], flag)
+        return notify_assignments(
+            [(task, user) for task in tasks if task.pk in claimed for user in task.assigned_to.all()],
+            notification_type
+        )
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from tasks.models import Task
+from notifications.scheduler import announce
+
+
+@receiver(post_save, sender=Task)
+def announce_deadline(sender, instance, **kwargs):
+    # Re-arma el scheduler de vencimientos cuando se crea, edita o completa una tarea con fecha
+    if instance.due_date is not None:
+        announce([instance.pk])
@@ -1,3 +1,571 @@
-from django.test import TestCase
+import json
+import smtplib
+import tempfile
+import threading
+import time
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from teams.models import Team
+from tasks.models import Task
+from notifications.models import EmailOutbox, Notification, NotificationArchive, TaskNotificationTracker
+from notifications import retention
+from notifications.digest import send_digests
+from notifications.locks import advisory_lock
+from notifications.metrics import JobMetrics
+from notifications.scheduler import DeadlineScheduler, listen, wait_for_announcements
+from notifications.outbox import close_connections, create_executor, deliver, process_batch
+from notifications.unread import get_unread_count
+from notifications.services import (
+    RECIPIENT_NAME_MARKER, check_and_send_due_notifications, claim_trackers, ensure_trackers, notify_assignments,
+    notify_task_created, render_task_notification
+)
 
-# Create your tests here.
+
+#Datos comunes para las pruebas de notificaciones
+class NotificationTestMixin:
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@test.com", name="Admin", password="123456", role="admin"
+        )
+        self.user = User.objects.create_user(
+            email="user@test.com", name="User", password="123456", role="user"
+        )
+        self.team = Team.objects.create(name="Due Team", created_by=self.admin)
+
+    def create_task(self, due_in, status='to_do'):
+        task = Task.objects.create(
+            team=self.team,
+            title=f"Due {Task.objects.count()}",
+            status=status,
+            due_date=timezone.now() + due_in if due_in is not None else None,
+            created_by=self.admin,
+        )
+        task.assigned_to.add(self.user, self.admin)
+        return task
+
+
+#Revisión de vencimientos por lotes
+class DueNotificationTest(NotificationTestMixin, TestCase):
+
+    def test_each_window_is_notified_once(self):
+        overdue = self.create_task(timedelta(hours=-2))
+        due_1h = self.create_task(timedelta(minutes=30))
+        due_24h = self.create_task(timedelta(hours=5))
+        self.create_task(timedelta(days=3))
+        self.create_task(timedelta(hours=-2), status='done')
+        self.create_task(None)
+
+        sent = check_and_send_due_notifications()
+        self.assertEqual(sent, {'task_overdue': 2, 'task_due_1h': 2, 'task_due_24h': 2})
+        self.assertEqual(EmailOutbox.objects.filter(status='pending').count(), 6)
+        self.assertEqual(set(Notification.objects.filter(task=overdue).values_list('notification_type', flat=True)), {'task_overdue'})
+        self.assertTrue(TaskNotificationTracker.objects.get(task=due_1h).due_1h_notification_sent)
+        self.assertTrue(TaskNotificationTracker.objects.get(task=due_24h).due_24h_notification_sent)
+
+        # Una segunda ejecución no repite avisos
+        self.assertEqual(check_and_send_due_notifications(), {'task_overdue': 0, 'task_due_1h': 0, 'task_due_24h': 0})
+        self.assertEqual(Notification.objects.count(), 6)
+
+        # Al entrar en la siguiente ventana se avisa de nuevo
+        Task.objects.filter(pk=due_24h.pk).update(due_date=timezone.now() + timedelta(minutes=10))
+        self.assertEqual(check_and_send_due_notifications()['task_due_1h'], 2)
+
+    def test_queries_depend_on_chunks_not_tasks(self):
+        for _ in range(3):
+            self.create_task(timedelta(hours=-1))
+        with CaptureQueriesContext(connection) as few:
+            check_and_send_due_notifications(chunk_size=50)
+
+        for _ in range(30):
+            self.create_task(timedelta(hours=-1))
+        with CaptureQueriesContext(connection) as many:
+            sent = check_and_send_due_notifications(chunk_size=50)
+        self.assertEqual(sent['task_overdue'], 60)
+        self.assertEqual(len(few), len(many))
+
+
+#Outbox de correos
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_RETRY_DELAY=60)
+class EmailOutboxTest(NotificationTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.executor = create_executor('thread', 2)
+        self.addCleanup(self.executor.shutdown)
+        self.addCleanup(close_connections)
+
+    def test_notifications_are_queued_and_delivered_by_worker(self):
+        task = self.create_task(timedelta(days=3))
+        notify_task_created(task)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(Notification.objects.filter(email_sent=True).exists())
+
+        self.assertEqual(process_batch(self.executor), (2, 0))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['admin@test.com', 'user@test.com'])
+        self.assertEqual(Notification.objects.filter(email_sent=True).count(), 2)
+        self.assertEqual(EmailOutbox.objects.filter(status='sent').count(), 2)
+        self.assertEqual(process_batch(self.executor), (0, 0))
+
+    def test_failures_retry_with_backoff_until_max_attempts(self):
+        notify_task_created(self.create_task(timedelta(days=3)))
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=ConnectionError('SMTP caído')
+        ):
+            self.assertEqual(process_batch(self.executor), (0, 2))
+            row = EmailOutbox.objects.first()
+            self.assertEqual((row.status, row.attempts), ('pending', 1))
+            self.assertIn('SMTP caído', row.last_error)
+            delay = row.next_attempt_at - timezone.now()
+            self.assertTrue(timedelta(seconds=50) < delay <= timedelta(seconds=60))
+
+            # No se reintenta antes de tiempo
+            self.assertEqual(process_batch(self.executor), (0, 0))
+
+            for _ in range(2):
+                EmailOutbox.objects.update(next_attempt_at=timezone.now())
+                self.assertEqual(process_batch(self.executor), (0, 2))
+            row.refresh_from_db()
+            self.assertEqual((row.status, row.attempts), ('failed', 3))
+
+        self.assertFalse(Notification.objects.filter(email_sent=True).exists())
+
+    def test_worker_reuses_connection_and_reconnects(self):
+        messages = [mail.EmailMessage('Asunto', 'Cuerpo', to=[f'user{i}@test.com']) for i in range(3)]
+        with mock.patch('notifications.outbox.get_connection', wraps=mail.get_connection) as opened:
+            self.assertEqual(deliver(messages), [None, None, None])
+            self.assertEqual(opened.call_count, 1)
+
+            with mock.patch(
+                'django.core.mail.backends.locmem.EmailBackend.send_messages',
+                side_effect=[smtplib.SMTPServerDisconnected('cerrada'), 1, smtplib.SMTPRecipientsRefused({}), 1],
+            ):
+                errors = deliver(messages)
+            self.assertEqual(opened.call_count, 2)
+        self.assertEqual(errors[0], None)
+        self.assertIn('SMTPRecipientsRefused', errors[1])
+        self.assertEqual(errors[2], None)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_email_is_rendered_once_per_task_event(self):
+        task = self.create_task(timedelta(days=3))
+        team_users = [
+            User.objects.create_user(email=f"member{i}@test.com", name=f"Miembro <{i}>", password="123456")
+            for i in range(10)
+        ]
+        task.assigned_to.add(*team_users)
+        notify_task_created(task)
+
+        with mock.patch('notifications.outbox.render_task_notification', wraps=render_task_notification) as render:
+            self.assertEqual(process_batch(self.executor), (12, 0))
+        self.assertEqual(render.call_count, 1)
+
+        html = {message.to[0]: message.alternatives[0][0] for message in mail.outbox}
+        self.assertIn('Hola, Miembro &lt;3&gt;', html['member3@test.com'])
+        self.assertIn('Hola, User', html['user@test.com'])
+        self.assertNotIn(RECIPIENT_NAME_MARKER, html['user@test.com'])
+
+
+#Resumen de notificaciones por usuario
+class DigestTest(NotificationTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        User.objects.filter(pk=self.user.pk).update(notification_digest='hourly')
+        self.addCleanup(close_connections)
+
+    def test_digest_users_get_one_email_per_interval(self):
+        notify_task_created(self.create_task(timedelta(days=3)))
+        check_and_send_due_notifications()
+        notify_task_created(self.create_task(timedelta(minutes=30)))
+        check_and_send_due_notifications()
+
+        # Solo los correos del usuario sin resumen pasan por el outbox
+        self.assertEqual(
+            set(EmailOutbox.objects.values_list('notification__user__email', flat=True)), {'admin@test.com'}
+        )
+
+        self.assertEqual(send_digests(), (1, 3, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@test.com'])
+        self.assertIn('3 notificaciones', mail.outbox[0].subject)
+        html = mail.outbox[0].alternatives[0][0]
+        self.assertIn('Due 0', html)
+        self.assertIn('Due 1', html)
+        self.assertFalse(Notification.objects.filter(user=self.user, email_sent=False).exists())
+
+        # Dentro del intervalo lo nuevo espera al siguiente resumen
+        notify_task_created(self.create_task(timedelta(days=3)))
+        self.assertEqual(send_digests(), (0, 0, 0))
+        User.objects.filter(pk=self.user.pk).update(last_digest_sent_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(send_digests(), (1, 1, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_digest_stays_pending(self):
+        notify_task_created(self.create_task(timedelta(days=3)))
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=ConnectionError('SMTP caído')
+        ):
+            self.assertEqual(send_digests(), (0, 0, 1))
+        self.assertIsNone(User.objects.get(pk=self.user.pk).last_digest_sent_at)
+        self.assertEqual(send_digests(), (1, 1, 0))
+
+    def test_queries_depend_on_batches_not_users(self):
+        def add_digest_users(count):
+            users = [
+                User.objects.create_user(
+                    email=f"digest{User.objects.count()}@test.com", name="Digest", password="123456",
+                    notification_digest='daily'
+                )
+                for _ in range(count)
+            ]
+            for _ in range(2):
+                task = self.create_task(timedelta(days=3))
+                task.assigned_to.add(*users)
+                notify_task_created(task)
+
+        add_digest_users(2)
+        with CaptureQueriesContext(connection) as few:
+            send_digests(batch_size=50)
+
+        add_digest_users(20)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(send_digests(batch_size=50), (20, 40, 0))
+        self.assertEqual(len(few), len(many))
+
+
+#Centro de notificaciones y contador de no leídas
+class NotificationInboxTest(NotificationTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def add_notifications(self, count):
+        Notification.objects.bulk_create([
+            Notification(user=self.user, message=f"Aviso {i}", notification_type='task_created') for i in range(count)
+        ])
+
+    def test_unread_count_is_cached_and_maintained(self):
+        self.assertEqual(get_unread_count(self.user.pk), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_task_created(self.create_task(timedelta(days=3)))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user.pk), 1)
+
+        notification = Notification.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notification-read', args=[notification.pk]))
+            # Marcarla otra vez no descuenta de nuevo
+            self.client.post(reverse('notification-read', args=[notification.pk]))
+        self.assertEqual(get_unread_count(self.user.pk), 0)
+        self.assertTrue(Notification.objects.get(pk=notification.pk).is_read)
+
+    def test_mark_all_read_is_a_single_update(self):
+        self.add_notifications(5)
+        other = Notification.objects.create(user=self.admin, message="Otro", notification_type='task_created')
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notification-read-all'))
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "notifications_notification"')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=False).exists())
+        self.assertFalse(Notification.objects.get(pk=other.pk).is_read)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user.pk), 0)
+
+    def test_inbox_is_paginated_by_cursor(self):
+        self.add_notifications(25)
+        response = self.client.get(reverse('notification-list'))
+        self.assertEqual(len(response.context['notifications']), 20)
+        self.assertEqual(response.context['unread_notifications_count'], 25)
+
+        response = self.client.get(reverse('notification-list'), {'cursor': response.context['page'].next_cursor})
+        self.assertEqual(len(response.context['notifications']), 5)
+        self.assertFalse(response.context['page'].has_next)
+        self.assertRedirects(
+            self.client.get(reverse('notification-list'), {'cursor': 'roto'}), reverse('notification-list')
+        )
+
+    def test_stream_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('notification-stream')).status_code, 401)
+
+    @mock.patch('notifications.views.STREAM_CHECK_INTERVAL', 0)
+    async def test_stream_pushes_unread_count_changes(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('notification-stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        events = aiter(response.streaming_content)
+        self.assertTrue((await anext(events)).startswith(b'retry:'))
+        self.assertEqual(await anext(events), b'event: unread\ndata: {"count": 0}\n\n')
+        cache.incr(f'notifications:unread:{self.user.pk}')
+        self.assertEqual(await anext(events), b'event: unread\ndata: {"count": 1}\n\n')
+
+    @mock.patch('notifications.views.STREAM_CHECK_INTERVAL', 0)
+    @mock.patch('notifications.views.STREAM_RECOUNT_INTERVAL', 0)
+    async def test_stream_recounts_notifications_from_other_processes(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('notification-stream'))
+        events = aiter(response.streaming_content)
+        await anext(events)
+        self.assertEqual(await anext(events), b'event: unread\ndata: {"count": 0}\n\n')
+
+        # Creada por otro proceso (p. ej. el scheduler): la caché de este proceso no se ajustó
+        await Notification.objects.acreate(user=self.user, message="Vence pronto")
+        self.assertEqual(await anext(events), b'event: unread\ndata: {"count": 1}\n\n')
+
+
+#Retención y archivo de notificaciones
+class NotificationRetentionTest(NotificationTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        notify_task_created(self.create_task(timedelta(days=3)))
+        notify_task_created(self.create_task(timedelta(days=3)))
+        # Tres leídas antiguas (una con su correo en el outbox) y una sin leer antigua
+        old = list(Notification.objects.order_by('pk'))
+        Notification.objects.filter(pk__in=[n.pk for n in old[:3]]).update(is_read=True)
+        Notification.objects.update(created_at=self.now - timedelta(days=100))
+        Notification.objects.create(user=self.user, message="Reciente", is_read=True)
+        self.old_read = [n.pk for n in old[:3]]
+
+    def test_old_read_notifications_are_moved_in_resumable_batches(self):
+        cutoff = self.now - timedelta(days=90)
+        self.assertEqual(retention.archive_read_notifications(cutoff, batch_size=2, max_batches=1), 2)
+        self.assertEqual(retention.archive_read_notifications(cutoff, batch_size=2), 1)
+        self.assertEqual(retention.archive_read_notifications(cutoff, batch_size=2), 0)
+
+        self.assertEqual(sorted(NotificationArchive.objects.values_list('pk', flat=True)), self.old_read)
+        self.assertFalse(Notification.objects.filter(pk__in=self.old_read).exists())
+        self.assertFalse(EmailOutbox.objects.filter(notification_id__in=self.old_read).exists())
+        self.assertEqual(Notification.objects.count(), 2)
+        archived = NotificationArchive.objects.get(pk=self.old_read[0])
+        self.assertEqual(archived.created_at, self.now - timedelta(days=100))
+
+        self.assertEqual(retention.delete_archived(self.now - timedelta(days=99), batch_size=2), 3)
+
+    def test_partitioned_archive_drops_whole_months(self):
+        retention.archive_read_notifications(self.now - timedelta(days=90), batch_size=10)
+        retention.partition_archive()
+        self.assertTrue(retention.archive_is_partitioned())
+        self.assertEqual(NotificationArchive.objects.count(), 3)
+
+        # Los lotes siguientes crean la partición de su mes si falta
+        Notification.objects.filter(message="Reciente").update(created_at=self.now - timedelta(days=200))
+        self.assertEqual(retention.archive_read_notifications(self.now - timedelta(days=90), batch_size=10), 1)
+
+        dropped = retention.drop_archive_partitions(retention.month_start(self.now - timedelta(days=100)))
+        self.assertEqual(dropped, [retention.partition_name(retention.month_start(self.now - timedelta(days=200)))])
+        self.assertEqual(NotificationArchive.objects.count(), 3)
+
+
+#Métricas de los comandos de notificaciones
+class JobMetricsTest(NotificationTestMixin, TestCase):
+
+    def test_due_run_metrics(self):
+        User.objects.filter(pk=self.user.pk).update(notification_digest='daily')
+        self.create_task(timedelta(hours=-2))
+        self.create_task(timedelta(hours=-1))
+        self.create_task(timedelta(minutes=30))
+
+        metrics = JobMetrics('send_task_notifications')
+        with metrics.run():
+            check_and_send_due_notifications(metrics=metrics)
+        data = metrics.as_dict()
+        self.assertEqual(data['tasks_scanned'], 3)
+        self.assertEqual(data['notifications_created'], {'task_overdue': 4, 'task_due_1h': 2, 'task_due_24h': 0})
+        # El usuario con resumen no encola correos
+        self.assertEqual(data['emails_queued'], 3)
+        self.assertGreater(data['db_queries'], 0)
+        self.assertIn('duration_seconds', data)
+
+        text = metrics.prometheus()
+        self.assertIn('# TYPE notification_job_tasks_scanned gauge', text)
+        self.assertIn('notification_job_tasks_scanned{command="send_task_notifications"} 3', text)
+        self.assertIn(
+            'notification_job_notifications_created{command="send_task_notifications",type="task_overdue"} 4', text
+        )
+
+    def test_report_writes_json_line_and_textfile(self):
+        metrics = JobMetrics('process_email_outbox')
+        notify_task_created(self.create_task(timedelta(days=3)))
+        with create_executor('thread', 2) as executor, metrics.run():
+            process_batch(executor, metrics=metrics)
+        close_connections()
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(NOTIFICATION_METRICS_DIR=directory):
+            with self.assertLogs('notifications.metrics', 'INFO') as logs:
+                metrics.report()
+            with open(f'{directory}/process_email_outbox.prom') as textfile:
+                self.assertIn('notification_job_emails_attempted{command="process_email_outbox"} 2', textfile.read())
+
+        data = json.loads(logs.records[0].getMessage())
+        self.assertEqual((data['command'], data['emails_attempted'], data['emails_failed']), ('process_email_outbox', 2, 0))
+        self.assertIn('smtp_seconds', data)
+
+    def test_unsendable_emails_are_not_counted_as_delivery_failures(self):
+        metrics = JobMetrics('process_email_outbox')
+        notify_task_created(self.create_task(timedelta(days=3)))
+        EmailOutbox.objects.create(notification=Notification.objects.create(user=self.user, message="Sin tarea"))
+        with create_executor('thread', 2) as executor:
+            process_batch(executor, metrics=metrics)
+        close_connections()
+
+        self.assertEqual(metrics.values['emails_attempted'], 2)
+        self.assertEqual(metrics.values['emails_failed'], 0)
+        self.assertEqual(metrics.values['emails_unsendable'], 1)
+
+
+#Scheduler de vencimientos
+class DeadlineSchedulerTest(NotificationTestMixin, TestCase):
+
+    def test_heap_orders_deadlines_and_skips_stale_entries(self):
+        now = timezone.now()
+        soon = self.create_task(timedelta(minutes=30))
+        later = self.create_task(timedelta(hours=5))
+        self.create_task(timedelta(days=3))
+        scheduler = DeadlineScheduler(timedelta(days=1))
+        scheduler.resync(now)
+
+        # Los avisos de 24h y 1h ya pasaron: se disparan al arrancar y la ventana decide cuál enviar
+        self.assertEqual(scheduler.pop_due(now), {soon.pk, later.pk})
+        self.assertEqual(check_and_send_due_notifications(task_ids={soon.pk, later.pk}),
+                         {'task_overdue': 0, 'task_due_1h': 2, 'task_due_24h': 2})
+        self.assertAlmostEqual(scheduler.seconds_until_next(now), 30 * 60 + 1, delta=2)
+
+        # Una tarea editada o completada se vuelve a armar y sus entradas viejas se ignoran
+        later.due_date = now + timedelta(days=2)
+        later.save()
+        soon.status = 'done'
+        soon.save()
+        scheduler.rearm({later.pk, soon.pk})
+        self.assertEqual(scheduler.pop_due(now + timedelta(hours=6)), set())
+        # El aviso de 24h ya se envió; queda el de 1 hora antes del nuevo vencimiento
+        self.assertEqual(scheduler.pop_due(now + timedelta(days=1, hours=1)), set())
+        self.assertEqual(scheduler.pop_due(now + timedelta(days=2)), {later.pk})
+
+    def test_resync_loads_only_upcoming_deadlines(self):
+        now = timezone.now()
+        self.create_task(timedelta(days=3))
+        soon = self.create_task(timedelta(hours=24, minutes=5))
+        scheduler = DeadlineScheduler(timedelta(minutes=10))
+        scheduler.resync(now)
+        self.assertEqual(set(scheduler.armed), {soon.pk})
+        self.assertAlmostEqual(scheduler.seconds_until_next(now), 300, delta=2)
+
+    def test_resync_skips_fired_and_expired_deadlines(self):
+        now = timezone.now()
+        overdue = self.create_task(-timedelta(hours=2))
+        soon = self.create_task(timedelta(minutes=30))
+        scheduler = DeadlineScheduler(timedelta(minutes=10))
+        scheduler.resync(now)
+        # Solo se arma el aviso vigente de cada tarea, no el de 24h que ya cerró
+        self.assertEqual(len(scheduler.heap), 3)
+        self.assertEqual(scheduler.pop_due(now), {overdue.pk, soon.pk})
+        check_and_send_due_notifications(task_ids={overdue.pk, soon.pk})
+
+        # El resync no vuelve a armar lo ya disparado; la tarea vencida no tiene avisos por delante
+        later = now + timedelta(minutes=10)
+        scheduler.resync(later)
+        self.assertEqual(set(scheduler.armed), {soon.pk})
+        self.assertEqual(scheduler.pop_due(later), set())
+        self.assertEqual(scheduler.pop_due(now + timedelta(minutes=31)), {soon.pk})
+
+    def test_task_changes_are_announced_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_task(timedelta(hours=3))
+            self.create_task(None)
+        self.assertEqual(len(callbacks), 1)
+
+
+#Anuncios por LISTEN/NOTIFY
+class DeadlineAnnouncementTest(NotificationTestMixin, TransactionTestCase):
+
+    def test_scheduler_is_woken_by_task_changes(self):
+        listen()
+        task = self.create_task(timedelta(hours=3))
+        self.assertEqual(wait_for_announcements(5), {task.pk})
+        self.assertEqual(wait_for_announcements(0), set())
+
+
+#Ejecuciones concurrentes (varias réplicas del cron o del scheduler)
+class ConcurrentRunTest(NotificationTestMixin, TransactionTestCase):
+
+    def in_other_connection(self, work):
+        """Ejecuta ``work(ready, release)`` en otro hilo, con su propia conexión, y espera a que avise ``ready``"""
+        ready, release = threading.Event(), threading.Event()
+
+        def run():
+            try:
+                work(ready, release)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.assertTrue(ready.wait(10))
+        return release, thread
+
+    def test_claimed_tasks_are_skipped_by_other_runs(self):
+        overdue = self.create_task(timedelta(hours=-2))
+        self.create_task(timedelta(hours=-3))
+
+        def hold_claim(ready, release):
+            ensure_trackers([overdue.pk])
+            with transaction.atomic():
+                claim_trackers([overdue.pk], 'overdue_notification_sent')
+                ready.set()
+                release.wait(10)
+
+        release, thread = self.in_other_connection(hold_claim)
+        # La tarea reclamada por la otra ejecución se salta sin esperar su lock
+        start = time.monotonic()
+        self.assertEqual(check_and_send_due_notifications()['task_overdue'], 2)
+        self.assertLess(time.monotonic() - start, 1)
+        release.set()
+        thread.join()
+
+        self.assertEqual(check_and_send_due_notifications()['task_overdue'], 0)
+        self.assertFalse(Notification.objects.filter(task=overdue).exists())
+
+    def test_repeated_notifications_are_ignored(self):
+        task = self.create_task(timedelta(days=3))
+        self.assertEqual(len(notify_assignments([(task, self.user), (task, self.admin)])), 2)
+        self.assertEqual(len(notify_assignments([(task, self.user), (task, self.user)], 'task_due_24h')), 1)
+        self.assertEqual(notify_assignments([(task, self.user)]), [])
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(EmailOutbox.objects.count(), 3)
+
+    def test_second_cron_run_is_skipped(self):
+        self.create_task(timedelta(hours=-2))
+
+        def hold_lock(ready, release):
+            with advisory_lock('send_task_notifications') as acquired:
+                self.assertTrue(acquired)
+                ready.set()
+                release.wait(10)
+
+        release, thread = self.in_other_connection(hold_lock)
+        out = StringIO()
+        call_command('send_task_notifications', stdout=out)
+        self.assertIn('Otra ejecución está en curso', out.getvalue())
+        self.assertFalse(Notification.objects.exists())
+
+        # Con --parallel se reparte el trabajo en lugar de omitirse
+        call_command('send_task_notifications', '--parallel', stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), 2)
+        release.set()
+        thread.join()
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from notifications.models import Notification
+
+
+UNREAD_KEY = 'notifications:unread:{}'
+
+
+def count_unread(user_id):
+    """Cuenta en la base de datos las notificaciones sin leer del usuario (índice notification_user_read_idx)"""
+    return Notification.objects.active().filter(user_id=user_id, is_read=False).count()
+
+
+def get_unread_count(user_id):
+    """Notificaciones sin leer del usuario; se cuentan en la base de datos solo si no están en caché"""
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = count_unread(user_id)
+        cache.add(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def refresh_unread_count(user_id):
+    """Recuenta en la base de datos y reemplaza el valor cacheado.
+
+    Corrige los ajustes que no llegaron a esta caché: con una caché por proceso (LocMemCache),
+    los avisos que crean el scheduler o el worker solo incrementan el contador de su proceso.
+    """
+    count = count_unread(user_id)
+    cache.set(UNREAD_KEY.format(user_id), count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def adjust_unread(deltas):
+    """Aplica incrementos {user_id: delta} a los contadores cacheados al confirmarse la transacción"""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+
+    def apply():
+        for user_id, delta in deltas.items():
+            try:
+                cache.incr(UNREAD_KEY.format(user_id), delta)
+            except ValueError:
+                # No está en caché: se contará en la próxima lectura
+                pass
+
+    if deltas:
+        transaction.on_commit(apply)
+
+
+def reset_unread(user_id):
+    """Deja en cero el contador del usuario tras marcar todas sus notificaciones como leídas"""
+    transaction.on_commit(
+        lambda: cache.set(UNREAD_KEY.format(user_id), 0, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+    )
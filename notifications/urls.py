@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.NotificationListView.as_view(), name='notification-list'),
+    path('<int:pk>/read/', views.mark_notification_read, name='notification-read'),
+    path('read-all/', views.mark_all_notifications_read, name='notification-read-all'),
+    path('stream/', views.notification_stream, name='notification-stream'),
+]
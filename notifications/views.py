@@ -1,3 +1,110 @@
-from django.shortcuts import render
+import asyncio
+import json
+import time
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.views.decorators.http import require_POST
+from django.views.generic import ListView
+from tasks.pagination import InvalidCursor, keyset_paginate
+from .models import Notification
+from .unread import adjust_unread, get_unread_count, refresh_unread_count, reset_unread
 
-# Create your views here.
+
+# Cada cuánto revisa el stream el contador cacheado; el navegador no hace polling
+STREAM_CHECK_INTERVAL = 2
+# Cada cuánto recuenta en la base de datos en vez de leer la caché, que puede no verse desde otros procesos
+STREAM_RECOUNT_INTERVAL = 20
+# Comentario periódico para que proxies y navegador no den la conexión por muerta
+STREAM_KEEPALIVE = 15
+# El stream se cierra tras este tiempo y EventSource se reconecta solo, liberando conexiones abandonadas
+STREAM_LIFETIME = 300
+STREAM_RETRY_MS = 3000
+
+
+class NotificationListView(LoginRequiredMixin, ListView):
+    model = Notification
+    template_name = 'notifications/inbox.html'
+    context_object_name = 'notifications'
+    page_size = 20
+    ordering = ('-created_at', '-id')
+    
+    def get_queryset(self):
+        return Notification.objects.active().filter(user=self.request.user).select_related('task__team')
+    
+    def get(self, request, *args, **kwargs):
+        # Paginación por cursor: el costo de cada página no depende de su posición
+        try:
+            self.page = keyset_paginate(
+                self.get_queryset(), self.ordering, request.GET.get('cursor'), self.page_size
+            )
+        except InvalidCursor:
+            return redirect('notification-list')
+        self.object_list = self.page.items
+        return self.render_to_response(self.get_context_data())
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page'] = self.page
+        context['is_first_page'] = not self.request.GET.get('cursor')
+        return context
+
+
+@require_POST
+@login_required
+def mark_notification_read(request, pk):
+    """Marca una notificación como leída; el UPDATE condicional evita descontarla dos veces"""
+    if Notification.objects.active().filter(pk=pk, user=request.user, is_read=False).update(is_read=True):
+        adjust_unread({request.user.pk: -1})
+    return redirect('notification-list')
+
+
+@require_POST
+@login_required
+def mark_all_notifications_read(request):
+    """Marca todas las notificaciones del usuario como leídas con un único UPDATE"""
+    # Las notificaciones de equipos eliminados no se muestran ni se cuentan: tampoco se marcan
+    updated = Notification.objects.active().filter(user=request.user, is_read=False).update(is_read=True)
+    reset_unread(request.user.pk)
+    if updated:
+        messages.success(request, f'{updated} notificaciones marcadas como leídas.')
+    return redirect('notification-list')
+
+
+async def unread_events(user_id, lifetime=STREAM_LIFETIME):
+    """Eventos SSE con el contador de no leídas; solo se emite cuando cambia"""
+    yield f'retry: {STREAM_RETRY_MS}\n\n'
+    last_count = None
+    last_sent = last_recount = started = time.monotonic()
+    while True:
+        if time.monotonic() - last_recount >= STREAM_RECOUNT_INTERVAL:
+            count = await sync_to_async(refresh_unread_count)(user_id)
+            last_recount = time.monotonic()
+        else:
+            count = await sync_to_async(get_unread_count)(user_id)
+        now = time.monotonic()
+        if count != last_count:
+            yield f'event: unread\ndata: {json.dumps({"count": count})}\n\n'
+            last_count, last_sent = count, now
+        elif now - last_sent >= STREAM_KEEPALIVE:
+            yield ': keepalive\n\n'
+            last_sent = now
+        if now - started >= lifetime:
+            return
+        await asyncio.sleep(STREAM_CHECK_INTERVAL)
+
+
+async def notification_stream(request):
+    """Stream SSE del contador de la navbar; requiere servir la app con ASGI (config/asgi.py)"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    
+    response = StreamingHttpResponse(unread_events(user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Evita que nginx acumule los eventos en su buffer
+    response['X-Accel-Buffering'] = 'no'
+    return response
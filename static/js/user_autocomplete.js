@@ -0,0 +1,127 @@
+// Autocompletado de usuarios: consulta el endpoint JSON de búsqueda mientras se escribe,
+// en lugar de renderizar todos los usuarios en un <select>
+(function () {
+    const DEBOUNCE_MS = 250;
+
+    function setup(root) {
+        const input = root.querySelector('.user-autocomplete-input');
+        const results = root.querySelector('.user-autocomplete-results');
+        const selected = root.querySelector('.user-autocomplete-selected');
+        const multiple = root.hasAttribute('data-multiple');
+        const fieldName = root.dataset.fieldName;
+        let timer = null;
+        let controller = null;
+
+        function selectedIds() {
+            return new Set(Array.from(selected.querySelectorAll('[data-user-id]'), (chip) => chip.dataset.userId));
+        }
+
+        function addChip(user) {
+            if (!multiple) {
+                selected.innerHTML = '';
+            }
+            const chip = document.createElement('span');
+            chip.className = 'badge bg-primary d-inline-flex align-items-center gap-1';
+            chip.dataset.userId = user.id;
+            chip.append(document.createTextNode(user.name));
+
+            const hidden = document.createElement('input');
+            hidden.type = 'hidden';
+            hidden.name = fieldName;
+            hidden.value = user.id;
+            chip.append(hidden);
+
+            const remove = document.createElement('button');
+            remove.type = 'button';
+            remove.className = 'btn-close btn-close-white btn-sm';
+            remove.setAttribute('aria-label', 'Quitar');
+            chip.append(remove);
+            selected.append(chip);
+        }
+
+        function render(data, append) {
+            if (!append) {
+                results.innerHTML = '';
+            }
+            results.querySelector('.user-autocomplete-more')?.remove();
+            const chosen = selectedIds();
+            data.results.forEach(function (user) {
+                const item = document.createElement('button');
+                item.type = 'button';
+                item.className = 'list-group-item list-group-item-action';
+                item.disabled = chosen.has(String(user.id));
+                item.textContent = `${user.name} (${user.email}) - ${user.role}`;
+                item.addEventListener('click', function () {
+                    addChip(user);
+                    input.value = '';
+                    results.hidden = true;
+                });
+                results.append(item);
+            });
+            if (data.next_cursor) {
+                const more = document.createElement('button');
+                more.type = 'button';
+                more.className = 'list-group-item list-group-item-action text-center text-muted user-autocomplete-more';
+                more.textContent = 'Cargar más';
+                more.addEventListener('click', () => search(data.next_cursor));
+                results.append(more);
+            }
+            if (!results.children.length) {
+                const empty = document.createElement('div');
+                empty.className = 'list-group-item text-muted';
+                empty.textContent = 'Sin resultados';
+                results.append(empty);
+            }
+            results.hidden = false;
+        }
+
+        function search(cursor) {
+            // Cancela la búsqueda anterior para que una respuesta lenta no pise a la más reciente
+            controller?.abort();
+            controller = new AbortController();
+            const url = new URL(root.dataset.searchUrl, window.location.origin);
+            url.searchParams.set('scope', root.dataset.scope);
+            if (root.dataset.team) {
+                url.searchParams.set('team', root.dataset.team);
+            }
+            url.searchParams.set('q', input.value.trim());
+            if (cursor) {
+                url.searchParams.set('cursor', cursor);
+            }
+            fetch(url, {signal: controller.signal, headers: {'Accept': 'application/json'}})
+                .then((response) => response.ok ? response.json() : Promise.reject(response))
+                .then((data) => render(data, Boolean(cursor)))
+                .catch(function (error) {
+                    if (error.name !== 'AbortError') {
+                        results.hidden = true;
+                    }
+                });
+        }
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(() => search(null), DEBOUNCE_MS);
+        });
+        input.addEventListener('focus', () => search(null));
+        input.addEventListener('keydown', function (event) {
+            // Enter no debe enviar el formulario mientras se busca
+            if (event.key === 'Enter') {
+                event.preventDefault();
+            }
+        });
+        selected.addEventListener('click', function (event) {
+            if (event.target.classList.contains('btn-close')) {
+                event.target.closest('[data-user-id]').remove();
+            }
+        });
+        document.addEventListener('click', function (event) {
+            if (!root.contains(event.target)) {
+                results.hidden = true;
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('.user-autocomplete').forEach(setup);
+    });
+})();
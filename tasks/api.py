@@ -0,0 +1,214 @@
+import json
+import uuid
+from functools import wraps
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from accounts.models import User
+from accounts.user_search import assignable_users
+from teams.models import Team, TeamMembership
+from notifications.services import notify_assignments, notify_tasks_created
+from . import bulk
+from .forms import BulkTaskForm
+from .models import Task
+
+
+# Límite de elementos por petición para acotar el tamaño de la transacción
+MAX_BULK_ITEMS = 500
+
+
+class ApiError(Exception):
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def json_api(view_func):
+    """Decorador para los endpoints JSON: sesión obligatoria, POST y cuerpo JSON"""
+    @require_POST
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Debe iniciar sesión.'}, status=401)
+
+        try:
+            payload = json.loads(request.body or b'{}')
+            if not isinstance(payload, dict):
+                raise ApiError('El cuerpo debe ser un objeto JSON.')
+            return view_func(request, payload, *args, **kwargs)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'JSON inválido.'}, status=400)
+        except ApiError as error:
+            return JsonResponse({'error': str(error), **error.extra}, status=error.status)
+    return wrapper
+
+
+def _item_list(payload, key):
+    items = payload.get(key)
+    if not isinstance(items, list) or not items:
+        raise ApiError(f'"{key}" debe ser una lista no vacía.')
+    if len(items) > MAX_BULK_ITEMS:
+        raise ApiError(f'Máximo {MAX_BULK_ITEMS} elementos por petición.')
+    return items
+
+
+def _user_ids(value, key='assigned_to'):
+    if value is None:
+        return set()
+    # bool es subclase de int: true/false no son ids de usuario
+    if not isinstance(value, list) or not all(
+        isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in value
+    ):
+        raise ApiError(f'"{key}" debe ser una lista de ids de usuario.')
+    return set(value)
+
+
+def _assignable_user_ids(user, user_ids):
+    """Subconjunto de ``user_ids`` que el usuario puede asignar, con el mismo criterio que TaskCreateView"""
+    return set(assignable_users(user).filter(id__in=user_ids).values_list('id', flat=True))
+
+
+def _check_assignable(user, user_ids):
+    not_allowed = user_ids - _assignable_user_ids(user, user_ids)
+    if not_allowed:
+        raise ApiError('No puedes asignar a algunos usuarios.', status=403, users=sorted(not_allowed))
+
+
+def _check_team_members(tasks, user_ids):
+    """Cada asignado debe ser miembro del equipo de cada tarea, como en TaskUpdateView; una consulta por lote"""
+    if not user_ids:
+        return
+    team_ids = {task.team_id for task in tasks}
+    members = set(
+        TeamMembership.objects.filter(team_id__in=team_ids, user_id__in=user_ids).values_list('team_id', 'user_id')
+    )
+    not_members = {}
+    for team_id in sorted(team_ids):
+        missing = sorted(user_id for user_id in user_ids if (team_id, user_id) not in members)
+        if missing:
+            not_members[team_id] = missing
+    if not_members:
+        raise ApiError(
+            'No puedes asignar a usuarios que no son miembros del equipo de la tarea.', status=403,
+            users=sorted(set().union(*not_members.values())), teams=not_members,
+        )
+
+
+def _load_tasks(payload):
+    """Tareas indicadas por UUID en ``payload['tasks']``, todas o ninguna"""
+    try:
+        uuids = {uuid.UUID(str(value)) for value in _item_list(payload, 'tasks')}
+    except ValueError:
+        raise ApiError('"tasks" debe contener UUIDs de tareas.')
+
+    tasks = list(Task.objects.active().filter(uuid__in=uuids).select_related('team'))
+    missing = uuids - {task.uuid for task in tasks}
+    if missing:
+        raise ApiError('Algunas tareas no existen.', status=404, tasks=sorted(str(value) for value in missing))
+    return tasks
+
+
+def _can_manage(user, task):
+    # Mismo criterio que TaskUpdateView y TaskDeleteView, sin consultar el líder de cada equipo
+    return user.role == 'admin' or (user.role == 'team_lead' and task.team.team_lead_id == user.pk)
+
+
+def _check_tasks(tasks, allowed):
+    forbidden = [str(task.uuid) for task in tasks if not allowed(task)]
+    if forbidden:
+        raise ApiError('No tienes permisos sobre algunas tareas.', status=403, tasks=forbidden)
+
+
+@json_api
+def bulk_create_tasks(request, payload):
+    """Crea varias tareas en una transacción"""
+    user = request.user
+    if user.role not in ['team_lead', 'admin']:
+        raise ApiError('Solo los líderes de equipo y administradores pueden crear tareas.', status=403)
+
+    items = _item_list(payload, 'tasks')
+    forms = [BulkTaskForm(item if isinstance(item, dict) else {}) for item in items]
+    errors = {index: form.errors.get_json_data() for index, form in enumerate(forms) if not form.is_valid()}
+    if errors:
+        raise ApiError('Datos inválidos.', errors=errors)
+
+    assignees = [_user_ids(item.get('assigned_to')) for item in items]
+
+    # Equipos y asignados se validan con una consulta para todo el lote
+    teams = Team.objects.all() if user.role == 'admin' else Team.objects.filter(team_lead=user)
+    team_ids = {form.cleaned_data['team'] for form in forms}
+    not_allowed = team_ids - set(teams.filter(id__in=team_ids).values_list('id', flat=True))
+    if not_allowed:
+        raise ApiError('No puedes crear tareas en algunos equipos.', status=403, teams=sorted(not_allowed))
+    _check_assignable(user, set().union(*assignees))
+
+    tasks = bulk.create_tasks(
+        [
+            Task(
+                team_id=form.cleaned_data['team'],
+                title=form.cleaned_data['title'],
+                description=form.cleaned_data['description'],
+                priority=form.cleaned_data['priority'],
+                status=form.cleaned_data['status'],
+                due_date=form.cleaned_data['due_date'],
+                created_by=user,
+            )
+            for form in forms
+        ],
+        assignees,
+    )
+    notify_tasks_created([task.pk for task, user_ids in zip(tasks, assignees) if user_ids])
+
+    return JsonResponse({
+        'created': [
+            {'uuid': str(task.uuid), 'title': task.title, 'team': task.team_id, 'status': task.status}
+            for task in tasks
+        ]
+    }, status=201)
+
+
+@json_api
+def bulk_update_status(request, payload):
+    """Cambia el estado de varias tareas"""
+    status = payload.get('status')
+    if status not in dict(Task.STATUS_CHOICES):
+        raise ApiError('Estado inválido.')
+
+    tasks = _load_tasks(payload)
+    user = request.user
+    # Como en update_task_status, los asignados pueden cambiar el estado de sus tareas
+    assigned_ids = set(
+        Task.assigned_to.through.objects.filter(
+            user_id=user.pk, task_id__in=[task.pk for task in tasks]
+        ).values_list('task_id', flat=True)
+    )
+    _check_tasks(tasks, lambda task: _can_manage(user, task) or task.pk in assigned_ids)
+
+    return JsonResponse({'updated': bulk.set_status(tasks, status)})
+
+
+@json_api
+def bulk_reassign(request, payload):
+    """Reemplaza los usuarios asignados de varias tareas"""
+    user_ids = _user_ids(payload.get('assigned_to'))
+    tasks = _load_tasks(payload)
+    user = request.user
+    _check_tasks(tasks, lambda task: _can_manage(user, task))
+    _check_team_members(tasks, user_ids)
+
+    added = bulk.reassign(tasks, user_ids)
+    users = User.objects.in_bulk({user_id for _, user_id in added})
+    notify_assignments([(task, users[user_id]) for task, user_id in added])
+
+    return JsonResponse({'updated': len(tasks), 'assigned': len(added)})
+
+
+@json_api
+def bulk_delete_tasks(request, payload):
+    """Elimina varias tareas"""
+    tasks = _load_tasks(payload)
+    user = request.user
+    _check_tasks(tasks, lambda task: _can_manage(user, task))
+
+    return JsonResponse({'deleted': bulk.delete_tasks(tasks)})
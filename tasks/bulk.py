@@ -0,0 +1,125 @@
+from collections import Counter as Tally, defaultdict
+from django.db import transaction
+from notifications.scheduler import announce
+from . import counters, search, visibility
+from .dashboard_cache import invalidate_dashboards, team_user_ids
+from .models import Counter, Task
+from .signals import suppressed
+
+
+Assignment = Task.assigned_to.through
+
+
+def _assignees_by_task(task_ids):
+    """Usuarios asignados a cada tarea, en una sola consulta"""
+    assignees = defaultdict(set)
+    for task_id, user_id in Assignment.objects.filter(task_id__in=task_ids).values_list('task_id', 'user_id'):
+        assignees[task_id].add(user_id)
+    return assignees
+
+
+def _affected_users(tasks, *user_id_sets):
+    """Usuarios cuyo dashboard muestra alguna de las tareas"""
+    user_ids = team_user_ids(*{task.team_id for task in tasks})
+    for user_id_set in user_id_sets:
+        user_ids.update(user_id_set)
+    return user_ids
+
+
+@transaction.atomic
+def create_tasks(tasks, assignees):
+    """Inserta tareas nuevas y sus asignaciones (``assignees`` es paralela a ``tasks``)"""
+    for task in tasks:
+        task.sync_ranks()
+    tasks = Task.objects.bulk_create(tasks)
+    Assignment.objects.bulk_create([
+        Assignment(task_id=task.pk, user_id=user_id)
+        for task, user_ids in zip(tasks, assignees)
+        for user_id in user_ids
+    ])
+
+    # bulk_create no emite señales: los datos derivados se mantienen aquí en bloque
+    task_ids = [task.pk for task in tasks]
+    deltas = Tally()
+    for task, user_ids in zip(tasks, assignees):
+        deltas.update(counters.task_deltas(task.team_id, task.status, user_ids, 1))
+    counters.adjust(deltas)
+    visibility.grant(task_ids=task_ids)
+    search.refresh_search_vectors(task_ids)
+    invalidate_dashboards(_affected_users(tasks, *assignees))
+    announce([task.pk for task in tasks if task.due_date])
+    return tasks
+
+
+@transaction.atomic
+def set_status(tasks, status):
+    """Cambia el estado de las tareas con un único UPDATE"""
+    changed = [task for task in tasks if task.status != status]
+    if not changed:
+        return 0
+
+    previous = {task.pk: task.status for task in changed}
+    Task.objects.filter(pk__in=previous).update(status=status, status_rank=Task.STATUS_RANKS[status])
+    apply_status_change(changed, previous, status)
+    return len(changed)
+
+
+def apply_status_change(tasks, previous, status):
+    """Ajusta contadores y dashboards de tareas ya movidas a ``status`` desde ``previous[task.pk]``"""
+    assignees = _assignees_by_task(list(previous))
+    deltas = Tally()
+    for task in tasks:
+        deltas.update(counters.task_deltas(task.team_id, previous[task.pk], assignees[task.pk], -1))
+        deltas.update(counters.task_deltas(task.team_id, status, assignees[task.pk], 1))
+    counters.adjust(deltas)
+    invalidate_dashboards(_affected_users(tasks, *assignees.values()))
+    # Completar o reabrir una tarea cambia los avisos de vencimiento pendientes
+    announce([task.pk for task in tasks if task.due_date])
+
+
+@transaction.atomic
+def reassign(tasks, user_ids):
+    """Reemplaza los asignados de las tareas; devuelve los pares (tarea, usuario) nuevos"""
+    user_ids = set(user_ids)
+    task_ids = [task.pk for task in tasks]
+    current = _assignees_by_task(task_ids)
+
+    removed = [(task, user_id) for task in tasks for user_id in current[task.pk] - user_ids]
+    added = [(task, user_id) for task in tasks for user_id in user_ids - current[task.pk]]
+
+    if removed:
+        Assignment.objects.filter(task_id__in=task_ids).exclude(user_id__in=user_ids).delete()
+    Assignment.objects.bulk_create([Assignment(task_id=task.pk, user_id=user_id) for task, user_id in added])
+
+    deltas = Tally()
+    for pairs, sign in ((removed, -1), (added, 1)):
+        for task, user_id in pairs:
+            deltas[(Counter.USER_STATUS, user_id, task.status)] += sign
+    counters.adjust(deltas)
+
+    if removed:
+        visibility.revoke(task_ids=task_ids)
+    if added:
+        visibility.grant(user_ids=user_ids, task_ids=task_ids)
+    invalidate_dashboards(_affected_users(tasks, user_ids, *current.values()))
+    return added
+
+
+@transaction.atomic
+def delete_tasks(tasks):
+    """Elimina las tareas descontando contadores y dashboards una sola vez"""
+    task_ids = [task.pk for task in tasks]
+    assignees = _assignees_by_task(task_ids)
+    affected_users = _affected_users(tasks, *assignees.values())
+
+    deltas = Tally()
+    for task in tasks:
+        deltas.update(counters.task_deltas(task.team_id, task.status, assignees[task.pk], -1))
+
+    # Las cascadas (comentarios, asignaciones, visibilidad) se borran con las tareas;
+    # el mantenimiento por fila de las señales se sustituye por el ajuste en bloque
+    with suppressed():
+        Task.objects.filter(pk__in=task_ids).delete()
+    counters.adjust(deltas)
+    invalidate_dashboards(affected_users)
+    return len(task_ids)
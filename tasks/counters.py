@@ -0,0 +1,81 @@
+from collections import Counter as Tally
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from teams.models import TeamMembership
+from .models import Counter, Task
+
+
+def adjust(deltas):
+    """Aplica incrementos {(scope, object_id, status): delta} dentro de una transacción"""
+    deltas = {key: delta for key, delta in deltas.items() if delta and key[1] is not None}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        for (scope, object_id, status), delta in sorted(deltas.items()):
+            counter = Counter.objects.filter(scope=scope, object_id=object_id, status=status)
+            if counter.update(value=F('value') + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    Counter.objects.create(scope=scope, object_id=object_id, status=status, value=delta)
+            except IntegrityError:
+                # Otro proceso creó la fila entre el UPDATE y el INSERT
+                counter.update(value=F('value') + delta)
+
+
+def task_deltas(team_id, status, user_ids, sign):
+    """Incrementos que produce agregar (sign=1) o quitar (sign=-1) una tarea"""
+    deltas = Tally({(Counter.TEAM_STATUS, team_id, status): sign})
+    for user_id in user_ids:
+        deltas[(Counter.USER_STATUS, user_id, status)] += sign
+    return deltas
+
+
+def status_counts(scope, object_ids=None):
+    """Suma los contadores por estado de los objetos indicados (o de todos si no se indican)"""
+    rows = Counter.objects.filter(scope=scope)
+    if object_ids is not None:
+        rows = rows.filter(object_id__in=object_ids)
+    rows = rows.order_by().values('status').annotate(total=Sum('value'))
+    counts = {status: 0 for status, _ in Task.STATUS_CHOICES}
+    for row in rows:
+        counts[row['status']] = row['total']
+    return counts
+
+
+def member_count_annotation():
+    """Expresión para anotar ``member_count`` en un queryset de equipos"""
+    return Coalesce(
+        Subquery(
+            Counter.objects.filter(
+                scope=Counter.TEAM_MEMBERS, object_id=OuterRef('pk'), status=''
+            ).values('value')[:1]
+        ),
+        Value(0),
+    )
+
+
+@transaction.atomic
+def rebuild():
+    """Recalcula todos los contadores desde las tablas de origen"""
+    Counter.objects.all().delete()
+
+    counters = [
+        Counter(scope=Counter.TEAM_STATUS, object_id=row['team_id'], status=row['status'], value=row['total'])
+        for row in Task.objects.order_by().values('team_id', 'status').annotate(total=Count('pk'))
+    ]
+    counters += [
+        Counter(scope=Counter.USER_STATUS, object_id=row['user_id'], status=row['task__status'], value=row['total'])
+        # Las tareas de equipos eliminados ya se descontaron al marcarlos (teams.purge.soft_delete)
+        for row in Task.assigned_to.through.objects.filter(task__team__deleted_at__isnull=True).order_by().values(
+            'user_id', 'task__status'
+        ).annotate(total=Count('pk'))
+    ]
+    counters += [
+        Counter(scope=Counter.TEAM_MEMBERS, object_id=row['team_id'], status='', value=row['total'])
+        for row in TeamMembership.objects.order_by().values('team_id').annotate(total=Count('pk'))
+    ]
+    Counter.objects.bulk_create(counters, batch_size=1000)
+    return len(counters)
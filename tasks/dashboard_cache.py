@@ -0,0 +1,62 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from teams.models import Team, TeamMembership
+
+
+USER_VERSION_KEY = 'dashboard:version:user:{}'
+ADMIN_VERSION_KEY = 'dashboard:version:admin'
+CONTEXT_KEY = 'dashboard:context:{}:{}'
+
+
+def _initial_version():
+    # Un valor basado en el tiempo evita reutilizar contextos viejos si la clave de versión se pierde
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+
+
+def get_dashboard_version(user):
+    """Devuelve la versión actual del dashboard del usuario"""
+    if user.role == 'admin':
+        # Los administradores ven todo el sistema, así que comparten una versión global
+        key = ADMIN_VERSION_KEY
+    else:
+        key = USER_VERSION_KEY.format(user.pk)
+
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_dashboard_context(user, build):
+    """Obtiene el contexto del dashboard desde la caché o lo construye con ``build()``"""
+    key = CONTEXT_KEY.format(user.pk, get_dashboard_version(user))
+    context = cache.get(key)
+    if context is None:
+        context = build()
+        cache.set(key, context, settings.DASHBOARD_CACHE_TIMEOUT)
+    return context
+
+
+def invalidate_dashboards(user_ids):
+    """Invalida el dashboard de los usuarios indicados y el de los administradores"""
+    for user_id in set(user_ids):
+        if user_id is not None:
+            _bump(USER_VERSION_KEY.format(user_id))
+    _bump(ADMIN_VERSION_KEY)
+
+
+def team_user_ids(*team_ids):
+    """Miembros y líderes de los equipos indicados, cuyos dashboards muestran esos equipos"""
+    team_ids = [team_id for team_id in team_ids if team_id is not None]
+    user_ids = set(TeamMembership.objects.filter(team_id__in=team_ids).values_list('user_id', flat=True))
+    user_ids.update(Team.all_objects.filter(id__in=team_ids).values_list('team_lead_id', flat=True))
+    return user_ids
@@ -0,0 +1,18 @@
+from django import forms
+from .models import Task
+
+
+class BulkTaskForm(forms.Form):
+    """Valida cada elemento de una creación masiva; el equipo y los asignados se validan en bloque"""
+    title = forms.CharField(max_length=200)
+    description = forms.CharField(required=False)
+    team = forms.IntegerField()
+    priority = forms.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    status = forms.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    due_date = forms.DateTimeField(required=False)
+
+    def clean_priority(self):
+        return self.cleaned_data['priority'] or 'medium'
+
+    def clean_status(self):
+        return self.cleaned_data['status'] or 'to_do'
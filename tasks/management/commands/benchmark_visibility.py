@@ -0,0 +1,118 @@
+import random
+import statistics
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from accounts.models import User
+from teams.models import Team, TeamMembership
+from tasks import visibility
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el plan y el tiempo de la consulta de visibilidad con OR + DISTINCT '
+        'frente al índice TaskVisibility sobre un conjunto de datos sembrado'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--teams', type=int, default=50)
+        parser.add_argument('--tasks', type=int, default=50000)
+        parser.add_argument('--teams-per-user', type=int, default=3)
+        parser.add_argument('--assignees', type=int, default=2, help='Usuarios asignados por tarea')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Conservar los datos sembrados')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options)
+            self.compare(user, options['repeat'])
+            if not options['keep']:
+                transaction.set_rollback(True)
+                self.stdout.write('Datos sembrados descartados')
+
+    def seed(self, options):
+        rng = random.Random(42)
+        prefix = uuid.uuid4().hex[:8]
+        self.stdout.write(
+            f"Sembrando {options['users']} usuarios, {options['teams']} equipos y {options['tasks']} tareas..."
+        )
+
+        users = User.objects.bulk_create([
+            User(name=f'Bench {i}', email=f'bench-{prefix}-{i}@example.com', password='!')
+            for i in range(options['users'])
+        ])
+        teams = Team.objects.bulk_create([
+            Team(name=f'Bench team {i}', created_by=users[0]) for i in range(options['teams'])
+        ])
+
+        memberships = set()
+        for user in users:
+            for team in rng.sample(teams, min(options['teams_per_user'], len(teams))):
+                memberships.add((team.pk, user.pk))
+        TeamMembership.objects.bulk_create(
+            [TeamMembership(team_id=team_id, user_id=user_id) for team_id, user_id in memberships],
+            batch_size=5000,
+        )
+
+        statuses = [status for status, _ in Task.STATUS_CHOICES]
+        priorities = [priority for priority, _ in Task.PRIORITY_CHOICES]
+        tasks = []
+        for i in range(options['tasks']):
+            task = Task(
+                team=rng.choice(teams),
+                title=f'Bench task {i}',
+                status=rng.choice(statuses),
+                priority=rng.choice(priorities),
+                created_by=users[0],
+            )
+            task.sync_ranks()
+            tasks.append(task)
+        tasks = Task.objects.bulk_create(tasks, batch_size=5000)
+
+        Assignment = Task.assigned_to.through
+        assignments = []
+        for task in tasks:
+            for assignee in rng.sample(users, min(options['assignees'], len(users))):
+                assignments.append(Assignment(task_id=task.pk, user_id=assignee.pk))
+        Assignment.objects.bulk_create(assignments, batch_size=5000, ignore_conflicts=True)
+
+        # bulk_create no emite señales: se indexa el conjunto sembrado de una vez
+        visibility.grant(team_ids=[team.pk for team in teams])
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        return users[len(users) // 2]
+
+    def compare(self, user, repeat):
+        variants = {
+            'OR + DISTINCT': Task.objects.filter(Q(assigned_to=user) | Q(team__members=user)).distinct(),
+            'TaskVisibility': Task.objects.visible_to(user),
+        }
+        analyze = connection.vendor == 'postgresql'
+
+        for name, queryset in variants.items():
+            page = queryset.order_by('-created_at', '-id').values_list('pk', flat=True)[:20]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {name} =='))
+            self.stdout.write(page.explain(analyze=analyze) if analyze else page.explain())
+
+            count_times = []
+            page_times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                total = queryset.count()
+                count_times.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                list(page.all())
+                page_times.append((time.perf_counter() - start) * 1000)
+
+            self.stdout.write(
+                f'Tareas visibles: {total} | count(): {statistics.median(count_times):.2f} ms | '
+                f'primera página: {statistics.median(page_times):.2f} ms (mediana de {repeat})'
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from tasks.counters import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero los contadores de tareas por equipo, por usuario y de miembros por equipo'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconstruyendo contadores...')
+        total = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Contadores reconstruidos: {total} filas'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from tasks.visibility import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero el índice de visibilidad de tareas por usuario'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconstruyendo índice de visibilidad...')
+        total = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Índice reconstruido: {total} filas'))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Counter = apps.get_model('tasks', 'Counter')
+    Task = apps.get_model('tasks', 'Task')
+    TeamMembership = apps.get_model('teams', 'TeamMembership')
+
+    counters = [
+        Counter(scope='team_status', object_id=row['team_id'], status=row['status'], value=row['total'])
+        for row in Task.objects.order_by().values('team_id', 'status').annotate(total=Count('pk'))
+    ]
+    counters += [
+        Counter(scope='user_status', object_id=row['user_id'], status=row['task__status'], value=row['total'])
+        for row in Task.assigned_to.through.objects.order_by().values('user_id', 'task__status').annotate(
+            total=Count('pk')
+        )
+    ]
+    counters += [
+        Counter(scope='team_members', object_id=row['team_id'], status='', value=row['total'])
+        for row in TeamMembership.objects.order_by().values('team_id').annotate(total=Count('pk'))
+    ]
+    Counter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_status_created_idx'),
+        ('teams', '0002_alter_teammembership_unique_together_team_team_lead_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('team_status', 'Tareas por equipo y estado'), ('user_status', 'Tareas asignadas por usuario y estado'), ('team_members', 'Miembros por equipo')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('status', models.CharField(blank=True, default='', max_length=20)),
+                ('value', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'object_id', 'status'), name='unique_counter')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
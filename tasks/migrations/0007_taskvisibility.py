@@ -0,0 +1,46 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_visibility(apps, schema_editor):
+    TaskVisibility = apps.get_model('tasks', 'TaskVisibility')
+    Task = apps.get_model('tasks', 'Task')
+    TeamMembership = apps.get_model('teams', 'TeamMembership')
+
+    visibility = TaskVisibility._meta.db_table
+    task = Task._meta.db_table
+    assigned = Task.assigned_to.through._meta.db_table
+    membership = TeamMembership._meta.db_table
+    schema_editor.execute(
+        f"INSERT INTO {visibility} (user_id, task_id) "
+        f"SELECT a.user_id, a.task_id FROM {assigned} a "
+        f"UNION "
+        f"SELECT m.user_id, t.id FROM {membership} m JOIN {task} t ON t.team_id = m.team_id"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_counter'),
+        ('teams', '0002_alter_teammembership_unique_together_team_team_lead_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskVisibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visibility', to='tasks.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visible_tasks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'task'), name='unique_task_visibility')],
+            },
+        ),
+        migrations.RunPython(populate_visibility, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+
+STATUS_RANKS = {'to_do': 1, 'in_progress': 2, 'review': 3, 'done': 4}
+PRIORITY_RANKS = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 4}
+
+
+def backfill_ranks(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.update(
+        status_rank=Case(
+            *[When(status=status, then=Value(rank)) for status, rank in STATUS_RANKS.items()],
+            default=Value(1),
+        ),
+        priority_rank=Case(
+            *[When(priority=priority, then=Value(rank)) for priority, rank in PRIORITY_RANKS.items()],
+            default=Value(2),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_taskvisibility'),
+        ('teams', '0002_alter_teammembership_unique_together_team_team_lead_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['-priority_rank', '-created_at']},
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_status_created_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='status_rank',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['team', 'status', 'priority_rank', 'created_at'], name='task_team_status_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['team', 'priority_rank', 'created_at'], name='task_team_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'priority_rank', 'created_at', 'id'], name='task_status_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:06
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_search_vector(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    Comment = apps.get_model('tasks', 'Comment')
+
+    comments = Comment.objects.filter(task=OuterRef('pk')).order_by().values('task').annotate(
+        text=StringAgg('content', delimiter=' ')
+    ).values('text')
+    search_config = settings.TASK_SEARCH_CONFIG
+    Task.objects.update(search_vector=(
+        SearchVector('title', weight='A', config=search_config)
+        + SearchVector('description', weight='B', config=search_config)
+        + SearchVector(
+            Coalesce(Subquery(comments), Value(''), output_field=TextField()), weight='C', config=search_config
+        )
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_task_rank_columns'),
+        ('teams', '0002_alter_teammembership_unique_together_team_team_lead_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='task_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
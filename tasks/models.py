@@ -1,9 +1,33 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from teams.models import Team
 import uuid
 
 
+class TaskQuerySet(models.QuerySet):
+
+    def active(self):
+        """Excluye las tareas de equipos eliminados que todavía no se purgaron"""
+        return self.filter(team__deleted_at__isnull=True)
+
+    def visible_to(self, user):
+        """Tareas que el usuario puede ver: todas para admin, asignadas o de sus equipos para el resto"""
+        if user.role == 'admin':
+            return self.active()
+        # Un solo join contra el índice de visibilidad; cada par (usuario, tarea) es único, no hace falta DISTINCT
+        return self.active().filter(visibility__user=user)
+
+    def visible_to_by_membership(self, user):
+        """Cálculo directo de la visibilidad (OR sobre asignaciones y membresías); base de TaskVisibility"""
+        if user.role == 'admin':
+            return self.active()
+        visible_ids = Task.objects.filter(Q(assigned_to=user) | Q(team__members=user)).values('pk')
+        return self.active().filter(pk__in=visible_ids)
+
+
 class Task(models.Model):
 
     STATUS_CHOICES = [
@@ -20,6 +44,10 @@ class Task(models.Model):
         ('urgent', 'Urgent'),
     ]
 
+    # Rangos enteros para ordenar correctamente (los códigos en texto no siguen el orden lógico)
+    STATUS_RANKS = {'to_do': 1, 'in_progress': 2, 'review': 3, 'done': 4}
+    PRIORITY_RANKS = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 4}
+
     # UUID para identificador único universal (útil para APIs, compartir tareas, tracking)
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, db_index=True, null=True, blank=True)
     team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='tasks')
@@ -27,17 +55,50 @@ class Task(models.Model):
     description = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='to_do')
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='medium')
+    status_rank = models.PositiveSmallIntegerField(default=1, editable=False)
+    priority_rank = models.PositiveSmallIntegerField(default=2, editable=False)
     due_date = models.DateTimeField(null=True, blank=True)
     assigned_to = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='assigned_tasks', blank=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='created_tasks')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Título, descripción y comentarios; se mantiene desde tasks.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TaskQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-priority', '-created_at']
+        ordering = ['-priority_rank', '-created_at']
+        indexes = [
+            models.Index(fields=['team', 'status', 'priority_rank', 'created_at'], name='task_team_status_rank_idx'),
+            models.Index(fields=['team', 'priority_rank', 'created_at'], name='task_team_rank_idx'),
+            # Paginación por cursor de las columnas del Kanban
+            models.Index(fields=['status', 'priority_rank', 'created_at', 'id'], name='task_status_rank_idx'),
+            # Ventanas de vencimiento de notifications.services.check_and_send_due_notifications
+            models.Index(fields=['due_date'], name='task_due_date_idx'),
+            GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='task_title_trgm_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
+    def sync_ranks(self):
+        """Actualiza los rangos enteros a partir de status y priority"""
+        self.status_rank = self.STATUS_RANKS[self.status]
+        self.priority_rank = self.PRIORITY_RANKS[self.priority]
+
+    def save(self, *args, **kwargs):
+        self.sync_ranks()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'status' in update_fields:
+                update_fields.add('status_rank')
+            if 'priority' in update_fields:
+                update_fields.add('priority_rank')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     content = models.TextField()
@@ -47,3 +108,44 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created_at']
+
+
+class Counter(models.Model):
+    """Contadores desnormalizados mantenidos por señales; se reconstruyen con rebuild_counters"""
+
+    TEAM_STATUS = 'team_status'
+    USER_STATUS = 'user_status'
+    TEAM_MEMBERS = 'team_members'
+
+    SCOPE_CHOICES = [
+        (TEAM_STATUS, 'Tareas por equipo y estado'),
+        (USER_STATUS, 'Tareas asignadas por usuario y estado'),
+        (TEAM_MEMBERS, 'Miembros por equipo'),
+    ]
+
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    object_id = models.BigIntegerField()
+    status = models.CharField(max_length=20, blank=True, default='')
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'object_id', 'status'], name='unique_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.object_id}:{self.status} = {self.value}"
+
+
+class TaskVisibility(models.Model):
+    """Índice precalculado de qué usuarios pueden ver cada tarea (asignados y miembros del equipo)"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='visible_tasks')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='visibility')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'task'], name='unique_task_visibility'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.task_id}"
@@ -0,0 +1,100 @@
+import base64
+import datetime
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Conserva los microsegundos, que DjangoJSONEncoder recorta a milisegundos"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _field_name(ordering_field):
+    return ordering_field.lstrip('-')
+
+
+def encode_cursor(obj, ordering):
+    """Genera un cursor opaco con los valores de ordenamiento del último elemento de la página"""
+    values = [getattr(obj, _field_name(field)) for field in ordering]
+    payload = json.dumps(values, cls=CursorEncoder).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    """Recupera los valores de un cursor convirtiéndolos al tipo de cada campo"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor('Cursor inválido') from exc
+
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor('Cursor inválido')
+
+    try:
+        return [
+            model._meta.get_field(_field_name(field)).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except Exception as exc:
+        raise InvalidCursor('Cursor inválido') from exc
+
+
+def keyset_filter(ordering, values):
+    """Condición "después del cursor" para un ordenamiento compuesto, p. ej. (-created_at, -id)"""
+    condition = Q()
+    for position, field in enumerate(ordering):
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{_field_name(field)}__{lookup}': values[position]})
+        for previous_field, previous_value in zip(ordering[:position], values[:position]):
+            step &= Q(**{_field_name(previous_field): previous_value})
+        condition |= step
+
+    # Cota redundante sobre la primera columna para que el planificador use el índice
+    first = ordering[0]
+    bound = 'lte' if first.startswith('-') else 'gte'
+    return Q(**{f'{_field_name(first)}__{bound}': values[0]}) & condition
+
+
+class KeysetPage:
+    """Página obtenida con paginación por cursor (keyset) en lugar de OFFSET"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def page_from_rows(rows, ordering, page_size):
+    """Construye la página a partir de hasta ``page_size + 1`` filas ya ordenadas"""
+    items = list(rows[:page_size])
+    next_cursor = None
+    if len(rows) > page_size and items:
+        next_cursor = encode_cursor(items[-1], ordering)
+    return KeysetPage(items, next_cursor)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=20):
+    """Devuelve la página que sigue a ``cursor`` sin recorrer las filas anteriores"""
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, ordering)
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    return page_from_rows(list(queryset[:page_size + 1]), ordering, page_size)
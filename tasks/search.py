@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import F, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+from .models import Comment, Task
+
+
+def search_vector_expression():
+    """tsvector de una tarea: título (A), descripción (B) y comentarios (C)"""
+    comments = Comment.objects.filter(task=OuterRef('pk')).order_by().values('task').annotate(
+        text=StringAgg('content', delimiter=' ')
+    ).values('text')
+    search_config = settings.TASK_SEARCH_CONFIG
+    return (
+        SearchVector('title', weight='A', config=search_config)
+        + SearchVector('description', weight='B', config=search_config)
+        + SearchVector(
+            Coalesce(Subquery(comments), Value(''), output_field=TextField()), weight='C', config=search_config
+        )
+    )
+
+
+def refresh_search_vectors(task_ids=None):
+    """Recalcula el tsvector de las tareas indicadas (o de todas) con un solo UPDATE"""
+    tasks = Task.objects.all()
+    if task_ids is not None:
+        tasks = tasks.filter(pk__in=task_ids)
+    return tasks.update(search_vector=search_vector_expression())
+
+
+def search_tasks(queryset, text):
+    """Filtra y ordena por relevancia: texto completo más similitud difusa en el título"""
+    query = SearchQuery(text, search_type='websearch', config=settings.TASK_SEARCH_CONFIG)
+    return queryset.filter(
+        Q(search_vector=query) | Q(title__trigram_similar=text)
+    ).annotate(
+        rank=SearchRank(F('search_vector'), query) + TrigramSimilarity('title', text)
+    ).order_by('-rank', '-id')
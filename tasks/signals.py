@@ -0,0 +1,300 @@
+import threading
+from collections import Counter as Tally
+from contextlib import contextmanager
+from functools import wraps
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+from accounts.models import User
+from teams.models import Team, TeamMembership
+from . import counters, search, visibility
+from .dashboard_cache import invalidate_dashboards, team_user_ids
+from .models import Comment, Counter, Task
+
+
+_state = threading.local()
+
+
+@contextmanager
+def suppressed():
+    """Desactiva el mantenimiento por fila; las operaciones masivas lo hacen en bloque"""
+    previous = getattr(_state, 'suppressed', False)
+    _state.suppressed = True
+    try:
+        yield
+    finally:
+        _state.suppressed = previous
+
+
+def maintenance(handler):
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if getattr(_state, 'suppressed', False):
+            return None
+        return handler(*args, **kwargs)
+    return wrapper
+
+
+def _assignment_rows(instance, reverse, pk_set):
+    """Pares (usuario, estado de la tarea) de las asignaciones afectadas por un m2m_changed"""
+    rows = Task.assigned_to.through.objects.all()
+    if reverse:
+        rows = rows.filter(user_id=instance.pk)
+        if pk_set is not None:
+            rows = rows.filter(task_id__in=pk_set)
+    else:
+        rows = rows.filter(task_id=instance.pk)
+        if pk_set is not None:
+            rows = rows.filter(user_id__in=pk_set)
+    return list(rows.values_list('user_id', 'task__status'))
+
+
+@receiver(pre_save, sender=Task)
+def remember_previous_state(sender, instance, **kwargs):
+    instance._previous_state = None
+    if instance.pk:
+        instance._previous_state = Task.objects.filter(pk=instance.pk).values(
+            'team_id', 'status', 'title', 'description'
+        ).first()
+
+
+# Caché del dashboard
+
+@receiver(post_save, sender=Task)
+@maintenance
+def invalidate_on_task_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None) or {}
+    user_ids = team_user_ids(instance.team_id, previous.get('team_id'))
+    user_ids.update(instance.assigned_to.values_list('id', flat=True))
+    invalidate_dashboards(user_ids)
+
+
+@receiver(pre_delete, sender=Task)
+@maintenance
+def invalidate_on_task_delete(sender, instance, **kwargs):
+    # Los asignados se calculan antes de que se borren las filas de la relación
+    user_ids = team_user_ids(instance.team_id)
+    user_ids.update(instance.assigned_to.values_list('id', flat=True))
+    invalidate_dashboards(user_ids)
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+@maintenance
+def invalidate_on_assignment_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    # Las tarjetas muestran los asignados: cambian para todo el equipo de la tarea, no solo para ellos
+    if reverse:
+        # instance es el usuario y pk_set son tareas
+        tasks = Task.objects.filter(pk__in=pk_set) if pk_set is not None else instance.assigned_tasks.all()
+        user_ids = team_user_ids(*tasks.order_by().values_list('team_id', flat=True).distinct())
+        user_ids.add(instance.pk)
+    else:
+        user_ids = team_user_ids(instance.team_id)
+        if action == 'pre_clear':
+            user_ids.update(instance.assigned_to.values_list('id', flat=True))
+        else:
+            user_ids.update(pk_set)
+    invalidate_dashboards(user_ids)
+
+
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+@maintenance
+def invalidate_on_membership_change(sender, instance, **kwargs):
+    # El usuario gana o pierde tareas visibles y el resto del equipo ve cambiar el contador de miembros
+    user_ids = team_user_ids(instance.team_id)
+    user_ids.add(instance.user_id)
+    invalidate_dashboards(user_ids)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+@maintenance
+def invalidate_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # team.members.add no emite post_save de TeamMembership
+    if action != 'post_add':
+        return
+
+    if reverse:
+        # instance es el usuario y pk_set son equipos
+        user_ids = team_user_ids(*pk_set)
+        user_ids.add(instance.pk)
+    else:
+        user_ids = team_user_ids(instance.pk)
+    invalidate_dashboards(user_ids)
+
+
+@receiver(post_save, sender=Team)
+@maintenance
+def invalidate_on_team_save(sender, instance, **kwargs):
+    invalidate_dashboards(team_user_ids(instance.pk))
+
+
+@receiver(pre_delete, sender=Team)
+@maintenance
+def invalidate_on_team_delete(sender, instance, **kwargs):
+    invalidate_dashboards(team_user_ids(instance.pk))
+
+
+# Contadores desnormalizados
+
+@receiver(post_save, sender=Task)
+@maintenance
+def count_task_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if created or previous is None:
+        # Los asignados se cuentan al agregarse a la relación
+        counters.adjust(counters.task_deltas(instance.team_id, instance.status, [], 1))
+        return
+
+    if (previous['team_id'], previous['status']) == (instance.team_id, instance.status):
+        return
+
+    user_ids = list(instance.assigned_to.values_list('id', flat=True))
+    deltas = counters.task_deltas(previous['team_id'], previous['status'], user_ids, -1)
+    deltas.update(counters.task_deltas(instance.team_id, instance.status, user_ids, 1))
+    counters.adjust(deltas)
+
+
+@receiver(pre_delete, sender=Task)
+@maintenance
+def count_task_delete(sender, instance, **kwargs):
+    user_ids = list(instance.assigned_to.values_list('id', flat=True))
+    counters.adjust(counters.task_deltas(instance.team_id, instance.status, user_ids, -1))
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+@maintenance
+def count_assignment_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # add/remove/clear se ejecutan en una transacción junto con estas señales
+    if action == 'post_add':
+        sign, rows = 1, _assignment_rows(instance, reverse, pk_set)
+    elif action == 'pre_remove':
+        # remove() recibe también ids que no estaban asignados; solo se cuentan las filas existentes
+        sign, rows = -1, _assignment_rows(instance, reverse, pk_set)
+    elif action == 'pre_clear':
+        sign, rows = -1, _assignment_rows(instance, reverse, None)
+    else:
+        return
+
+    deltas = Tally()
+    for user_id, status in rows:
+        deltas[(Counter.USER_STATUS, user_id, status)] += sign
+    counters.adjust(deltas)
+
+
+@receiver(post_save, sender=TeamMembership)
+@maintenance
+def count_membership_save(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust({(Counter.TEAM_MEMBERS, instance.team_id, ''): 1})
+
+
+@receiver(post_delete, sender=TeamMembership)
+@maintenance
+def count_membership_delete(sender, instance, **kwargs):
+    # También cubre team.members.remove/clear y los borrados en cascada
+    counters.adjust({(Counter.TEAM_MEMBERS, instance.team_id, ''): -1})
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+@maintenance
+def count_members_add(sender, instance, action, reverse, pk_set, **kwargs):
+    # team.members.add usa bulk_create y no emite post_save de TeamMembership
+    if action != 'post_add':
+        return
+
+    if reverse:
+        counters.adjust({(Counter.TEAM_MEMBERS, team_id, ''): 1 for team_id in pk_set})
+    else:
+        counters.adjust({(Counter.TEAM_MEMBERS, instance.pk, ''): len(pk_set)})
+
+
+@receiver(post_delete, sender=Team)
+@maintenance
+def delete_team_counters(sender, instance, **kwargs):
+    Counter.objects.filter(
+        scope__in=[Counter.TEAM_STATUS, Counter.TEAM_MEMBERS], object_id=instance.pk
+    ).delete()
+
+
+@receiver(post_delete, sender=User)
+@maintenance
+def delete_user_counters(sender, instance, **kwargs):
+    Counter.objects.filter(scope=Counter.USER_STATUS, object_id=instance.pk).delete()
+
+
+# Índice de visibilidad
+
+@receiver(post_save, sender=Task)
+@maintenance
+def index_task_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if created or previous is None:
+        visibility.grant(task_ids=[instance.pk])
+    elif previous['team_id'] != instance.team_id:
+        visibility.revoke(task_ids=[instance.pk])
+        visibility.grant(task_ids=[instance.pk])
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+@maintenance
+def index_assignment_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # instance es el usuario y pk_set son tareas
+        restriction = {'user_ids': [instance.pk], 'task_ids': pk_set}
+    else:
+        restriction = {'task_ids': [instance.pk], 'user_ids': pk_set}
+
+    if action == 'post_add':
+        visibility.grant(**restriction)
+    elif action == 'post_remove':
+        visibility.revoke(**restriction)
+    elif action == 'post_clear':
+        # pk_set es None: se revisan todos los pares de la tarea o del usuario
+        visibility.revoke(**{key: value for key, value in restriction.items() if value is not None})
+
+
+@receiver(post_save, sender=TeamMembership)
+@maintenance
+def index_membership_save(sender, instance, created, **kwargs):
+    if created:
+        visibility.grant(user_ids=[instance.user_id], team_ids=[instance.team_id])
+
+
+@receiver(post_delete, sender=TeamMembership)
+@maintenance
+def index_membership_delete(sender, instance, **kwargs):
+    # Solo borra: durante un borrado en cascada no deben insertarse filas nuevas
+    visibility.revoke(user_ids=[instance.user_id], team_ids=[instance.team_id])
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+@maintenance
+def index_members_add(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != 'post_add':
+        return
+
+    if reverse:
+        visibility.grant(user_ids=[instance.pk], team_ids=pk_set)
+    else:
+        visibility.grant(user_ids=pk_set, team_ids=[instance.pk])
+
+
+# Búsqueda de texto completo
+
+@receiver(post_save, sender=Task)
+@maintenance
+def index_task_search(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if created or previous is None or (previous['title'], previous['description']) != (
+        instance.title, instance.description
+    ):
+        search.refresh_search_vectors([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@maintenance
+def index_comment_search(sender, instance, **kwargs):
+    search.refresh_search_vectors([instance.task_id])
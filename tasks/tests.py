@@ -1,7 +1,18 @@
+import json
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from accounts.models import User
-from teams.models import Team
-from tasks.models import Task
+from teams.models import Team, TeamMembership
+from notifications.models import EmailOutbox, Notification, TaskNotificationTracker
+from notifications.unread import get_unread_count
+from tasks import counters, visibility
+from tasks.models import Comment, Counter, Task, TaskVisibility
+from tasks.search import search_tasks
+from tasks.views import DashboardView
 
 # Crear tarea.
 class TaskModelTest(TestCase):
@@ -53,3 +64,556 @@ class TaskIntegrationTest(TestCase):
 
         high_tasks = Task.objects.filter(priority="high")
         self.assertEqual(high_tasks.count(), 1)
+
+
+#Datos comunes para las pruebas del dashboard
+class DashboardTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email="admin@test.com", name="Admin", password="123456", role="admin"
+        )
+        self.user = User.objects.create_user(
+            email="user@test.com", name="User", password="123456", role="user"
+        )
+        self.team = Team.objects.create(name="Kanban Team", created_by=self.admin)
+        self.team.members.add(self.user)
+        self.other_team = Team.objects.create(name="Other Team", created_by=self.admin)
+
+    def create_tasks(self, count):
+        statuses = [status for status, _ in Task.STATUS_CHOICES]
+        for i in range(count):
+            task = Task.objects.create(
+                team=self.team if i % 2 else self.other_team,
+                title=f"Task {i}",
+                status=statuses[i % len(statuses)],
+                created_by=self.admin,
+            )
+            task.assigned_to.add(self.user)
+
+    def count_dashboard_queries(self, user):
+        self.client.force_login(user)
+        # El badge de la navbar se cuenta una vez y luego sale de la caché
+        get_unread_count(user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+
+#Dashboard con número de consultas constante
+class DashboardQueryCountTest(DashboardTestMixin, TestCase):
+
+    def test_query_count_independent_of_task_count(self):
+        for user in (self.user, self.admin):
+            self.create_tasks(4)
+            few_queries, _ = self.count_dashboard_queries(user)
+            self.create_tasks(40)
+            many_queries, _ = self.count_dashboard_queries(user)
+            self.assertEqual(few_queries, many_queries)
+
+    def test_columns_and_counts(self):
+        self.create_tasks(8)
+        Task.objects.create(team=self.team, title="Unassigned", status="to_do", created_by=self.admin)
+        Task.objects.create(team=self.other_team, title="Hidden", status="to_do", created_by=self.admin)
+
+        _, response = self.count_dashboard_queries(self.user)
+
+        self.assertEqual(response.context['to_do_count'], 3)
+        self.assertEqual(len(response.context['to_do_tasks']), 3)
+        self.assertEqual(response.context['in_progress_count'], 2)
+        self.assertEqual(response.context['done_count'], 2)
+        self.assertEqual(response.context['my_tasks_count'], 8)
+        self.assertEqual(len(response.context['my_tasks']), 5)
+
+
+#Caché del dashboard por usuario
+class DashboardCacheTest(DashboardTestMixin, TestCase):
+
+    def test_second_load_is_served_from_cache(self):
+        self.create_tasks(4)
+        first_queries, _ = self.count_dashboard_queries(self.user)
+        second_queries, response = self.count_dashboard_queries(self.user)
+
+        self.assertLess(second_queries, first_queries)
+        self.assertEqual(response.context['my_tasks_count'], 4)
+
+    def test_task_change_invalidates_affected_users_only(self):
+        outsider = User.objects.create_user(
+            email="outsider@test.com", name="Outsider", password="123456", role="user"
+        )
+        self.create_tasks(4)
+        self.count_dashboard_queries(self.user)
+        cached_outsider_queries, _ = self.count_dashboard_queries(outsider)
+
+        task = Task.objects.filter(team=self.team).first()
+        task.status = 'done'
+        task.save()
+
+        _, response = self.count_dashboard_queries(self.user)
+        self.assertIn(task, response.context['done_tasks'])
+        outsider_queries, _ = self.count_dashboard_queries(outsider)
+        self.assertLess(outsider_queries, cached_outsider_queries)
+
+    def test_assignment_change_invalidates_whole_team(self):
+        teammate = User.objects.create_user(
+            email="teammate@test.com", name="Teammate", password="123456", role="user"
+        )
+        self.team.members.add(teammate)
+        task = Task.objects.create(team=self.team, title="Team task", created_by=self.admin)
+        self.count_dashboard_queries(teammate)
+
+        # Asignar a otro cambia la tarjeta que ven todos los miembros del equipo
+        task.assigned_to.add(self.user)
+        _, response = self.count_dashboard_queries(teammate)
+        card = next(card for card in response.context['to_do_tasks'] if card.pk == task.pk)
+        self.assertEqual([user.pk for user in card.assigned_to.all()], [self.user.pk])
+
+        self.user.assigned_tasks.remove(task)
+        _, response = self.count_dashboard_queries(teammate)
+        card = next(card for card in response.context['to_do_tasks'] if card.pk == task.pk)
+        self.assertEqual(list(card.assigned_to.all()), [])
+
+    def test_membership_change_invalidates_user(self):
+        Task.objects.create(team=self.other_team, title="Other", created_by=self.admin)
+        _, response = self.count_dashboard_queries(self.user)
+        self.assertEqual(response.context['to_do_count'], 0)
+
+        self.other_team.members.add(self.user)
+
+        _, response = self.count_dashboard_queries(self.user)
+        self.assertEqual(response.context['to_do_count'], 1)
+        self.assertEqual(len(response.context['my_teams']), 2)
+
+
+#Paginación por cursor de columnas y Mis Tareas
+class KeysetPaginationTest(DashboardTestMixin, TestCase):
+
+    def test_column_endpoint_returns_next_slice(self):
+        self.create_tasks(4 * DashboardView.column_size + 8)
+        _, response = self.count_dashboard_queries(self.user)
+        first_page = response.context['to_do_tasks']
+        self.assertEqual(len(first_page), DashboardView.column_size)
+        self.assertTrue(first_page.has_next)
+
+        response = self.client.get(
+            reverse('dashboard-column', args=['to_do']), {'cursor': first_page.next_cursor}
+        )
+        data = response.json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(data['html'].count('class="task-card"'), 2)
+        for task in first_page:
+            self.assertNotIn(str(task.uuid), data['html'])
+
+    def test_dashboard_columns_use_a_limit_per_status(self):
+        # Cada columna se corta con su propio LIMIT en el índice, sin numerar todas las filas
+        self.create_tasks(4 * DashboardView.column_size + 8)
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        sql = next(query['sql'] for query in queries.captured_queries if 'UNION ALL' in query['sql'])
+        self.assertEqual(sql.count(f'LIMIT {DashboardView.column_size + 1}'), len(Task.STATUS_CHOICES))
+        self.assertNotIn('ROW_NUMBER', sql)
+        self.assertNotIn('OVER', sql)
+        self.assertEqual(len(response.context['to_do_tasks']), DashboardView.column_size)
+
+    def test_column_endpoint_rejects_bad_input(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard-column', args=['archived']))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('dashboard-column', args=['to_do']), {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_keeps_microseconds(self):
+        # Tareas creadas dentro del mismo milisegundo no se saltean en el borde de una página
+        self.create_tasks(25)
+        base = Task.objects.earliest('pk').created_at
+        for offset, pk in enumerate(Task.objects.order_by('pk').values_list('pk', flat=True)):
+            Task.objects.filter(pk=pk).update(created_at=base.replace(microsecond=offset))
+        self.client.force_login(self.user)
+
+        seen = []
+        params = {}
+        while True:
+            page = self.client.get(reverse('my-tasks'), params).context['page']
+            seen.extend(task.pk for task in page)
+            if not page.has_next:
+                break
+            params = {'cursor': page.next_cursor}
+
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_my_tasks_walks_every_task_once(self):
+        self.create_tasks(25)
+        self.client.force_login(self.user)
+
+        seen = []
+        params = {}
+        while True:
+            response = self.client.get(reverse('my-tasks'), params)
+            page = response.context['page']
+            seen.extend(task.pk for task in page)
+            if not page.has_next:
+                break
+            params = {'cursor': page.next_cursor}
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+
+#Contadores desnormalizados
+class CounterTest(DashboardTestMixin, TestCase):
+
+    def snapshot(self):
+        return {
+            (counter.scope, counter.object_id, counter.status): counter.value
+            for counter in Counter.objects.exclude(value=0)
+        }
+
+    def assert_counters_match_rebuild(self):
+        maintained = self.snapshot()
+        counters.rebuild()
+        self.assertEqual(maintained, self.snapshot())
+
+    def test_counters_follow_task_changes(self):
+        self.create_tasks(6)
+        task = Task.objects.filter(team=self.team).first()
+        task.status = 'review'
+        task.team = self.other_team
+        task.save()
+        task.assigned_to.remove(self.user, self.admin)
+        self.admin.assigned_tasks.add(task)
+        Task.objects.filter(team=self.other_team).last().delete()
+        self.assert_counters_match_rebuild()
+
+    def test_counters_follow_membership_changes(self):
+        lead = User.objects.create_user(email="lead@test.com", name="Lead", password="123456", role="team_lead")
+        TeamMembership.objects.create(team=self.team, user=lead)
+        self.other_team.members.add(self.user, lead)
+        self.other_team.members.remove(lead)
+        self.assert_counters_match_rebuild()
+
+        self.other_team.delete()
+        self.assertFalse(Counter.objects.filter(object_id=self.other_team.pk, scope=Counter.TEAM_MEMBERS).exists())
+        self.assert_counters_match_rebuild()
+
+    def test_views_read_counters(self):
+        self.create_tasks(5)
+        _, response = self.count_dashboard_queries(self.user)
+        self.assertEqual(response.context['my_tasks_count'], 5)
+        self.assertEqual(response.context['my_teams'][0].member_count, 1)
+
+        response = self.client.get(reverse('my-tasks'))
+        self.assertEqual(response.context['to_do_tasks'], 2)
+        self.assertEqual(response.context['total_tasks'], 5)
+
+        response = self.client.get(reverse('team-list'))
+        self.assertEqual(response.context['teams'][0].member_count, 1)
+
+
+#Índice de visibilidad de tareas
+class TaskVisibilityTest(DashboardTestMixin, TestCase):
+
+    def assert_index_matches_rules(self, *users):
+        for user in users:
+            indexed = set(Task.objects.visible_to(user).values_list('pk', flat=True))
+            expected = set(Task.objects.visible_to_by_membership(user).values_list('pk', flat=True))
+            self.assertEqual(indexed, expected)
+
+    def test_index_follows_assignments_and_memberships(self):
+        self.create_tasks(6)
+        outsider = User.objects.create_user(email="out@test.com", name="Out", password="123456", role="user")
+        task = Task.objects.filter(team=self.other_team).first()
+        task.assigned_to.add(outsider)
+        self.assert_index_matches_rules(self.user, outsider)
+
+        task.assigned_to.remove(self.user)
+        outsider.assigned_tasks.clear()
+        self.other_team.members.add(outsider)
+        self.assert_index_matches_rules(self.user, outsider)
+
+        TeamMembership.objects.filter(team=self.team, user=self.user).delete()
+        task.team = self.team
+        task.save()
+        self.assert_index_matches_rules(self.user, outsider)
+
+        self.team.delete()
+        self.assert_index_matches_rules(self.user, outsider)
+
+    def test_rebuild_matches_maintained_index(self):
+        self.create_tasks(6)
+        self.other_team.members.add(self.admin)
+        maintained = set(TaskVisibility.objects.values_list('user_id', 'task_id'))
+        visibility.rebuild()
+        self.assertEqual(maintained, set(TaskVisibility.objects.values_list('user_id', 'task_id')))
+
+
+#Orden por rango entero de prioridad
+class TaskRankTest(DashboardTestMixin, TestCase):
+
+    def test_priority_sorts_by_rank(self):
+        for priority in ['medium', 'urgent', 'low', 'high']:
+            Task.objects.create(team=self.team, title=priority, priority=priority, created_by=self.admin)
+
+        titles = list(Task.objects.values_list('title', flat=True))
+        self.assertEqual(titles, ['urgent', 'high', 'medium', 'low'])
+
+        _, response = self.count_dashboard_queries(self.user)
+        self.assertEqual([task.title for task in response.context['to_do_tasks']], titles)
+
+    def test_ranks_follow_partial_saves(self):
+        task = Task.objects.create(team=self.team, title="Task", created_by=self.admin)
+        task.status = 'review'
+        task.priority = 'urgent'
+        task.save(update_fields=['status', 'priority'])
+
+        task.refresh_from_db()
+        self.assertEqual(task.status_rank, Task.STATUS_RANKS['review'])
+        self.assertEqual(task.priority_rank, Task.PRIORITY_RANKS['urgent'])
+
+    def test_my_tasks_sorts_by_status_then_priority(self):
+        for status, priority in [('done', 'urgent'), ('to_do', 'low'), ('review', 'high'), ('to_do', 'urgent')]:
+            task = Task.objects.create(
+                team=self.team, title=f"{status} {priority}", status=status, priority=priority, created_by=self.admin
+            )
+            task.assigned_to.add(self.user)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('my-tasks'))
+        self.assertEqual(
+            [task.title for task in response.context['tasks']],
+            ['to_do urgent', 'to_do low', 'review high', 'done urgent']
+        )
+
+
+#Búsqueda de texto completo
+class TaskSearchTest(DashboardTestMixin, TestCase):
+
+    def search(self, text):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('task-search'), {'q': text})
+        self.assertEqual(response.status_code, 200)
+        return [task.title for task in response.context['tasks']]
+
+    def test_ranks_title_above_description_and_comments(self):
+        in_comment = Task.objects.create(team=self.team, title="Revisar pagos", created_by=self.admin)
+        Comment.objects.create(task=in_comment, user=self.admin, content="Falla el despliegue")
+        Task.objects.create(
+            team=self.team, title="Actualizar servidor", description="Antes del despliegue", created_by=self.admin
+        )
+        Task.objects.create(team=self.team, title="Despliegue en producción", created_by=self.admin)
+
+        self.assertEqual(
+            self.search("despliegue"),
+            ["Despliegue en producción", "Actualizar servidor", "Revisar pagos"],
+        )
+
+    def test_respects_visibility_and_fuzzy_titles(self):
+        Task.objects.create(team=self.team, title="Migrar base de datos", created_by=self.admin)
+        Task.objects.create(team=self.other_team, title="Migrar base de datos oculta", created_by=self.admin)
+
+        self.assertEqual(self.search("migrar"), ["Migrar base de datos"])
+        self.assertEqual(self.search("Migrar bse de dtos"), ["Migrar base de datos"])
+
+    def test_comment_changes_update_index(self):
+        task = Task.objects.create(team=self.team, title="Tarea", created_by=self.admin)
+        comment = Comment.objects.create(task=task, user=self.admin, content="kubernetes")
+        self.assertEqual(self.search("kubernetes"), ["Tarea"])
+
+        comment.delete()
+        self.assertEqual(self.search("kubernetes"), [])
+
+
+#API JSON de operaciones masivas
+class BulkApiTest(DashboardTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.lead = User.objects.create_user(
+            email="lead@test.com", name="Lead", password="123456", role="team_lead"
+        )
+        self.team.team_lead = self.lead
+        self.team.save()
+
+    def post(self, name, payload, user=None):
+        self.client.force_login(user or self.lead)
+        return self.client.post(reverse(name), data=json.dumps(payload), content_type='application/json')
+
+    def assert_derived_data_consistent(self):
+        maintained = {
+            (counter.scope, counter.object_id, counter.status): counter.value
+            for counter in Counter.objects.exclude(value=0)
+        }
+        indexed = set(TaskVisibility.objects.values_list('user_id', 'task_id'))
+        counters.rebuild()
+        visibility.rebuild()
+        self.assertEqual(maintained, {
+            (counter.scope, counter.object_id, counter.status): counter.value
+            for counter in Counter.objects.exclude(value=0)
+        })
+        self.assertEqual(indexed, set(TaskVisibility.objects.values_list('user_id', 'task_id')))
+
+    def test_bulk_create_is_set_based(self):
+        items = [
+            {'title': f'Bulk {i}', 'team': self.team.pk, 'priority': 'urgent', 'assigned_to': [self.user.pk]}
+            for i in range(30)
+        ]
+        # La primera petición crea las filas de contadores; las siguientes solo las actualizan
+        self.post('api-bulk-create', {'tasks': items[:1]})
+        with CaptureQueriesContext(connection) as few:
+            response = self.post('api-bulk-create', {'tasks': items[:2]})
+        self.assertEqual(response.status_code, 201)
+        with CaptureQueriesContext(connection) as many:
+            response = self.post('api-bulk-create', {'tasks': items})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(few), len(many))
+
+        self.assertEqual(len(response.json()['created']), 30)
+        self.assertEqual(Task.objects.filter(priority_rank=Task.PRIORITY_RANKS['urgent']).count(), 33)
+        # Los correos quedan en el outbox; la petición no envía nada por SMTP
+        self.assertEqual(EmailOutbox.objects.filter(notification__user=self.user, status='pending').count(), 33)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(TaskNotificationTracker.objects.filter(created_notification_sent=True).count(), 33)
+        self.assertEqual(search_tasks(Task.objects.all(), 'Bulk').count(), 33)
+        self.assert_derived_data_consistent()
+
+    def test_bulk_create_validates_whole_batch(self):
+        response = self.post('api-bulk-create', {'tasks': [
+            {'title': 'Ok', 'team': self.team.pk},
+            {'title': '', 'team': self.team.pk, 'priority': 'huge'},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']['1']), {'title', 'priority'})
+
+        response = self.post('api-bulk-create', {'tasks': [
+            {'title': 'Ok', 'team': self.team.pk},
+            {'title': 'Ajeno', 'team': self.other_team.pk},
+        ]})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Task.objects.exists())
+
+        response = self.post('api-bulk-create', {'tasks': [{'title': 'Ok', 'team': self.team.pk}]}, self.user)
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_status_reassign_and_delete(self):
+        self.create_tasks(8)
+        own = list(Task.objects.filter(team=self.team).values_list('uuid', flat=True))
+        uuids = [str(value) for value in own]
+
+        response = self.post('api-bulk-status', {'tasks': uuids, 'status': 'done'})
+        self.assertEqual(response.json(), {'updated': 2})
+        self.assertFalse(Task.objects.filter(team=self.team).exclude(status='done').exists())
+        self.assertTrue(Task.objects.filter(team=self.team, status_rank=Task.STATUS_RANKS['done']).exists())
+        self.assert_derived_data_consistent()
+
+        response = self.post('api-bulk-reassign', {'tasks': uuids, 'assigned_to': [self.lead.pk]})
+        self.assertEqual(response.status_code, 403)
+        self.team.members.add(self.lead)
+        response = self.post('api-bulk-reassign', {'tasks': uuids, 'assigned_to': [self.lead.pk]})
+        self.assertEqual(response.json(), {'updated': 4, 'assigned': 4})
+        self.assertEqual(set(Task.objects.filter(team=self.team).values_list('assigned_to', flat=True)), {self.lead.pk})
+        self.assertEqual(Notification.objects.filter(user=self.lead).count(), 4)
+        self.assert_derived_data_consistent()
+
+        response = self.post('api-bulk-delete', {'tasks': uuids})
+        self.assertEqual(response.json(), {'deleted': 4})
+        self.assertEqual(Task.objects.count(), 4)
+        self.assert_derived_data_consistent()
+
+    def test_bulk_reassign_checks_each_task_team(self):
+        self.create_tasks(4)
+        uuids = [str(value) for value in Task.objects.values_list('uuid', flat=True)]
+
+        # El usuario es miembro de uno de los dos equipos: no se reasigna ninguna tarea
+        response = self.post('api-bulk-reassign', {'tasks': uuids, 'assigned_to': [self.user.pk]}, self.admin)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['users'], [self.user.pk])
+        self.assertEqual(response.json()['teams'], {str(self.other_team.pk): [self.user.pk]})
+        self.assertEqual(Task.assigned_to.through.objects.count(), 4)
+
+        self.other_team.members.add(self.user)
+        response = self.post('api-bulk-reassign', {'tasks': uuids, 'assigned_to': [self.user.pk]}, self.admin)
+        self.assertEqual(response.json(), {'updated': 4, 'assigned': 0})
+
+        # true no es el id 1
+        response = self.post('api-bulk-reassign', {'tasks': uuids, 'assigned_to': [True]}, self.admin)
+        self.assertEqual(response.status_code, 400)
+
+    def test_permissions_apply_to_every_task(self):
+        self.create_tasks(4)
+        uuids = [str(value) for value in Task.objects.values_list('uuid', flat=True)]
+
+        # El líder no administra las tareas del otro equipo: no se aplica nada
+        response = self.post('api-bulk-delete', {'tasks': uuids})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(len(response.json()['tasks']), 2)
+        self.assertEqual(Task.objects.count(), 4)
+
+        # Un usuario asignado puede cambiar el estado, pero no eliminar
+        response = self.post('api-bulk-status', {'tasks': uuids, 'status': 'review'}, self.user)
+        self.assertEqual(response.status_code, 200)
+        response = self.post('api-bulk-delete', {'tasks': uuids}, self.user)
+        self.assertEqual(response.status_code, 403)
+
+        response = self.post('api-bulk-delete', {'tasks': ['no-es-uuid']})
+        self.assertEqual(response.status_code, 400)
+        self.client.logout()
+        response = self.client.post(reverse('api-bulk-delete'), data='{}', content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+
+#Mover tarjetas del Kanban
+class MoveTaskTest(DashboardTestMixin, TestCase):
+
+    def move(self, task, status, from_status, user=None):
+        self.client.force_login(user or self.user)
+        return self.client.post(
+            reverse('task-move', args=[task.uuid]), {'status': status, 'from': from_status}
+        )
+
+    def test_move_uses_single_update_and_returns_card(self):
+        self.create_tasks(4)
+        task = Task.objects.get(title="Task 1")
+        self.count_dashboard_queries(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(task, 'done', 'in_progress')
+        self.assertEqual(response.status_code, 200)
+        task_writes = [query for query in queries if query['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(task_writes), 1)
+        data = response.json()
+        self.assertIn(str(task.uuid), data['html'])
+        self.assertEqual(data['counts']['done_count'], 2)
+        self.assertEqual(data['counts']['in_progress_count'], 0)
+
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.status_rank), ('done', Task.STATUS_RANKS['done']))
+        _, response = self.count_dashboard_queries(self.user)
+        self.assertEqual(response.context['done_count'], 2)
+
+        maintained = set(Counter.objects.exclude(value=0).values_list('scope', 'object_id', 'status', 'value'))
+        counters.rebuild()
+        self.assertEqual(maintained, set(Counter.objects.exclude(value=0).values_list('scope', 'object_id', 'status', 'value')))
+
+    def test_move_rejects_stale_and_unauthorized_moves(self):
+        self.create_tasks(2)
+        task = Task.objects.get(title="Task 1")
+
+        response = self.move(task, 'review', 'to_do')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'in_progress')
+
+        outsider = User.objects.create_user(email="out@test.com", name="Out", password="123456", role="user")
+        self.team.members.add(outsider)
+        response = self.move(task, 'review', 'in_progress', outsider)
+        self.assertEqual(response.status_code, 403)
+
+        other = Task.objects.get(title="Task 0")
+        other.assigned_to.clear()
+        response = self.move(other, 'review', 'to_do', outsider)
+        self.assertEqual(response.status_code, 404)
+
+        response = self.move(task, 'review', 'in_progress', self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.move(task, 'nope', 'review').status_code, 400)
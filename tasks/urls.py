@@ -1,12 +1,19 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.DashboardView.as_view(), name='dashboard'),
+    path('columna/<str:status>/', views.dashboard_column, name='dashboard-column'),
     path('mis-tareas/', views.MyTasksView.as_view(), name='my-tasks'),
+    path('buscar/', views.TaskSearchView.as_view(), name='task-search'),
     path('task/new/', views.TaskCreateView.as_view(), name='task-create'),
     path('task/<uuid:uuid>/', views.TaskDetailView.as_view(), name='task-detail'),
     path('task/<uuid:uuid>/edit/', views.TaskUpdateView.as_view(), name='task-update'),
     path('task/<uuid:uuid>/delete/', views.TaskDeleteView.as_view(), name='task-delete'),
     path('task/<uuid:uuid>/update-status/', views.update_task_status, name='update-task-status'),
+    path('task/<uuid:uuid>/move/', views.move_task, name='task-move'),
+    path('api/tasks/bulk-create/', api.bulk_create_tasks, name='api-bulk-create'),
+    path('api/tasks/bulk-status/', api.bulk_update_status, name='api-bulk-status'),
+    path('api/tasks/bulk-reassign/', api.bulk_reassign, name='api-bulk-reassign'),
+    path('api/tasks/bulk-delete/', api.bulk_delete_tasks, name='api-bulk-delete'),
 ]
\ No newline at end of file
@@ -4,12 +4,21 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.shortcuts import redirect, get_object_or_404, render
 from django.contrib import messages
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_POST
 from accounts.permissions import team_lead_required, user_required, is_team_lead_of
-from accounts.models import User
-from teams.models import Team
+from accounts.user_search import assignable_users
+from teams.models import Team, TeamMembership
 from notifications.services import notify_task_created
-from .models import Task, Comment
+from . import bulk
+from .dashboard_cache import get_dashboard_context
+from .counters import member_count_annotation, status_counts
+from .models import Counter, Task, Comment
+from .pagination import InvalidCursor, keyset_paginate, page_from_rows
+from .search import search_tasks
 
 
 class DashboardView(LoginRequiredMixin, ListView):
@@ -17,49 +26,84 @@ class DashboardView(LoginRequiredMixin, ListView):
     template_name = 'tasks/dashboard.html'
     context_object_name = 'tasks'
     paginate_by = None
+    # Cada columna del Kanban se pagina por cursor sobre este ordenamiento
+    column_size = 20
+    column_ordering = ('-priority_rank', '-created_at', '-id')
     
     def get_queryset(self):
-        user = self.request.user
+        return Task.objects.visible_to(self.request.user).select_related(
+            'team', 'created_by'
+        ).prefetch_related('assigned_to')
+    
+    def get_stats(self, user):
+        """Lee los contadores del tablero de la tabla de contadores desnormalizados"""
         if user.role == 'admin':
-            return Task.objects.all().select_related('team', 'created_by').prefetch_related('assigned_to').distinct()
+            # Los equipos eliminados conservan sus contadores hasta que se purgan
+            counts = status_counts(Counter.TEAM_STATUS, Team.objects.values('pk'))
         else:
-            return Task.objects.filter(
-                Q(assigned_to=user) | Q(team__members=user)
-            ).select_related('team', 'created_by').prefetch_related('assigned_to').distinct()
+            # Tareas de sus equipos más las asignadas en equipos de los que no es miembro
+            member_team_ids = TeamMembership.objects.filter(user=user, team__deleted_at__isnull=True).values('team_id')
+            counts = status_counts(Counter.TEAM_STATUS, member_team_ids)
+            outside_teams = Task.objects.active().filter(assigned_to=user).exclude(
+                team_id__in=member_team_ids
+            ).order_by().values('status').annotate(total=Count('pk'))
+            for row in outside_teams:
+                counts[row['status']] += row['total']
+        
+        stats = {f'{status}_count': total for status, total in counts.items()}
+        stats['my_tasks_count'] = sum(status_counts(Counter.USER_STATUS, [user.pk]).values())
+        return stats
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        user = self.request.user
+    def get_columns(self):
+        """Primera página de cada columna: una consulta con LIMIT por estado, unidas con UNION ALL.
+
+        Cada rama recorre ``task_status_rank_idx`` y se detiene tras ``column_size + 1`` filas,
+        sin importar cuántas tareas tenga la columna.
+        """
+        queryset = self.get_queryset().order_by(*self.column_ordering)
+        first, *rest = [
+            queryset.filter(status=status)[:self.column_size + 1] for status, _ in Task.STATUS_CHOICES
+        ]
         
-        # Obtener todas las tareas
-        all_tasks = self.get_queryset()
+        columns = {status: [] for status, _ in Task.STATUS_CHOICES}
+        for task in first.union(*rest, all=True):
+            columns[task.status].append(task)
+        return {
+            status: page_from_rows(tasks, self.column_ordering, self.column_size)
+            for status, tasks in columns.items()
+        }
+    
+    def build_dashboard_context(self, user):
+        """Construye los datos del tablero; el resultado se guarda en la caché del usuario"""
+        dashboard = {}
         
-        # Separar por estado para el Kanban board
-        context['to_do_tasks'] = all_tasks.filter(status='to_do')
-        context['in_progress_tasks'] = all_tasks.filter(status='in_progress')
-        context['review_tasks'] = all_tasks.filter(status='review')
-        context['done_tasks'] = all_tasks.filter(status='done')
+        # Separar por estado para el Kanban board, solo la primera página de cada columna
+        for status, page in self.get_columns().items():
+            dashboard[f'{status}_tasks'] = page
         
         # Contadores para las estadísticas
-        context['to_do_count'] = context['to_do_tasks'].count()
-        context['in_progress_count'] = context['in_progress_tasks'].count()
-        context['review_count'] = context['review_tasks'].count()
-        context['done_count'] = context['done_tasks'].count()
+        dashboard.update(self.get_stats(user))
         
         # Tareas asignadas al usuario actual (mis tareas)
-        context['my_tasks'] = all_tasks.filter(assigned_to=user).order_by('-created_at')[:5]
-        context['my_tasks_count'] = all_tasks.filter(assigned_to=user).count()
+        dashboard['my_tasks'] = list(
+            Task.objects.active().filter(assigned_to=user).select_related('team').order_by('-created_at', '-id')[:5]
+        )
         
         # Equipos del usuario
         if user.role == 'admin':
-            context['my_teams'] = Team.objects.all().prefetch_related('members').order_by('name')
+            my_teams = Team.objects.all()
         elif user.role == 'team_lead':
-            context['my_teams'] = Team.objects.filter(
-                Q(team_lead=user) | Q(members=user)
-            ).prefetch_related('members').order_by('name')
+            my_teams = Team.objects.filter(Q(team_lead=user) | Q(members=user)).distinct()
         else:
-            context['my_teams'] = Team.objects.filter(members=user).prefetch_related('members').order_by('name')
+            my_teams = Team.objects.filter(members=user)
+        dashboard['my_teams'] = list(my_teams.annotate(member_count=member_count_annotation()).order_by('name'))
         
+        return dashboard
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user = self.request.user
+        context.update(get_dashboard_context(user, lambda: self.build_dashboard_context(user)))
         return context
 
 
@@ -91,10 +135,10 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         form.instance.created_by = self.request.user
         response = super().form_valid(form)
         
-        # Asignar usuarios a la tarea desde el POST
+        # Asignar usuarios a la tarea desde el POST; el autocompletado no acota lo que llega
         assigned_user_ids = self.request.POST.getlist('assigned_to')
         if assigned_user_ids:
-            assigned_users = User.objects.filter(id__in=assigned_user_ids)
+            assigned_users = assignable_users(self.request.user).filter(id__in=assigned_user_ids)
             self.object.assigned_to.set(assigned_users)
             
             # Enviar notificaciones
@@ -103,24 +147,11 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         messages.success(self.request, 'Tarea creada exitosamente.')
         return response
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        # Obtener usuarios disponibles según el equipo
-        user = self.request.user
-        if user.role == 'admin':
-            context['available_users'] = User.objects.filter(is_active=True)
-        elif user.role == 'team_lead':
-            # Usuarios de los equipos del líder
-            team_ids = Team.objects.filter(team_lead=user).values_list('id', flat=True)
-            context['available_users'] = User.objects.filter(
-                teams__id__in=team_ids
-            ).distinct()
-        
-        return context
 
 
 class TaskDetailView(LoginRequiredMixin, DetailView):
     model = Task
+    queryset = Task.objects.active()
     template_name = 'tasks/task_detail.html'
     context_object_name = 'task'
     slug_field = 'uuid'
@@ -131,7 +162,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
         context['comments'] = self.object.comments.all()
         context['can_edit'] = (
             self.request.user.role in ['admin', 'team_lead'] and
-            (self.request.user.role == 'admin' or is_team_lead_of(self.request.user, self.object.team))
+            (self.request.user.role == 'admin' or is_team_lead_of(self.request.user, self.object.team_id))
         )
         context['can_change_status'] = self.object.assigned_to.filter(id=self.request.user.id).exists()
         return context
@@ -139,6 +170,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
 
 class TaskUpdateView(LoginRequiredMixin, UpdateView):
     model = Task
+    queryset = Task.objects.active()
     template_name = 'tasks/task_form.html'
     fields = ['title', 'description', 'team', 'priority', 'due_date', 'status']
     success_url = reverse_lazy('dashboard')
@@ -150,19 +182,19 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
         user = request.user
         
         # Solo team leads del equipo o admins pueden editar
-        if user.role == 'admin' or (user.role == 'team_lead' and is_team_lead_of(user, task.team)):
+        if user.role == 'admin' or (user.role == 'team_lead' and is_team_lead_of(user, task.team_id)):
             return super().dispatch(request, *args, **kwargs)
         else:
             messages.error(request, 'No tienes permisos para editar esta tarea.')
-            return redirect('task-detail', pk=task.pk)
+            return redirect('task-detail', uuid=task.uuid)
     
     def form_valid(self, form):
         response = super().form_valid(form)
         
-        # Actualizar usuarios asignados
+        # Actualizar usuarios asignados; solo se aceptan miembros del equipo de la tarea
         assigned_user_ids = self.request.POST.getlist('assigned_to')
         if assigned_user_ids:
-            assigned_users = User.objects.filter(id__in=assigned_user_ids)
+            assigned_users = assignable_users(self.request.user, self.object.team_id).filter(id__in=assigned_user_ids)
             self.object.assigned_to.set(assigned_users)
         
         messages.success(self.request, 'Tarea actualizada exitosamente.')
@@ -170,13 +202,13 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['available_users'] = self.object.team.members.all()
         context['assigned_users'] = self.object.assigned_to.all()
         return context
 
 
 class TaskDeleteView(LoginRequiredMixin, DeleteView):
     model = Task
+    queryset = Task.objects.active()
     template_name = 'tasks/task_confirm_delete.html'
     success_url = reverse_lazy('dashboard')
     slug_field = 'uuid'
@@ -187,7 +219,7 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
         user = request.user
         
         # Solo team leads del equipo o admins pueden eliminar
-        if user.role == 'admin' or (user.role == 'team_lead' and is_team_lead_of(user, task.team)):
+        if user.role == 'admin' or (user.role == 'team_lead' and is_team_lead_of(user, task.team_id)):
             return super().dispatch(request, *args, **kwargs)
         else:
             messages.error(request, 'No tienes permisos para eliminar esta tarea.')
@@ -198,31 +230,120 @@ class MyTasksView(LoginRequiredMixin, ListView):
     model = Task
     template_name = 'tasks/my_tasks.html'
     context_object_name = 'tasks'
-    paginate_by = 10
+    page_size = 10
+    # Por estado en el orden del flujo y, dentro de cada estado, por prioridad
+    ordering = ('status_rank', '-priority_rank', '-created_at', '-id')
     
     def get_queryset(self):
-        return Task.objects.filter(
+        return Task.objects.active().filter(
             assigned_to=self.request.user
-        ).select_related('team', 'created_by').prefetch_related('assigned_to').order_by('-created_at')
+        ).select_related('team', 'created_by').prefetch_related('assigned_to')
+    
+    def get(self, request, *args, **kwargs):
+        # Paginación por cursor: el costo de cada página no depende de su posición
+        try:
+            self.page = keyset_paginate(
+                self.get_queryset(), self.ordering, request.GET.get('cursor'), self.page_size
+            )
+        except InvalidCursor:
+            return redirect('my-tasks')
+        self.object_list = self.page.items
+        return self.render_to_response(self.get_context_data())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.user
+        context['page'] = self.page
+        context['is_first_page'] = not self.request.GET.get('cursor')
         
-        all_tasks = self.get_queryset()
+        counts = status_counts(Counter.USER_STATUS, [self.request.user.pk])
+        for status, total in counts.items():
+            context[f'{status}_tasks'] = total
+        context['total_tasks'] = sum(counts.values())
         
-        context['to_do_tasks'] = all_tasks.filter(status='to_do').count()
-        context['in_progress_tasks'] = all_tasks.filter(status='in_progress').count()
-        context['review_tasks'] = all_tasks.filter(status='review').count()
-        context['done_tasks'] = all_tasks.filter(status='done').count()
+        return context
+
+
+class TaskSearchView(LoginRequiredMixin, ListView):
+    model = Task
+    template_name = 'tasks/search.html'
+    context_object_name = 'tasks'
+    paginate_by = 20
+    
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        if not self.query:
+            return Task.objects.none()
         
+        # Mismas reglas de visibilidad que el dashboard
+        tasks = Task.objects.visible_to(self.request.user).select_related('team')
+        return search_tasks(tasks, self.query)
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
         return context
 
 
+@user_required
+def dashboard_column(request, status):
+    """Devuelve la siguiente porción de tarjetas de una columna del Kanban"""
+    if status not in dict(Task.STATUS_CHOICES):
+        raise Http404('Estado inválido')
+    
+    tasks = Task.objects.visible_to(request.user).filter(status=status).select_related(
+        'team', 'created_by'
+    ).prefetch_related('assigned_to')
+    try:
+        page = keyset_paginate(
+            tasks, DashboardView.column_ordering, request.GET.get('cursor'), DashboardView.column_size
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Cursor inválido.'}, status=400)
+    
+    html = render_to_string('tasks/_task_cards.html', {'tasks': page.items}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': page.next_cursor})
+
+
+@require_POST
+@user_required
+def move_task(request, uuid):
+    """Mueve una tarjeta del Kanban a otra columna con un único UPDATE condicional"""
+    statuses = dict(Task.STATUS_CHOICES)
+    new_status = request.POST.get('status')
+    from_status = request.POST.get('from')
+    if new_status not in statuses or from_status not in statuses or new_status == from_status:
+        return JsonResponse({'error': 'Estado inválido.'}, status=400)
+    
+    # El permiso y el estado de origen se comprueban en el mismo UPDATE: si la tarea
+    # cambió mientras se arrastraba, no se pisa el cambio
+    user = request.user
+    tasks = Task.objects.active().filter(uuid=uuid, status=from_status)
+    if user.role != 'admin':
+        allowed = Exists(Task.assigned_to.through.objects.filter(task_id=OuterRef('pk'), user_id=user.pk))
+        if user.role == 'team_lead':
+            allowed = Q(allowed) | Q(team__team_lead=user)
+        tasks = tasks.filter(allowed)
+    
+    with transaction.atomic():
+        if not tasks.update(status=new_status, status_rank=Task.STATUS_RANKS[new_status]):
+            current = Task.objects.visible_to(user).filter(uuid=uuid).values_list('status', flat=True).first()
+            if current is None:
+                return JsonResponse({'error': 'Tarea no encontrada.'}, status=404)
+            if current != from_status:
+                return JsonResponse({'error': 'La tarea cambió de estado.', 'status': current}, status=409)
+            return JsonResponse({'error': 'No tienes permisos para actualizar esta tarea.'}, status=403)
+        
+        task = Task.objects.select_related('team', 'created_by').prefetch_related('assigned_to').get(uuid=uuid)
+        bulk.apply_status_change([task], {task.pk: from_status}, new_status)
+    
+    html = render_to_string('tasks/_task_cards.html', {'tasks': [task]}, request=request)
+    return JsonResponse({'html': html, 'status': new_status, 'counts': DashboardView().get_stats(user)})
+
+
 @user_required
 def update_task_status(request, uuid):
     """Vista para que usuarios cambien el estado de sus tareas asignadas"""
-    task = get_object_or_404(Task, uuid=uuid)
+    task = get_object_or_404(Task.objects.active(), uuid=uuid)
     
     # Verificar que el usuario esté asignado a la tarea
     if not task.assigned_to.filter(id=request.user.id).exists():
@@ -0,0 +1,63 @@
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from teams.models import TeamMembership
+from .models import Task, TaskVisibility
+
+
+def _in_clause(column, values):
+    values = list(values)
+    if not values:
+        return 'FALSE', []
+    return f"{column} IN ({', '.join(['%s'] * len(values))})", values
+
+
+def grant(user_ids=None, task_ids=None, team_ids=None):
+    """Agrega al índice los pares (usuario, tarea) visibles dentro de la restricción indicada"""
+    visibility = TaskVisibility._meta.db_table
+    task = Task._meta.db_table
+    assigned = Task.assigned_to.through._meta.db_table
+    membership = TeamMembership._meta.db_table
+
+    selects = []
+    params = []
+    for user_column, source in (
+        ('a.user_id', f'{assigned} a JOIN {task} t ON t.id = a.task_id'),
+        ('m.user_id', f'{membership} m JOIN {task} t ON t.team_id = m.team_id'),
+    ):
+        conditions = ['TRUE']
+        for column, values in ((user_column, user_ids), ('t.id', task_ids), ('t.team_id', team_ids)):
+            if values is not None:
+                condition, condition_params = _in_clause(column, values)
+                conditions.append(condition)
+                params.extend(condition_params)
+        selects.append(f"SELECT {user_column}, t.id FROM {source} WHERE {' AND '.join(conditions)}")
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {visibility} (user_id, task_id) {' UNION '.join(selects)} "
+            f"ON CONFLICT (user_id, task_id) DO NOTHING",
+            params,
+        )
+
+
+def revoke(user_ids=None, task_ids=None, team_ids=None):
+    """Quita del índice los pares dentro de la restricción que ya no tienen asignación ni membresía"""
+    rows = TaskVisibility.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    if task_ids is not None:
+        rows = rows.filter(task_id__in=task_ids)
+    if team_ids is not None:
+        rows = rows.filter(task__team_id__in=team_ids)
+
+    still_assigned = Task.assigned_to.through.objects.filter(task_id=OuterRef('task_id'), user_id=OuterRef('user_id'))
+    still_member = TeamMembership.objects.filter(team_id=OuterRef('task__team_id'), user_id=OuterRef('user_id'))
+    rows.exclude(Exists(still_assigned)).exclude(Exists(still_member)).delete()
+
+
+@transaction.atomic
+def rebuild():
+    """Recalcula el índice de visibilidad completo"""
+    TaskVisibility.objects.all().delete()
+    grant()
+    return TaskVisibility.objects.count()
@@ -0,0 +1,84 @@
+from collections import Counter as Tally, defaultdict
+from django.db import connection, transaction
+from django.utils import timezone
+from accounts.team_roles import invalidate_team_roles
+from tasks import counters, visibility
+from tasks.dashboard_cache import invalidate_dashboards, team_user_ids
+from tasks.models import Counter
+from .models import TeamMembership
+
+
+def insert_memberships(pairs):
+    """Inserta pares (equipo, usuario) con ON CONFLICT DO NOTHING y devuelve solo los creados.
+
+    Un único INSERT por llamada; las membresías existentes se omiten aunque otra
+    operación concurrente las haya creado entre medio.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return []
+
+    now = timezone.now()
+    params = []
+    for team_id, user_id in pairs:
+        params.extend([team_id, user_id, now])
+    placeholders = ', '.join(['(%s, %s, %s)'] * len(pairs))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {TeamMembership._meta.db_table} (team_id, user_id, joined_at) VALUES {placeholders} '
+            'ON CONFLICT (team_id, user_id) DO NOTHING RETURNING team_id, user_id',
+            params
+        )
+        return cursor.fetchall()
+
+
+def membership_changed(pairs, sign, dashboards=True):
+    """Mantiene en bloque los datos derivados de membresías agregadas (sign=1) o quitadas (sign=-1).
+
+    Con ``dashboards=False`` no invalida los dashboards; quien agrupa varios lotes lo hace una vez al final.
+    """
+    if not pairs:
+        return
+
+    users_by_team = defaultdict(set)
+    for team_id, user_id in pairs:
+        users_by_team[team_id].add(user_id)
+    user_ids = {user_id for _, user_id in pairs}
+
+    counters.adjust(Tally({(Counter.TEAM_MEMBERS, team_id, ''): sign * len(users) for team_id, users in users_by_team.items()}))
+    for team_id, users in users_by_team.items():
+        if sign > 0:
+            visibility.grant(user_ids=users, team_ids=[team_id])
+        else:
+            visibility.revoke(user_ids=users, team_ids=[team_id])
+    invalidate_team_roles(user_ids)
+    if dashboards:
+        # El usuario gana o pierde tareas visibles y el resto del equipo ve cambiar el contador de miembros
+        invalidate_dashboards(team_user_ids(*users_by_team) | user_ids)
+
+
+@transaction.atomic
+def add_members(team, user_ids):
+    """Agrega los usuarios al equipo en un solo INSERT; devuelve (agregados, ya eran miembros)"""
+    user_ids = set(user_ids)
+    created = insert_memberships((team.pk, user_id) for user_id in user_ids)
+    membership_changed(created, 1)
+    return len(created), len(user_ids) - len(created)
+
+
+@transaction.atomic
+def remove_members(team, user_ids):
+    """Quita los usuarios del equipo en un solo DELETE, nunca al líder; devuelve cuántos se quitaron"""
+    user_ids = set(user_ids) - {team.team_lead_id}
+    if not user_ids:
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TeamMembership._meta.db_table} WHERE team_id = %s AND user_id = ANY(%s) '
+            'RETURNING team_id, user_id',
+            [team.pk, list(user_ids)]
+        )
+        removed = cursor.fetchall()
+    membership_changed(removed, -1)
+    return len(removed)
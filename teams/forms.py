@@ -0,0 +1,16 @@
+from django import forms
+from crispy_forms.helper import FormHelper
+from .models import Team
+
+
+class MemberImportForm(forms.Form):
+    file = forms.FileField(label='Archivo CSV o JSON', help_text='CSV con columnas email, name y team (id del equipo), o una lista JSON con las mismas claves')
+    team = forms.ModelChoiceField(
+        queryset=Team.objects.order_by('name'), required=False, label='Equipo por defecto',
+        help_text='Se usa en las filas sin equipo'
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.helper = FormHelper()
+        self.helper.form_tag = False
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from collections import Counter as Tally
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from accounts.models import User
+from tasks.dashboard_cache import invalidate_dashboards, team_user_ids
+from .bulk import insert_memberships, membership_changed
+from .models import Team
+
+
+class MembershipImportError(ValueError):
+    pass
+
+
+def read_rows(content, fmt):
+    """Filas {email, name, team} de un CSV con encabezado o de una lista JSON de objetos"""
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError as exc:
+            raise MembershipImportError('El archivo debe estar en UTF-8.') from exc
+
+    if fmt == 'json':
+        try:
+            rows = json.loads(content)
+        except json.JSONDecodeError as exc:
+            raise MembershipImportError(f'JSON inválido: {exc}') from exc
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise MembershipImportError('El JSON debe ser una lista de objetos.')
+        return rows
+
+    reader = csv.DictReader(io.StringIO(content))
+    if 'email' not in (reader.fieldnames or []):
+        raise MembershipImportError('El CSV debe tener una columna "email".')
+    return list(reader)
+
+
+def _clean(rows, default_team_id):
+    """Normaliza las filas a (email, nombre, equipo); las que no sirven se cuentan como inválidas"""
+    cleaned = []
+    invalid = 0
+    for row in rows:
+        email = User.objects.normalize_email(str(row.get('email') or '').strip())
+        name = str(row.get('name') or '').strip() or email.split('@')[0]
+        try:
+            validate_email(email)
+            team_id = int(row.get('team') or default_team_id)
+        except (ValidationError, TypeError, ValueError):
+            invalid += 1
+            continue
+        cleaned.append((email, name[:100], team_id))
+
+    teams = set(Team.objects.filter(pk__in={team_id for _, _, team_id in cleaned}).values_list('pk', flat=True))
+    valid = [row for row in cleaned if row[2] in teams]
+    return valid, invalid + len(cleaned) - len(valid)
+
+
+@transaction.atomic
+def _import_chunk(rows, result):
+    emails = {email for email, _, _ in rows}
+    user_ids = dict(User.objects.filter(email__in=emails).values_list('email', 'pk'))
+
+    # Los usuarios nuevos se crean sin contraseña utilizable: entran tras restablecerla
+    new_users = {}
+    for email, name, _ in rows:
+        if email not in user_ids and email not in new_users:
+            new_users[email] = User(email=email, name=name, password=make_password(None))
+    if new_users:
+        User.objects.bulk_create(new_users.values(), ignore_conflicts=True)
+        user_ids.update(User.objects.filter(email__in=new_users).values_list('email', 'pk'))
+
+    created = insert_memberships((team_id, user_ids[email]) for email, _, team_id in rows)
+    membership_changed(created, 1, dashboards=False)
+
+    result['users_created'] += len(new_users)
+    result['users_existing'] += len(emails) - len(new_users)
+    result['memberships_created'] += len(created)
+    result['memberships_skipped'] += len(rows) - len(created)
+
+
+def import_memberships(rows, default_team_id=None, chunk_size=None):
+    """Crea los usuarios que falten y sus membresías, un lote por transacción.
+
+    Devuelve los totales de usuarios creados y existentes, membresías creadas y omitidas
+    (ya existían o estaban repetidas) y filas inválidas. Reimportar el mismo archivo no
+    duplica nada, así que una importación interrumpida se retoma volviendo a ejecutarla.
+    """
+    chunk_size = chunk_size or settings.TEAM_IMPORT_CHUNK_SIZE
+    rows, invalid = _clean(rows, default_team_id)
+    result = Tally(users_created=0, users_existing=0, memberships_created=0, memberships_skipped=0, invalid=invalid)
+    try:
+        for start in range(0, len(rows), chunk_size):
+            _import_chunk(rows[start:start + chunk_size], result)
+    finally:
+        # Una sola invalidación para todos los lotes: cada lote confirmado cambia los equipos completos
+        if result['memberships_created']:
+            invalidate_dashboards(team_user_ids(*{team_id for _, _, team_id in rows}))
+    return result
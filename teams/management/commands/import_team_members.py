@@ -0,0 +1,38 @@
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from teams.importing import MembershipImportError, import_memberships, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa miembros de equipo desde un CSV (columnas email, name, team) o una lista JSON: '
+        'crea los usuarios que falten y sus membresías en lotes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo .csv o .json')
+        parser.add_argument('--team', type=int, default=None, help='Equipo para las filas sin columna team')
+        parser.add_argument('--format', choices=['csv', 'json'], default=None, help='Por defecto según la extensión')
+        parser.add_argument('--chunk-size', type=int, default=settings.TEAM_IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        fmt = options['format'] or ('json' if path.suffix.lower() == '.json' else 'csv')
+        try:
+            rows = read_rows(path.read_bytes(), fmt)
+        except OSError as error:
+            raise CommandError(f'No se pudo leer {path}: {error}')
+        except MembershipImportError as error:
+            raise CommandError(str(error))
+
+        start = time.perf_counter()
+        result = import_memberships(rows, options['team'], options['chunk_size'])
+        self.stdout.write(
+            f"{len(rows)} filas en {time.perf_counter() - start:.2f} s | "
+            f"Usuarios creados: {result['users_created']} | Usuarios existentes: {result['users_existing']} | "
+            f"Membresías creadas: {result['memberships_created']} | Omitidas: {result['memberships_skipped']} | "
+            f"Inválidas: {result['invalid']}"
+        )
+        self.stdout.write(self.style.SUCCESS('Importación completada'))
@@ -0,0 +1,50 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from notifications.locks import advisory_lock
+from teams.models import Team
+from teams.purge import purge_team
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra por lotes reanudables las tareas, comentarios, notificaciones y membresías '
+        'de los equipos eliminados y, al terminar cada uno, el equipo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--team', type=int, default=None, help='Purgar solo este equipo eliminado')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TEAM_PURGE_BATCH_SIZE,
+            help='Tareas o membresías borradas por transacción'
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None, help='Detenerse tras N lotes; la próxima ejecución continúa'
+        )
+
+    def handle(self, *args, **options):
+        teams = Team.all_objects.filter(deleted_at__isnull=False).order_by('deleted_at', 'pk')
+        if options['team'] is not None:
+            teams = teams.filter(pk=options['team'])
+            if not teams.exists():
+                raise CommandError(f"El equipo {options['team']} no existe o no está eliminado")
+
+        with advisory_lock('purge_deleted_teams') as acquired:
+            if not acquired:
+                self.stdout.write(self.style.WARNING('Otra ejecución está en curso; se omite esta'))
+                return
+            batches = 0
+            for team in teams:
+                start = time.perf_counter()
+                for progress in purge_team(team, options['batch_size']):
+                    self.stdout.write(
+                        f'Equipo {team.pk} "{team.name}": {progress.stage} {progress.deleted}/{progress.total} '
+                        f'({time.perf_counter() - start:.2f} s)'
+                    )
+                    batches += 1
+                    if options['max_batches'] is not None and batches >= options['max_batches']:
+                        self.stdout.write(self.style.WARNING(
+                            f'Se alcanzó el máximo de {batches} lotes; la próxima ejecución continúa'
+                        ))
+                        return
+        self.stdout.write(self.style.SUCCESS('Purga completada'))
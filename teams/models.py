@@ -2,6 +2,14 @@ from django.db import models
 from django.conf import settings
 from accounts.models import User
 
+
+class ActiveTeamManager(models.Manager):
+    """Excluye los equipos eliminados que esperan la purga en segundo plano"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Team(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -14,6 +22,12 @@ class Team(models.Model):
         related_name='led_teams'
     )
     members = models.ManyToManyField(User, through='TeamMembership', related_name='teams')
+    # Marca de borrado: el equipo desaparece al instante y purge_deleted_teams borra sus datos por lotes
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ActiveTeamManager()
+    # Incluye los equipos eliminados; lo usa la purga
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.name
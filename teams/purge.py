@@ -0,0 +1,115 @@
+from collections import Counter as Tally
+from typing import NamedTuple
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from accounts.team_roles import invalidate_team_roles
+from notifications.models import EmailOutbox, Notification, NotificationArchive, TaskNotificationTracker
+from notifications.unread import adjust_unread
+from tasks import counters
+from tasks.dashboard_cache import invalidate_dashboards, team_user_ids
+from tasks.models import Comment, Counter, Task, TaskVisibility
+from .models import Team, TeamMembership
+
+
+class PurgeProgress(NamedTuple):
+    stage: str
+    deleted: int
+    total: int
+
+
+# Tablas que referencian las tareas; las notificaciones se borran después de su outbox
+TASK_DEPENDENTS = [
+    Notification, NotificationArchive, TaskNotificationTracker, Comment, TaskVisibility, Task.assigned_to.through,
+]
+
+
+@transaction.atomic
+def soft_delete(team):
+    """Marca el equipo como eliminado: deja de verse al instante y sus datos se purgan en segundo plano.
+
+    Sus tareas y notificaciones dejan de contarse ya: los contadores por usuario y de no leídas
+    se descuentan aquí, en bloque, y la purga posterior no vuelve a tocarlos.
+    """
+    team.deleted_at = timezone.now()
+    # El post_save invalida los dashboards de miembros y líder
+    team.save(update_fields=['deleted_at'])
+
+    assigned = list(
+        Task.assigned_to.through.objects.filter(task__team_id=team.pk).order_by().values(
+            'user_id', 'task__status'
+        ).annotate(total=Count('pk'))
+    )
+    counters.adjust(Tally({
+        (Counter.USER_STATUS, row['user_id'], row['task__status']): -row['total'] for row in assigned
+    }))
+    unread = Notification.objects.filter(task__team_id=team.pk, is_read=False).order_by().values(
+        'user_id'
+    ).annotate(total=Count('pk'))
+    adjust_unread({row['user_id']: -row['total'] for row in unread})
+
+    invalidate_team_roles(team_user_ids(team.pk))
+    # Los asignados que no son miembros también ven cambiar sus tareas
+    invalidate_dashboards({row['user_id'] for row in assigned})
+
+
+@transaction.atomic
+def delete_task_batch(team_id, batch_size):
+    """Borra un lote de tareas del equipo y sus filas dependientes con DELETE directos; devuelve cuántas borró.
+
+    No pasa por el collector ni por las señales por fila. No hay contadores que mantener:
+    ``soft_delete`` ya descontó las tareas y notificaciones del equipo.
+    """
+    task_ids = list(Task.objects.filter(team_id=team_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+    if not task_ids:
+        return 0
+
+    notifications = Notification._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {EmailOutbox._meta.db_table} WHERE notification_id IN '
+            f'(SELECT id FROM {notifications} WHERE task_id = ANY(%s))',
+            [task_ids]
+        )
+        for model in TASK_DEPENDENTS:
+            cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE task_id = ANY(%s)', [task_ids])
+        cursor.execute(f'DELETE FROM {Task._meta.db_table} WHERE id = ANY(%s)', [task_ids])
+    return len(task_ids)
+
+
+@transaction.atomic
+def delete_membership_batch(team_id, batch_size):
+    """Borra un lote de membresías del equipo; devuelve cuántas borró.
+
+    Los roles y dashboards de los miembros ya dejaron de incluir el equipo al marcarlo
+    como eliminado y sus tareas ya no existen, así que no hay nada más que mantener.
+    """
+    table = TeamMembership._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE team_id = %s ORDER BY id LIMIT %s)',
+            [team_id, batch_size]
+        )
+        return cursor.rowcount
+
+
+def purge_team(team, batch_size):
+    """Borra por lotes las tareas y membresías de un equipo eliminado y, al final, el equipo.
+
+    Genera un ``PurgeProgress`` por lote. Cada lote es una transacción propia: si la purga
+    se interrumpe (o quien la recorre deja de pedir lotes) la próxima ejecución continúa.
+    """
+    stages = [
+        ('tareas', Task.objects.filter(team_id=team.pk), delete_task_batch),
+        ('membresías', TeamMembership.objects.filter(team_id=team.pk), delete_membership_batch),
+    ]
+    for stage, remaining, delete_batch in stages:
+        total = remaining.count()
+        deleted = 0
+        while deleted_now := delete_batch(team.pk, batch_size):
+            deleted += deleted_now
+            yield PurgeProgress(stage, deleted, max(total, deleted))
+
+    # Ya sin filas dependientes, el borrado normal es una consulta por relación y limpia los contadores del equipo
+    Team.all_objects.get(pk=team.pk).delete()
+    yield PurgeProgress('equipo', 1, 1)
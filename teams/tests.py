@@ -1,6 +1,24 @@
+import io
+import json
+import tempfile
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from accounts.models import User
-from teams.models import Team, TeamMember
+from notifications.digest import pending_digest_notifications
+from notifications.models import EmailOutbox, Notification
+from notifications.unread import get_unread_count
+from tasks.counters import member_count_annotation, status_counts
+from tasks.models import Comment, Counter, Task, TaskVisibility
+from teams.importing import import_memberships
+from teams.models import Team, TeamMembership
+from teams.views import TeamDetailView
 
 
 # TESTS UNITARIOS
@@ -40,7 +58,7 @@ class TeamIntegrationTest(TestCase):
 
         team = Team.objects.create(name="QA Team")
 
-        TeamMember.objects.create(team=team, user=user)
+        TeamMembership.objects.create(team=team, user=user)
 
         self.assertEqual(team.members.count(), 1)
 
@@ -54,7 +72,293 @@ class TeamIntegrationTest(TestCase):
 
         team = Team.objects.create(name="Design Team")
 
-        TeamMember.objects.create(team=team, user=user)
+        TeamMembership.objects.create(team=team, user=user)
 
         with self.assertRaises(Exception):
-            TeamMember.objects.create(team=team, user=user)
+            TeamMembership.objects.create(team=team, user=user)
+
+
+# CONSULTAS DE LAS PÁGINAS DE EQUIPOS
+class TeamPagesQueryCountTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@test.com", name="Admin", password="123456", role="admin")
+        self.lead = User.objects.create_user(email="lead@test.com", name="Lead", password="123456", role="team_lead")
+
+    def create_team(self, members, tasks):
+        team = Team.objects.create(name=f"Team {Team.objects.count()}", created_by=self.admin, team_lead=self.lead)
+        TeamMembership.objects.create(team=team, user=self.lead)
+        users = [
+            User.objects.create_user(email=f"member{User.objects.count()}@test.com", name="Member", password="123456")
+            for _ in range(members)
+        ]
+        for user in users:
+            TeamMembership.objects.create(team=team, user=user)
+        for i in range(tasks):
+            task = Task.objects.create(team=team, title=f"Task {i}", created_by=self.lead)
+            task.assigned_to.add(*users[:3])
+        return team
+
+    def count_queries(self, url):
+        self.client.force_login(self.lead)
+        # El badge de la navbar se cuenta una vez y luego sale de la caché
+        get_unread_count(self.lead.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_team_list_queries_and_no_duplicates(self):
+        self.create_team(members=1, tasks=0)
+        few, response = self.count_queries(reverse('team-list'))
+        self.assertEqual([team.member_count for team in response.context['teams']], [2])
+
+        for _ in range(5):
+            self.create_team(members=6, tasks=0)
+        many, response = self.count_queries(reverse('team-list'))
+        self.assertEqual(few, many)
+        # El líder también es miembro, pero cada equipo se lista una vez
+        self.assertEqual(len(response.context['teams']), 6)
+
+    def test_team_detail_queries_independent_of_team_size(self):
+        small = self.create_team(members=2, tasks=2)
+        few, _ = self.count_queries(reverse('team-detail', args=[small.pk]))
+
+        large = self.create_team(members=30, tasks=30)
+        many, response = self.count_queries(reverse('team-detail', args=[large.pk]))
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['tasks']), 20)
+        self.assertEqual(len(response.context['members']), 20)
+        self.assertEqual(response.context['team'].member_count, 31)
+
+    def test_team_detail_pages_tasks_and_members_separately(self):
+        team = self.create_team(members=25, tasks=25)
+        self.client.force_login(self.lead)
+        first = self.client.get(reverse('team-detail', args=[team.pk]))
+
+        tasks_cursor = first.context['tasks_page'].next_cursor
+        response = self.client.get(reverse('team-detail', args=[team.pk]), {'tasks_cursor': tasks_cursor})
+        self.assertEqual(len(response.context['tasks']), 5)
+        self.assertEqual(len(response.context['members']), 20)
+
+        members_cursor = first.context['members_page'].next_cursor
+        response = self.client.get(
+            reverse('team-detail', args=[team.pk]), {'tasks_cursor': tasks_cursor, 'members_cursor': members_cursor}
+        )
+        self.assertEqual(len(response.context['tasks']), 5)
+        self.assertEqual(len(response.context['members']), 6)
+        seen = {user.pk for user in first.context['members']} | {user.pk for user in response.context['members']}
+        self.assertEqual(len(seen), 26)
+
+        response = self.client.get(reverse('team-detail', args=[team.pk]), {'tasks_cursor': 'roto'})
+        self.assertRedirects(response, reverse('team-detail', args=[team.pk]))
+
+    @mock.patch.object(TeamDetailView, 'tasks_page_size', 2)
+    def test_team_detail_sorts_tasks_by_priority(self):
+        team = self.create_team(members=0, tasks=0)
+        for priority in ['medium', 'urgent', 'low', 'high', 'urgent']:
+            Task.objects.create(team=team, title=priority, priority=priority, created_by=self.lead)
+        self.client.force_login(self.lead)
+
+        titles = []
+        params = {}
+        while True:
+            response = self.client.get(reverse('team-detail', args=[team.pk]), params)
+            titles += [task.title for task in response.context['tasks']]
+            if not response.context['tasks_page'].has_next:
+                break
+            params = {'tasks_cursor': response.context['tasks_page'].next_cursor}
+        self.assertEqual(titles, ['urgent', 'urgent', 'high', 'medium', 'low'])
+
+
+# ALTAS Y BAJAS DE MIEMBROS EN BLOQUE
+class TeamBulkMembershipTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@test.com", name="Admin", password="123456", role="admin")
+        self.lead = User.objects.create_user(email="lead@test.com", name="Lead", password="123456", role="team_lead")
+        self.team = Team.objects.create(name="Equipo", created_by=self.admin, team_lead=self.lead)
+        TeamMembership.objects.create(team=self.team, user=self.lead)
+        self.task = Task.objects.create(team=self.team, title="Tarea", created_by=self.lead)
+        self.users = [
+            User.objects.create_user(email=f"user{i}@test.com", name=f"User {i}", password="123456") for i in range(5)
+        ]
+
+    def member_count(self):
+        return Team.objects.annotate(member_count=member_count_annotation()).get(pk=self.team.pk).member_count
+
+    def sees_task(self, user):
+        return TaskVisibility.objects.filter(user=user, task=self.task).exists()
+
+    def test_batch_add_and_remove(self):
+        self.client.force_login(self.lead)
+        ids = [user.pk for user in self.users[:3]] + [self.admin.pk]
+        self.client.post(reverse('add-team-member', args=[self.team.pk]), {'user_id': ids})
+        # El líder no puede agregar admins
+        self.assertEqual(set(self.team.members.values_list('pk', flat=True)), {self.lead.pk, *ids[:3]})
+        self.assertEqual(self.member_count(), 4)
+        self.assertTrue(self.sees_task(self.users[0]))
+
+        self.client.post(reverse('add-team-member', args=[self.team.pk]), {'user_id': ids[:2]})
+        self.assertEqual(self.member_count(), 4)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse('remove-team-members', args=[self.team.pk]),
+                {'user_id': [self.lead.pk, self.users[0].pk, self.users[1].pk]}
+            )
+        # Un único DELETE para todas las membresías
+        deletes = [query for query in queries.captured_queries if query['sql'].startswith('DELETE FROM teams_teammembership')]
+        self.assertEqual(len(deletes), 1)
+        # El líder se conserva
+        self.assertEqual(set(self.team.members.values_list('pk', flat=True)), {self.lead.pk, self.users[2].pk})
+        self.assertEqual(self.member_count(), 2)
+        self.assertFalse(self.sees_task(self.users[0]))
+
+    def test_import_creates_users_and_memberships(self):
+        other = Team.objects.create(name="Otro", created_by=self.admin)
+        TeamMembership.objects.create(team=self.team, user=self.users[0])
+        rows = [
+            {'email': 'new@test.com', 'name': 'Nuevo'},
+            {'email': 'new@test.com', 'name': 'Nuevo'},
+            {'email': 'user0@test.com'},
+            {'email': 'user1@test.com', 'team': other.pk},
+            {'email': 'no-es-correo'},
+            {'email': 'x@test.com', 'team': 999999},
+        ]
+        result = import_memberships(rows, default_team_id=self.team.pk, chunk_size=2)
+        self.assertEqual(result['users_created'], 1)
+        self.assertEqual(result['memberships_created'], 2)
+        self.assertEqual(result['memberships_skipped'], 2)
+        self.assertEqual(result['invalid'], 2)
+
+        new = User.objects.get(email='new@test.com')
+        self.assertFalse(new.has_usable_password())
+        self.assertTrue(self.sees_task(new))
+        self.assertTrue(other.members.filter(pk=self.users[1].pk).exists())
+
+        # Reimportar no duplica nada
+        again = import_memberships(rows, default_team_id=self.team.pk)
+        self.assertEqual((again['users_created'], again['memberships_created']), (0, 0))
+
+    def test_import_view_and_command(self):
+        upload = SimpleUploadedFile('miembros.csv', b'email,name,team\nana@test.com,Ana,' + str(self.team.pk).encode())
+        self.client.force_login(self.lead)
+        self.assertEqual(self.client.post(reverse('team-import-members'), {'file': upload}).status_code, 403)
+
+        self.client.force_login(self.admin)
+        upload.seek(0)
+        response = self.client.post(reverse('team-import-members'), {'file': upload})
+        self.assertRedirects(response, reverse('team-list'))
+        self.assertTrue(self.team.members.filter(email='ana@test.com').exists())
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as source:
+            json.dump([{'email': 'luis@test.com', 'name': 'Luis'}], source)
+            source.flush()
+            call_command('import_team_members', source.name, team=self.team.pk, stdout=io.StringIO())
+        self.assertTrue(self.team.members.filter(email='luis@test.com').exists())
+
+
+# BORRADO DIFERIDO Y POR LOTES DE EQUIPOS
+class TeamPurgeTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@test.com", name="Admin", password="123456", role="admin")
+        self.lead = User.objects.create_user(email="lead@test.com", name="Lead", password="123456", role="team_lead")
+        self.user = User.objects.create_user(email="user@test.com", name="User", password="123456")
+        self.team = Team.objects.create(name="Equipo", created_by=self.admin, team_lead=self.lead)
+        self.team.members.add(self.lead, self.user)
+        self.other = Team.objects.create(name="Otro", created_by=self.admin)
+        self.other.members.add(self.user)
+        self.kept = Task.objects.create(team=self.other, title="Se conserva", created_by=self.admin)
+        self.kept.assigned_to.add(self.user)
+
+        self.tasks = [Task.objects.create(team=self.team, title=f"Tarea {i}", created_by=self.lead) for i in range(5)]
+        for task in self.tasks:
+            task.assigned_to.add(self.user)
+            Comment.objects.create(task=task, user=self.lead, content="Comentario")
+            notification = Notification.objects.create(user=self.user, task=task, message="Aviso")
+            EmailOutbox.objects.create(notification=notification)
+
+    def test_delete_view_hides_team_immediately(self):
+        # Una más sin outbox, a la espera del resumen
+        Notification.objects.create(
+            user=self.user, task=self.tasks[0], message="Resumen", notification_type='task_due_24h'
+        )
+        self.assertTrue(pending_digest_notifications().filter(user=self.user).exists())
+        self.assertEqual(get_unread_count(self.user.pk), 6)
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('team-delete', args=[self.team.pk]))
+        self.assertRedirects(response, reverse('team-list'))
+
+        # Nada se borró todavía, pero el equipo y sus tareas ya no se ven
+        self.assertTrue(Task.objects.filter(team=self.team).exists())
+        self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
+        self.assertEqual(self.client.get(reverse('team-detail', args=[self.team.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('task-detail', args=[self.tasks[0].uuid])).status_code, 404)
+        self.assertEqual(list(Task.objects.visible_to(self.user)), [self.kept])
+        self.assertEqual(list(Task.objects.visible_to(self.admin)), [self.kept])
+        self.assertEqual(sum(status_counts(Counter.TEAM_STATUS, Team.objects.values('pk')).values()), 1)
+
+        self.client.force_login(self.lead)
+        self.assertEqual(self.client.get(reverse('team-list')).context['teams'].count(), 0)
+
+        # Sus notificaciones y tareas asignadas dejan de contarse sin esperar la purga
+        self.client.force_login(self.user)
+        self.assertEqual(get_unread_count(self.user.pk), 0)
+        self.assertEqual(len(self.client.get(reverse('notification-list')).context['notifications']), 0)
+        self.assertFalse(pending_digest_notifications().filter(user=self.user).exists())
+        self.assertEqual(self.client.get(reverse('my-tasks')).context['total_tasks'], 1)
+        self.assertEqual(self.client.get(reverse('dashboard')).context['my_tasks_count'], 1)
+        response = self.client.post(reverse('notification-read-all'), follow=True)
+        self.assertEqual(len(response.context['messages']), 0)
+        self.assertTrue(Notification.objects.filter(user=self.user, task__team=self.team, is_read=False).exists())
+
+    def test_purge_deletes_in_resumable_batches(self):
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('team-delete', args=[self.team.pk]))
+        self.assertEqual(sum(status_counts(Counter.USER_STATUS, [self.user.pk]).values()), 1)
+
+        # Cada lote es una transacción: cortar la purga deja hecho lo ya borrado
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('purge_deleted_teams', batch_size=2, max_batches=2, stdout=out)
+        self.assertIn('tareas 4/5', out.getvalue())
+        self.assertEqual(Task.objects.filter(team=self.team).count(), 1)
+        # La purga no vuelve a descontar lo que soft_delete ya descontó
+        self.assertEqual(sum(status_counts(Counter.USER_STATUS, [self.user.pk]).values()), 1)
+
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            call_command('purge_deleted_teams', batch_size=2, stdout=out)
+        self.assertIn('tareas 1/1', out.getvalue())
+        self.assertIn('membresías 2/2', out.getvalue())
+        # Borrados directos por lote, sin cargar tareas ni comentarios uno por uno
+        deletes = [query for query in queries.captured_queries if query['sql'].startswith('DELETE FROM tasks_task ')]
+        self.assertEqual(len(deletes), 1)
+
+        self.assertFalse(Team.all_objects.filter(pk=self.team.pk).exists())
+        self.assertFalse(Task.objects.filter(pk__in=[task.pk for task in self.tasks]).exists())
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(EmailOutbox.objects.count(), 0)
+        self.assertFalse(TaskVisibility.objects.filter(task__team_id=self.team.pk).exists())
+        self.assertFalse(Counter.objects.filter(scope=Counter.TEAM_STATUS, object_id=self.team.pk).exists())
+        self.assertEqual(sum(status_counts(Counter.USER_STATUS, [self.user.pk]).values()), 1)
+        self.assertEqual(get_unread_count(self.user.pk), 0)
+
+        # El otro equipo queda intacto
+        self.assertEqual(list(Task.objects.visible_to(self.user)), [self.kept])
+        self.assertTrue(self.other.members.filter(pk=self.user.pk).exists())
+
+    def test_purge_only_deleted_teams(self):
+        with self.assertRaises(CommandError):
+            call_command('purge_deleted_teams', team=self.other.pk, stdout=io.StringIO())
+        call_command('purge_deleted_teams', stdout=io.StringIO())
+        self.assertTrue(Team.objects.filter(pk=self.team.pk).exists())
+        self.assertEqual(Task.objects.filter(team=self.team).count(), 5)
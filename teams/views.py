@@ -3,10 +3,17 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib import messages
+from django.db.models import Q
 from django.http import JsonResponse
 from accounts.permissions import admin_required, team_lead_required, is_team_lead_of
 from accounts.models import User
+from tasks.counters import member_count_annotation
+from tasks.pagination import InvalidCursor, keyset_paginate
+from . import bulk
+from .forms import MemberImportForm
+from .importing import MembershipImportError, import_memberships, read_rows
 from .models import Team, TeamMembership
+from .purge import soft_delete
 
 
 class TeamListView(LoginRequiredMixin, ListView):
@@ -16,12 +23,16 @@ class TeamListView(LoginRequiredMixin, ListView):
     
     def get_queryset(self):
         user = self.request.user
-        if user.role == 'admin':
-            return Team.objects.all()
-        elif user.role == 'team_lead':
-            return Team.objects.filter(team_lead=user) | Team.objects.filter(members=user)
-        else:
-            return Team.objects.filter(members=user)
+        teams = Team.objects.all()
+        if user.role != 'admin':
+            # Subconsulta en lugar de JOIN con los miembros: cada equipo aparece una sola vez
+            member_of = Q(pk__in=TeamMembership.objects.filter(user=user).values('team_id'))
+            if user.role == 'team_lead':
+                member_of |= Q(team_lead=user)
+            teams = teams.filter(member_of)
+        return teams.select_related('team_lead').annotate(
+            member_count=member_count_annotation()
+        ).order_by('name', 'pk')
 
 
 class TeamCreateView(LoginRequiredMixin, CreateView):
@@ -61,20 +72,43 @@ class TeamDetailView(LoginRequiredMixin, DetailView):
     model = Team
     template_name = 'teams/team_detail.html'
     context_object_name = 'team'
+    # Tareas y miembros se paginan por cursor, cada lista con el suyo
+    tasks_page_size = 20
+    members_page_size = 20
+    # Por prioridad como el resto de las listas de tareas; usa task_team_rank_idx (team, priority_rank, created_at)
+    task_ordering = ('-priority_rank', '-created_at', '-id')
+    member_ordering = ('name', 'id')
+    
+    def get_queryset(self):
+        return Team.objects.select_related('team_lead', 'created_by').annotate(
+            member_count=member_count_annotation()
+        )
+    
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        try:
+            self.tasks_page = keyset_paginate(
+                self.object.tasks.select_related('team').prefetch_related('assigned_to'),
+                self.task_ordering, request.GET.get('tasks_cursor'), self.tasks_page_size
+            )
+            self.members_page = keyset_paginate(
+                self.object.members.all(), self.member_ordering, request.GET.get('members_cursor'),
+                self.members_page_size
+            )
+        except InvalidCursor:
+            return redirect('team-detail', pk=self.object.pk)
+        return self.render_to_response(self.get_context_data(object=self.object))
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['tasks'] = self.object.tasks.all()
-        context['members'] = self.object.members.all()
+        context['tasks'] = self.tasks_page.items
+        context['tasks_page'] = self.tasks_page
+        context['members'] = self.members_page.items
+        context['members_page'] = self.members_page
+        context['tasks_cursor'] = self.request.GET.get('tasks_cursor', '')
+        context['members_cursor'] = self.request.GET.get('members_cursor', '')
         context['is_team_lead'] = is_team_lead_of(self.request.user, self.object)
         context['is_admin'] = self.request.user.role == 'admin'
-        
-        # Usuarios disponibles para agregar al equipo
-        if context['is_team_lead'] or context['is_admin']:
-            context['available_users'] = User.objects.exclude(
-                id__in=self.object.members.values_list('id', flat=True)
-            ).filter(is_active=True)
-        
         return context
 
 
@@ -83,6 +117,8 @@ class TeamDeleteView(LoginRequiredMixin, DeleteView):
     template_name = 'teams/team_confirm_delete.html'
     success_url = reverse_lazy('team-list')
     context_object_name = 'team'
+    # Miembros listados en la confirmación; el resto solo se cuenta
+    members_preview = 20
     
     def dispatch(self, request, *args, **kwargs):
         if request.user.role != 'admin':
@@ -90,10 +126,21 @@ class TeamDeleteView(LoginRequiredMixin, DeleteView):
             return redirect('team-list')
         return super().dispatch(request, *args, **kwargs)
     
-    def delete(self, request, *args, **kwargs):
-        team = self.get_object()
-        messages.success(request, f'Equipo "{team.name}" eliminado exitosamente.')
-        return super().delete(request, *args, **kwargs)
+    def get_queryset(self):
+        return Team.objects.annotate(member_count=member_count_annotation())
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['task_count'] = self.object.tasks.count()
+        context['members'] = list(self.object.members.order_by('name', 'id')[:self.members_preview])
+        context['more_members'] = max(self.object.member_count - len(context['members']), 0)
+        return context
+    
+    def form_valid(self, form):
+        # Se marca y se oculta al instante; purge_deleted_teams borra sus tareas y membresías por lotes
+        soft_delete(self.object)
+        messages.success(self.request, f'Equipo "{self.object.name}" eliminado exitosamente.')
+        return redirect(self.get_success_url())
 
 
 @admin_required
@@ -117,13 +164,17 @@ def assign_team_lead(request, pk):
                 messages.error(request, 'El usuario debe tener rol de Team Lead o Admin.')
         return redirect('team-detail', pk=pk)
     
-    team_leads = User.objects.filter(role__in=['team_lead', 'admin'])
+    # Los candidatos se buscan con el autocompletado de usuarios (user-search)
     return render(request, 'teams/assign_team_lead.html', {
         'team': team,
-        'team_leads': team_leads
+        'current_lead': [team.team_lead] if team.team_lead_id else []
     })
 
 
+def _int_ids(values):
+    return [int(value) for value in values if str(value).isdigit()]
+
+
 @team_lead_required
 def add_team_member(request, pk):
     """Vista para que Team Lead agregue miembros al equipo"""
@@ -135,34 +186,23 @@ def add_team_member(request, pk):
         return redirect('team-detail', pk=pk)
     
     if request.method == 'POST':
-        user_id = request.POST.get('user_id')
-        if user_id:
-            user = get_object_or_404(User, pk=user_id)
-            membership, created = TeamMembership.objects.get_or_create(
-                user=user,
-                team=team
-            )
+        user_ids = request.POST.getlist('user_id')
+        if user_ids:
+            # Mismo criterio que el autocompletado: activos y, para líderes, sin admins
+            candidates = User.objects.filter(is_active=True, pk__in=_int_ids(user_ids))
+            if request.user.role != 'admin':
+                candidates = candidates.exclude(role='admin')
+            added, skipped = bulk.add_members(team, candidates.values_list('pk', flat=True))
             
-            if created:
-                messages.success(request, f'{user.name} agregado al equipo.')
-            else:
-                messages.info(request, f'{user.name} ya es miembro del equipo.')
+            if added:
+                messages.success(request, f'{added} miembro(s) agregado(s) al equipo.')
+            if skipped:
+                messages.info(request, f'{skipped} usuario(s) ya eran miembros del equipo.')
         
         return redirect('team-detail', pk=pk)
     
-    # Usuarios que no son miembros del equipo
-    available_users = User.objects.exclude(
-        id__in=team.members.values_list('id', flat=True)
-    ).filter(is_active=True)
-    
-    # Si es team_lead (no admin), excluir admins de la lista
-    if request.user.role == 'team_lead':
-        available_users = available_users.exclude(role='admin')
-    
-    return render(request, 'teams/add_member.html', {
-        'team': team,
-        'available_users': available_users
-    })
+    # Los usuarios que no son miembros se buscan con el autocompletado de usuarios (user-search)
+    return render(request, 'teams/add_member.html', {'team': team})
 
 
 @team_lead_required
@@ -177,7 +217,7 @@ def remove_team_member(request, pk, user_id):
         return redirect('team-detail', pk=pk)
     
     # No permitir eliminar al líder del equipo
-    if team.team_lead == user:
+    if team.team_lead_id == user.pk:
         messages.error(request, 'No puedes eliminar al líder del equipo.')
         return redirect('team-detail', pk=pk)
     
@@ -188,4 +228,47 @@ def remove_team_member(request, pk, user_id):
     except TeamMembership.DoesNotExist:
         messages.error(request, 'El usuario no es miembro del equipo.')
     
-    return redirect('team-detail', pk=pk)
\ No newline at end of file
+    return redirect('team-detail', pk=pk)
+
+
+@team_lead_required
+def remove_team_members(request, pk):
+    """Quita del equipo los miembros seleccionados con un único DELETE"""
+    team = get_object_or_404(Team, pk=pk)
+    
+    if not is_team_lead_of(request.user, team):
+        messages.error(request, 'No tienes permisos para eliminar miembros de este equipo.')
+        return redirect('team-detail', pk=pk)
+    
+    if request.method == 'POST':
+        removed = bulk.remove_members(team, _int_ids(request.POST.getlist('user_id')))
+        if removed:
+            messages.success(request, f'{removed} miembro(s) eliminado(s) del equipo.')
+        else:
+            messages.info(request, 'No se eliminó ningún miembro (el líder no puede eliminarse).')
+    return redirect('team-detail', pk=pk)
+
+
+@admin_required
+def import_team_members(request):
+    """Vista para que Admin importe usuarios y membresías desde un CSV o JSON"""
+    form = MemberImportForm(request.POST or None, request.FILES or None)
+    if request.method == 'POST' and form.is_valid():
+        upload = form.cleaned_data['file']
+        fmt = 'json' if upload.name.lower().endswith('.json') else 'csv'
+        team = form.cleaned_data['team']
+        try:
+            rows = read_rows(upload.read(), fmt)
+        except MembershipImportError as error:
+            form.add_error('file', str(error))
+        else:
+            result = import_memberships(rows, team.pk if team else None)
+            messages.success(
+                request,
+                f"Importación completada: {result['users_created']} usuarios creados, "
+                f"{result['memberships_created']} membresías creadas, {result['memberships_skipped']} omitidas "
+                f"y {result['invalid']} filas inválidas."
+            )
+            return redirect('team-list')
+    
+    return render(request, 'teams/import_members.html', {'form': form})